@@ -0,0 +1,50 @@
+from ipaddress import IPv4Interface, IPv4Network
+
+
+# Gives each distinct interface a dense id, so that per-interface state can be
+# kept in lists instead of dicts keyed by IPv4Interface.
+class AddressTable:
+    def __init__(self):
+        self.ids: dict[str, int] = dict()
+        self.interface_ids: dict[IPv4Interface, int] = dict()
+        self.interfaces: list[IPv4Interface] = []
+        # interface id -> subnet id
+        self.subnet_ids: list[int] = []
+        self.network_ids: dict[IPv4Network, int] = dict()
+        self.networks: list[IPv4Network] = []
+
+    def __len__(self):
+        return len(self.interfaces)
+
+    # each address string is parsed only once
+    def intern(self, addr_str: str) -> int:
+        iface = self.ids.get(addr_str)
+        if iface is None:
+            iface = self.add(IPv4Interface(addr_str))
+            self.ids[addr_str] = iface
+        return iface
+
+    # iface is the id given by intern(), or -1 if addr was parsed elsewhere
+    def lookup(self, addr: IPv4Interface, iface: int = -1) -> int:
+        if iface < 0:
+            return self.add(addr)
+        return iface
+
+    def add(self, addr: IPv4Interface) -> int:
+        iface = self.interface_ids.get(addr)
+        if iface is not None:
+            return iface
+
+        iface = len(self.interfaces)
+        self.interface_ids[addr] = iface
+        self.interfaces.append(addr)
+        self.subnet_ids.append(self.add_network(addr.network))
+        return iface
+
+    def add_network(self, network: IPv4Network) -> int:
+        subnet = self.network_ids.get(network)
+        if subnet is None:
+            subnet = len(self.networks)
+            self.network_ids[network] = subnet
+            self.networks.append(network)
+        return subnet
@@ -1,16 +1,24 @@
-from datetime import datetime
 from dataclasses import dataclass
 from ipaddress import IPv4Interface
-from typing import Optional
+from typing import Optional, Union
 from enum import Enum, auto
+from typing import Iterable
+from answer.stream import parse_records
+from answer.epoch import parse_date, format_date
+from answer.address import AddressTable
+from answer import cli, extsort, instrument
 import argparse
+import sys
 
 
 @dataclass
 class MonitorLog:
-    date: datetime
+    # seconds since 1970-01-01 00:00:00
+    date: int
     addr: IPv4Interface
     time: Optional[int]
+    # id in the AddressTable which the log is parsed with, or -1
+    iface: int = -1
 
 
 def parse_time(time_str: str) -> Optional[int]:
@@ -20,13 +28,16 @@ def parse_time(time_str: str) -> Optional[int]:
         return None
     
 
-def parse_log(line: str) -> MonitorLog:
+def parse_log(line: str, table: Optional[AddressTable] = None) -> MonitorLog:
     [date_str, addr_str, time_str] = line.split(',')
-    date = datetime.strptime(date_str, '%Y%m%d%H%M%S')
-    addr = IPv4Interface(addr_str)
+    date = parse_date(date_str)
     time = parse_time(time_str)
 
-    return MonitorLog(date, addr, time)
+    if table is None:
+        return MonitorLog(date, IPv4Interface(addr_str), time)
+
+    iface = table.intern(addr_str)
+    return MonitorLog(date, table.interfaces[iface], time, iface)
 
 
 class Status(Enum):
@@ -38,21 +49,21 @@ class Status(Enum):
 @dataclass
 class InterfaceState:
     status: Status
-    periods: list[tuple[datetime, datetime]]
-    fail_start: Optional[datetime]
+    periods: list[tuple[int, int]]
+    fail_start: Optional[int]
 
-    def start(self, fail_start: datetime):
+    def start(self, fail_start: int):
         self.fail_start = fail_start
 
-    def end(self, fail_end: datetime):
+    def end(self, fail_end: int):
         if self.fail_start is not None:
             self.periods.append((self.fail_start, fail_end))
             self.fail_start = None
 
     def format(self) -> list[str]:
-        format_list = [ f'{period[0]} - {period[1]}' for period in self.periods]
+        format_list = [ f'{format_date(period[0])} - {format_date(period[1])}' for period in self.periods]
         if self.fail_start is not None:
-            format_list.append(f'{self.fail_start} -')
+            format_list.append(f'{format_date(self.fail_start)} -')
         return format_list
 
 
@@ -85,22 +96,28 @@ def is_timeout(log: MonitorLog) -> bool:
     return log.time is None
 
 
-def failure_states(logs: list[MonitorLog]) -> dict[IPv4Interface, InterfaceState]:
-    states = dict()
-    for log in sorted(logs, key=lambda log: log.date):
-        if log.addr not in states:
-            states[log.addr] = InterfaceState(Status.IDLE, [], None)
+def failure_states(logs: list[MonitorLog], table: Optional[AddressTable] = None) -> dict[IPv4Interface, InterfaceState]:
+    return failure_states_stream(sorted(logs, key=lambda log: log.date), table)
+
+
+# logs must be given in order of date
+def failure_states_stream(logs: Iterable[MonitorLog], table: Optional[AddressTable] = None) -> dict[IPv4Interface, InterfaceState]:
+    table = AddressTable() if table is None else table
+    states: list[Optional[InterfaceState]] = [None] * len(table)
+    order = []
+    for log in logs:
+        iface = table.lookup(log.addr, log.iface)
+        if iface >= len(states):
+            states.extend([None] * (len(table) - len(states)))
 
-        states[log.addr] = transitState(log, states[log.addr])
+        if states[iface] is None:
+            states[iface] = InterfaceState(Status.IDLE, [], None)
+            order.append(iface)
 
-    return states
+        states[iface] = transitState(log, states[iface])
 
+    return {table.interfaces[iface]: states[iface] for iface in order}
 
-def parse_logs_from_file(path: str) -> list[MonitorLog]:
-    with open(path, 'r') as f:
-        logs = [parse_log(line) for line in f.readlines()]
-        return logs
-        
 
 def format_states(states: dict[IPv4Interface, InterfaceState]) -> list[str]:
     format_list = []
@@ -111,15 +128,28 @@ def format_states(states: dict[IPv4Interface, InterfaceState]) -> list[str]:
     return format_list
 
 
-def solve_as_text(src: str):
-    logs = parse_logs_from_file(src)
-    states = failure_states(logs)
-    return '\n'.join(format_states(states))
+def solve(src: Union[str, Iterable[str]],
+          window: Optional[int] = None,
+          memory: Optional[int] = None) -> dict[IPv4Interface, InterfaceState]:
+    # src is a path, or the paths of the logs of several monitoring servers
+    paths = extsort.paths_of(src)
+    table = AddressTable()
+    records = extsort.records_in_order(paths, table, window, memory)
+    with instrument.phase('update'):
+        return failure_states_stream(parse_records(records, table, MonitorLog), table)
+
+
+def solve_as_text(src: Union[str, Iterable[str]], window: Optional[int] = None, memory: Optional[int] = None):
+    states = solve(src, window, memory)
+    with instrument.phase('format'):
+        return '\n'.join(format_states(states))
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
-    parser.add_argument('src', help='input log file')
+    parser.add_argument('src', nargs='+', help='input log files, merged by date')
+    cli.add_arguments(parser)
     args = parser.parse_args()
+    cli.check_arguments(parser, args)
 
-    print(solve_as_text(args.src))
+    cli.run(sys.modules[__name__], 'ans1', args, [])
@@ -1,16 +1,24 @@
-from datetime import datetime
 from dataclasses import dataclass
 from ipaddress import IPv4Interface
-from typing import Optional
+from typing import Optional, Union
 from enum import Enum, auto
+from typing import Iterable
+from answer.stream import parse_records
+from answer.epoch import parse_date, format_date
+from answer.address import AddressTable
+from answer import cli, extsort, instrument
 import argparse
+import sys
 
 
 @dataclass
 class MonitorLog:
-    date: datetime
+    # seconds since 1970-01-01 00:00:00
+    date: int
     addr: IPv4Interface
     time: Optional[int]
+    # id in the AddressTable which the log is parsed with, or -1
+    iface: int = -1
 
 
 def parse_time(time_str: str) -> Optional[int]:
@@ -20,13 +28,16 @@ def parse_time(time_str: str) -> Optional[int]:
         return None
     
 
-def parse_log(line: str) -> MonitorLog:
+def parse_log(line: str, table: Optional[AddressTable] = None) -> MonitorLog:
     [date_str, addr_str, time_str] = line.split(',')
-    date = datetime.strptime(date_str, '%Y%m%d%H%M%S')
-    addr = IPv4Interface(addr_str)
+    date = parse_date(date_str)
     time = parse_time(time_str)
 
-    return MonitorLog(date, addr, time)
+    if table is None:
+        return MonitorLog(date, IPv4Interface(addr_str), time)
+
+    iface = table.intern(addr_str)
+    return MonitorLog(date, table.interfaces[iface], time, iface)
 
 
 class Status(Enum):
@@ -37,16 +48,16 @@ class Status(Enum):
 
 @dataclass
 class FailState:
-    periods: list[tuple[datetime, datetime]]
-    fail_start: Optional[datetime]
-    timeout_start: Optional[datetime]
+    periods: list[tuple[int, int]]
+    fail_start: Optional[int]
+    timeout_start: Optional[int]
     timeout_count: int
 
     def start(self):
         self.fail_start = self.timeout_start
         self.timeout_start = None
 
-    def end(self, fail_end: datetime):
+    def end(self, fail_end: int):
         if self.fail_start is not None:
             self.periods.append((self.fail_start, fail_end))
             self.fail_start = None
@@ -58,9 +69,9 @@ class InterfaceState:
     fail_state: FailState
 
     def format(self) -> list[str]:
-        format_list = [ f'{period[0]} - {period[1]}' for period in self.fail_state.periods]
+        format_list = [ f'{format_date(period[0])} - {format_date(period[1])}' for period in self.fail_state.periods]
         if self.fail_state.fail_start is not None:
-            format_list.append(f'{self.fail_state.fail_start} -')
+            format_list.append(f'{format_date(self.fail_state.fail_start)} -')
         return format_list
 
 
@@ -110,22 +121,28 @@ def is_timeout(log: MonitorLog) -> bool:
     return log.time is None
 
 
-def failure_states(logs: list[MonitorLog], threshould: int) -> dict[IPv4Interface, InterfaceState]:
-    states = dict()
-    for log in sorted(logs, key=lambda log: log.date):
-        if log.addr not in states:
-            states[log.addr] = InterfaceState(Status.IDLE, FailState([], None, None, 0))
+def failure_states(logs: list[MonitorLog], threshould: int, table: Optional[AddressTable] = None) -> dict[IPv4Interface, InterfaceState]:
+    return failure_states_stream(sorted(logs, key=lambda log: log.date), threshould, table)
+
+
+# logs must be given in order of date
+def failure_states_stream(logs: Iterable[MonitorLog], threshould: int, table: Optional[AddressTable] = None) -> dict[IPv4Interface, InterfaceState]:
+    table = AddressTable() if table is None else table
+    states: list[Optional[InterfaceState]] = [None] * len(table)
+    order = []
+    for log in logs:
+        iface = table.lookup(log.addr, log.iface)
+        if iface >= len(states):
+            states.extend([None] * (len(table) - len(states)))
 
-        update_state(log, states[log.addr], threshould)
+        if states[iface] is None:
+            states[iface] = InterfaceState(Status.IDLE, FailState([], None, None, 0))
+            order.append(iface)
 
-    return states
+        update_state(log, states[iface], threshould)
 
+    return {table.interfaces[iface]: states[iface] for iface in order}
 
-def parse_logs_from_file(path: str) -> list[MonitorLog]:
-    with open(path, 'r') as f:
-        logs = [parse_log(line) for line in f.readlines()]
-        return logs
-        
 
 def format_states(states: dict[IPv4Interface, InterfaceState]) -> list[str]:
     format_list = []
@@ -136,16 +153,30 @@ def format_states(states: dict[IPv4Interface, InterfaceState]) -> list[str]:
     return format_list
 
 
-def solve_as_text(src: str, threshould: int):
-    logs = parse_logs_from_file(src)
-    states = failure_states(logs, threshould)
-    return '\n'.join(format_states(states))
+def solve(src: Union[str, Iterable[str]],
+          threshould: int,
+          window: Optional[int] = None,
+          memory: Optional[int] = None) -> dict[IPv4Interface, InterfaceState]:
+    # src is a path, or the paths of the logs of several monitoring servers
+    paths = extsort.paths_of(src)
+    table = AddressTable()
+    records = extsort.records_in_order(paths, table, window, memory)
+    with instrument.phase('update'):
+        return failure_states_stream(parse_records(records, table, MonitorLog), threshould, table)
+
+
+def solve_as_text(src: Union[str, Iterable[str]], threshould: int, window: Optional[int] = None, memory: Optional[int] = None):
+    states = solve(src, threshould, window, memory)
+    with instrument.phase('format'):
+        return '\n'.join(format_states(states))
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
-    parser.add_argument('src', help='input log file')
+    parser.add_argument('src', nargs='+', help='input log files, merged by date')
     parser.add_argument('N', type=int, help='threshould for timeout')
+    cli.add_arguments(parser)
     args = parser.parse_args()
+    cli.check_arguments(parser, args)
 
-    print(solve_as_text(args.src, int(args.N)))
+    cli.run(sys.modules[__name__], 'ans2', args, [int(args.N)])
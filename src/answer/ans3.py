@@ -1,17 +1,25 @@
-from datetime import datetime
 from dataclasses import dataclass
 from ipaddress import IPv4Interface
-from typing import Optional
+from typing import Optional, Union
 from enum import Enum, auto
 from typing import TypeVar, Generic
+from typing import Iterable
+from answer.stream import parse_records
+from answer.epoch import parse_date, format_date
+from answer.address import AddressTable
+from answer import cli, extsort, instrument
 import argparse
+import sys
 
 
 @dataclass
 class MonitorLog:
-    date: datetime
+    # seconds since 1970-01-01 00:00:00
+    date: int
     addr: IPv4Interface
     time: Optional[int]
+    # id in the AddressTable which the log is parsed with, or -1
+    iface: int = -1
 
 
 def parse_time(time_str: str) -> Optional[int]:
@@ -21,13 +29,16 @@ def parse_time(time_str: str) -> Optional[int]:
         return None
     
 
-def parse_log(line: str) -> MonitorLog:
+def parse_log(line: str, table: Optional[AddressTable] = None) -> MonitorLog:
     [date_str, addr_str, time_str] = line.split(',')
-    date = datetime.strptime(date_str, '%Y%m%d%H%M%S')
-    addr = IPv4Interface(addr_str)
+    date = parse_date(date_str)
     time = parse_time(time_str)
 
-    return MonitorLog(date, addr, time)
+    if table is None:
+        return MonitorLog(date, IPv4Interface(addr_str), time)
+
+    iface = table.intern(addr_str)
+    return MonitorLog(date, table.interfaces[iface], time, iface)
 
 
 class Status(Enum):
@@ -44,21 +55,45 @@ class RingBuffer(Generic[T]):
         self.size = size
         self.idx = 0
         self.buf = []
+        # running sum and number of timeouts (None) in buf
+        self.total = 0
+        self.timeouts = 0
 
     def __eq__(self, other):
         return self.__dict__ == other.__dict__
 
     def __repr__(self):
-        return f'<RingBuffer size={self.size}, {self.buf}, idx={self.idx}, ave={average_time(self.buf)}>'
+        return f'<RingBuffer size={self.size}, {self.buf}, idx={self.idx}, ave={self.average()}>'
 
     def append(self, x: T):
         if len(self.buf) < self.size:
             self.buf.append(x)
         else:
+            self.evict(self.buf[self.idx])
             self.buf[self.idx] = x
 
+        if x is None:
+            self.timeouts += 1
+        else:
+            self.total += x
+
         self.idx = (self.idx + 1) % self.size
 
+    def evict(self, x: T):
+        if x is None:
+            self.timeouts -= 1
+        else:
+            self.total -= x
+
+    # same as average_time(self.buf), but in constant time
+    def average(self) -> Optional[float]:
+        if len(self.buf) == 0:
+            return 0
+
+        if self.timeouts > 0:
+            return None
+        return self.total / len(self.buf)
+
 
 def average_time(time_list: list[Optional[int]]) -> Optional[float]:
     if time_list == []:
@@ -75,42 +110,42 @@ def average_time(time_list: list[Optional[int]]) -> Optional[float]:
 
 @dataclass
 class OverloadState:
-    periods: list[tuple[datetime, datetime]]
-    overload_start: Optional[datetime]
+    periods: list[tuple[int, int]]
+    overload_start: Optional[int]
     # if None then timeout, REGARDED AS INF, and so that causes overload.
     times: RingBuffer[Optional[int]]
 
     def format(self):
         if self.periods != []:
             last_period = self.periods[-1]
-            return f'{last_period[0]} - {last_period[1]}'
+            return f'{format_date(last_period[0])} - {format_date(last_period[1])}'
         elif self.overload_start is not None:
-            return f'{self.overload_start} -'
+            return f'{format_date(self.overload_start)} -'
         else:
             return 'n/a'
 
-    def end(self, overload_end: datetime):
+    def end(self, overload_end: int):
         if self.overload_start is not None:
             self.periods.append((self.overload_start, overload_end))
             self.overload_start = None
 
-    def start(self, overload_start: datetime):
+    def start(self, overload_start: int):
         self.overload_start = overload_start
     
 
 
 @dataclass
 class FailState:
-    periods: list[tuple[datetime, datetime]]
-    fail_start: Optional[datetime]
-    timeout_start: Optional[datetime]
+    periods: list[tuple[int, int]]
+    fail_start: Optional[int]
+    timeout_start: Optional[int]
     timeout_count: int
 
     def start(self):
         self.fail_start = self.timeout_start
         self.timeout_start = None
 
-    def end(self, fail_end: datetime):
+    def end(self, fail_end: int):
         if self.fail_start is not None:
             self.periods.append((self.fail_start, fail_end))
             self.fail_start = None
@@ -118,9 +153,9 @@ class FailState:
     def format(self):
         if self.periods != []:
             last_period = self.periods[-1]
-            return f'{last_period[0]} - {last_period[1]}'
+            return f'{format_date(last_period[0])} - {format_date(last_period[1])}'
         elif self.fail_start is not None:
-            return f'{self.fail_start} -'
+            return f'{format_date(self.fail_start)} -'
         else:
             return 'n/a'
 
@@ -137,12 +172,12 @@ class InterfaceState:
 
         periods.sort(key=lambda x: x[1])
 
-        format_list = [ f'{status}({period[0]} - {period[1]})' for status, period in periods]
+        format_list = [ f'{status}({format_date(period[0])} - {format_date(period[1])})' for status, period in periods]
         if self.fail_state.fail_start is not None:
-            format_list.append(f'FAILURE ({self.fail_state.fail_start} -)')
+            format_list.append(f'FAILURE ({format_date(self.fail_state.fail_start)} -)')
 
         if self.overload_state.overload_start is not None:
-            format_list.append(f'OVERLOAD({self.overload_state.overload_start} -)')
+            format_list.append(f'OVERLOAD({format_date(self.overload_state.overload_start)} -)')
 
         return format_list
 
@@ -152,12 +187,20 @@ def update_state(log: MonitorLog,
                  fail_threshould: int,
                  overload_count: int,
                  overload_threshould: float):
+    state.overload_state.times.append(log.time)
+    update_status(log, state, state.overload_state.times.average(), fail_threshould, overload_threshould)
+
+
+# ave_time is the average of the last overload_count response times, which
+# update_state takes from the RingBuffer of state
+def update_status(log: MonitorLog,
+                  state: InterfaceState,
+                  ave_time: Optional[float],
+                  fail_threshould: int,
+                  overload_threshould: float):
     update_timeout_count(log, state)
     update_timeout_start(log, state)
 
-    state.overload_state.times.append(log.time)
-    ave_time = average_time(state.overload_state.times.buf)
-
     if state.fail_state.timeout_count >= fail_threshould:
         # failure
         match state.status:
@@ -234,24 +277,36 @@ def is_timeout(log: MonitorLog) -> bool:
 def interface_states(logs: list[MonitorLog],
                    fail_threshould: int,
                    overload_count: int,
-                   overload_threshould: float) -> dict[IPv4Interface, InterfaceState]:
-    states = dict()
-    for log in sorted(logs, key=lambda log: log.date):
-        if log.addr not in states:
-            states[log.addr] = InterfaceState(Status.IDLE,
-                                              FailState([], None, None, 0),
-                                              OverloadState([], None, RingBuffer(overload_count)))
+                   overload_threshould: float,
+                   table: Optional[AddressTable] = None) -> dict[IPv4Interface, InterfaceState]:
+    return interface_states_stream(sorted(logs, key=lambda log: log.date),
+                                   fail_threshould, overload_count, overload_threshould, table)
 
-        update_state(log, states[log.addr], fail_threshould, overload_count, overload_threshould)
 
-    return states
+# logs must be given in order of date
+def interface_states_stream(logs: Iterable[MonitorLog],
+                            fail_threshould: int,
+                            overload_count: int,
+                            overload_threshould: float,
+                            table: Optional[AddressTable] = None) -> dict[IPv4Interface, InterfaceState]:
+    table = AddressTable() if table is None else table
+    states: list[Optional[InterfaceState]] = [None] * len(table)
+    order = []
+    for log in logs:
+        iface = table.lookup(log.addr, log.iface)
+        if iface >= len(states):
+            states.extend([None] * (len(table) - len(states)))
 
+        if states[iface] is None:
+            states[iface] = InterfaceState(Status.IDLE,
+                                           FailState([], None, None, 0),
+                                           OverloadState([], None, RingBuffer(overload_count)))
+            order.append(iface)
+
+        update_state(log, states[iface], fail_threshould, overload_count, overload_threshould)
+
+    return {table.interfaces[iface]: states[iface] for iface in order}
 
-def parse_logs_from_file(path: str) -> list[MonitorLog]:
-    with open(path, 'r') as f:
-        logs = [parse_log(line) for line in f.readlines()]
-        return logs
-        
 
 def format_states(states: dict[IPv4Interface, InterfaceState]) -> list[str]:
     format_list = []
@@ -262,18 +317,31 @@ def format_states(states: dict[IPv4Interface, InterfaceState]) -> list[str]:
     return format_list
 
 
-def solve_as_text(src: str, threshould: int, overload_count: int, overload_threshould: float):
-    logs = parse_logs_from_file(src)
-    states = interface_states(logs, threshould, overload_count, overload_threshould)
-    return '\n'.join(format_states(states))
+def solve(src: Union[str, Iterable[str]], threshould: int, overload_count: int, overload_threshould: float,
+          window: Optional[int] = None, memory: Optional[int] = None) -> dict[IPv4Interface, InterfaceState]:
+    # src is a path, or the paths of the logs of several monitoring servers
+    paths = extsort.paths_of(src)
+    table = AddressTable()
+    records = extsort.records_in_order(paths, table, window, memory)
+    with instrument.phase('update'):
+        return interface_states_stream(parse_records(records, table, MonitorLog), threshould, overload_count, overload_threshould, table)
+
+
+def solve_as_text(src: Union[str, Iterable[str]], threshould: int, overload_count: int, overload_threshould: float,
+                  window: Optional[int] = None, memory: Optional[int] = None):
+    states = solve(src, threshould, overload_count, overload_threshould, window, memory)
+    with instrument.phase('format'):
+        return '\n'.join(format_states(states))
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
-    parser.add_argument('src', help='input log file')
+    parser.add_argument('src', nargs='+', help='input log files, merged by date')
     parser.add_argument('N', type=int, help='threshould for timeout')
     parser.add_argument('M', type=int, help='number of time to response')
     parser.add_argument('t', type=float, help='threshould for overload')
+    cli.add_arguments(parser)
     args = parser.parse_args()
+    cli.check_arguments(parser, args)
 
-    print(solve_as_text(args.src, int(args.N), int(args.M), float(args.t)))
+    cli.run(sys.modules[__name__], 'ans3', args, [int(args.N), int(args.M), float(args.t)])
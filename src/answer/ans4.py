@@ -1,17 +1,25 @@
-from datetime import datetime
 from dataclasses import dataclass
 from ipaddress import IPv4Interface, IPv4Network
-from typing import Optional
+from typing import Optional, Union
 from enum import Enum, auto
 from typing import TypeVar, Generic
+from typing import Iterable
+from answer.stream import parse_records, read_interfaces
+from answer.epoch import parse_date, format_date
+from answer.address import AddressTable
+from answer import cli, extsort, instrument
 import argparse
+import sys
 
 
 @dataclass
 class MonitorLog:
-    date: datetime
+    # seconds since 1970-01-01 00:00:00
+    date: int
     addr: IPv4Interface
     time: Optional[int]
+    # id in the AddressTable which the log is parsed with, or -1
+    iface: int = -1
 
 
 def parse_time(time_str: str) -> Optional[int]:
@@ -21,13 +29,16 @@ def parse_time(time_str: str) -> Optional[int]:
         return None
     
 
-def parse_log(line: str) -> MonitorLog:
+def parse_log(line: str, table: Optional[AddressTable] = None) -> MonitorLog:
     [date_str, addr_str, time_str] = line.split(',')
-    date = datetime.strptime(date_str, '%Y%m%d%H%M%S')
-    addr = IPv4Interface(addr_str)
+    date = parse_date(date_str)
     time = parse_time(time_str)
 
-    return MonitorLog(date, addr, time)
+    if table is None:
+        return MonitorLog(date, IPv4Interface(addr_str), time)
+
+    iface = table.intern(addr_str)
+    return MonitorLog(date, table.interfaces[iface], time, iface)
 
 
 class Status(Enum):
@@ -44,21 +55,45 @@ class RingBuffer(Generic[T]):
         self.size = size
         self.idx = 0
         self.buf = []
+        # running sum and number of timeouts (None) in buf
+        self.total = 0
+        self.timeouts = 0
 
     def __eq__(self, other):
         return self.__dict__ == other.__dict__
 
     def __repr__(self):
-        return f'<RingBuffer size={self.size}, {self.buf}, idx={self.idx}, ave={average_time(self.buf)}>'
+        return f'<RingBuffer size={self.size}, {self.buf}, idx={self.idx}, ave={self.average()}>'
 
     def append(self, x: T):
         if len(self.buf) < self.size:
             self.buf.append(x)
         else:
+            self.evict(self.buf[self.idx])
             self.buf[self.idx] = x
 
+        if x is None:
+            self.timeouts += 1
+        else:
+            self.total += x
+
         self.idx = (self.idx + 1) % self.size
 
+    def evict(self, x: T):
+        if x is None:
+            self.timeouts -= 1
+        else:
+            self.total -= x
+
+    # same as average_time(self.buf), but in constant time
+    def average(self) -> Optional[float]:
+        if len(self.buf) == 0:
+            return 0
+
+        if self.timeouts > 0:
+            return None
+        return self.total / len(self.buf)
+
 
 def average_time(time_list: list[Optional[int]]) -> Optional[float]:
     if time_list == []:
@@ -75,42 +110,42 @@ def average_time(time_list: list[Optional[int]]) -> Optional[float]:
 
 @dataclass
 class OverloadState:
-    periods: list[tuple[datetime, datetime]]
-    overload_start: Optional[datetime]
+    periods: list[tuple[int, int]]
+    overload_start: Optional[int]
     # if None then timeout, REGARDED AS INF, and so that causes overload.
     times: RingBuffer[Optional[int]]
 
     def format(self):
         if self.periods != []:
             last_period = self.periods[-1]
-            return f'{last_period[0]} - {last_period[1]}'
+            return f'{format_date(last_period[0])} - {format_date(last_period[1])}'
         elif self.overload_start is not None:
-            return f'{self.overload_start} -'
+            return f'{format_date(self.overload_start)} -'
         else:
             return 'n/a'
 
-    def end(self, overload_end: datetime):
+    def end(self, overload_end: int):
         if self.overload_start is not None:
             self.periods.append((self.overload_start, overload_end))
             self.overload_start = None
 
-    def start(self, overload_start: datetime):
+    def start(self, overload_start: int):
         self.overload_start = overload_start
     
 
 
 @dataclass
 class FailState:
-    periods: list[tuple[datetime, datetime]]
-    fail_start: Optional[datetime]
-    timeout_start: Optional[datetime]
+    periods: list[tuple[int, int]]
+    fail_start: Optional[int]
+    timeout_start: Optional[int]
     timeout_count: int
 
     def start(self):
         self.fail_start = self.timeout_start
         self.timeout_start = None
 
-    def end(self, fail_end: datetime):
+    def end(self, fail_end: int):
         if self.fail_start is not None:
             self.periods.append((self.fail_start, fail_end))
             self.fail_start = None
@@ -118,9 +153,9 @@ class FailState:
     def format(self):
         if self.periods != []:
             last_period = self.periods[-1]
-            return f'{last_period[0]} - {last_period[1]}'
+            return f'{format_date(last_period[0])} - {format_date(last_period[1])}'
         elif self.fail_start is not None:
-            return f'{self.fail_start} -'
+            return f'{format_date(self.fail_start)} -'
         else:
             return 'n/a'
 
@@ -137,12 +172,12 @@ class InterfaceState:
 
         periods.sort(key=lambda x: x[1])
 
-        format_list = [ f'{status}({period[0]} - {period[1]})' for status, period in periods]
+        format_list = [ f'{status}({format_date(period[0])} - {format_date(period[1])})' for status, period in periods]
         if self.fail_state.fail_start is not None:
-            format_list.append(f'FAILURE ({self.fail_state.fail_start} -)')
+            format_list.append(f'FAILURE ({format_date(self.fail_state.fail_start)} -)')
 
         if self.overload_state.overload_start is not None:
-            format_list.append(f'OVERLOAD({self.overload_state.overload_start} -)')
+            format_list.append(f'OVERLOAD({format_date(self.overload_state.overload_start)} -)')
 
         return format_list
 
@@ -152,12 +187,20 @@ def update_state(log: MonitorLog,
                  fail_threshould: int,
                  overload_count: int,
                  overload_threshould: float):
+    state.overload_state.times.append(log.time)
+    update_status(log, state, state.overload_state.times.average(), fail_threshould, overload_threshould)
+
+
+# ave_time is the average of the last overload_count response times, which
+# update_state takes from the RingBuffer of state
+def update_status(log: MonitorLog,
+                  state: InterfaceState,
+                  ave_time: Optional[float],
+                  fail_threshould: int,
+                  overload_threshould: float):
     update_timeout_count(log, state)
     update_timeout_start(log, state)
 
-    state.overload_state.times.append(log.time)
-    ave_time = average_time(state.overload_state.times.buf)
-
     if state.fail_state.timeout_count >= fail_threshould:
         # failure
         match state.status:
@@ -233,65 +276,141 @@ def is_timeout(log: MonitorLog) -> bool:
 
 @dataclass
 class NetworkState:
-    periods: list[tuple[datetime, datetime]]
-    fail_start: Optional[datetime]
+    periods: list[tuple[int, int]]
+    fail_start: Optional[int]
     states: dict[IPv4Interface, InterfaceState]
+    # number of interfaces in states whose status is FAILURE
+    failing: int = 0
+
+    def add(self, addr: IPv4Interface, state: InterfaceState):
+        if addr in self.states:
+            return
+
+        self.states[addr] = state
+        if state.status == Status.FAILURE:
+            self.failing += 1
+
+    # must be called whenever the status of an interface in states changes
+    def change_status(self, before: Status, after: Status):
+        if before != Status.FAILURE and after == Status.FAILURE:
+            self.failing += 1
+        elif before == Status.FAILURE and after != Status.FAILURE:
+            self.failing -= 1
 
-    def start(self, fail_start: datetime):
+    def start(self, fail_start: int):
         self.fail_start = fail_start
 
-    def end(self, fail_end: datetime):
+    def end(self, fail_end: int):
         if self.fail_start is not None:
             self.periods.append((self.fail_start, fail_end))
             self.fail_start = None
 
 
     def format(self) -> list[str]:
-        format_list = [ f'FAILURE ({period[0]} - {period[1]})' for period in self.periods]
+        format_list = [ f'FAILURE ({format_date(period[0])} - {format_date(period[1])})' for period in self.periods]
         if self.fail_start is not None:
-            format_list.append(f'FAILURE ({self.fail_start} -)')
+            format_list.append(f'FAILURE ({format_date(self.fail_start)} -)')
 
         return format_list
 
 
-def update_state_net(date: datetime, states_net: NetworkState):
-    if all([state.status == Status.FAILURE for _, state in states_net.states.items()]):
+def update_state_net(date: int, states_net: NetworkState):
+    if states_net.failing == len(states_net.states):
         states_net.start(date)
     else:
         states_net.end(date)
 
 
 
+# states and states_net are indexed by interface id and subnet id of table.
+# returns whether iface is newly registered.
+def register_interface(iface: int,
+                       table: AddressTable,
+                       states: list[Optional[InterfaceState]],
+                       states_net: list[Optional[NetworkState]],
+                       overload_count: int) -> bool:
+    if iface >= len(states):
+        states.extend([None] * (len(table) - len(states)))
+    if len(states_net) < len(table.networks):
+        states_net.extend([None] * (len(table.networks) - len(states_net)))
+
+    if states[iface] is not None:
+        return False
+
+    states[iface] = InterfaceState(Status.IDLE,
+                                   FailState([], None, None, 0),
+                                   OverloadState([], None, RingBuffer(overload_count)))
+
+    subnet = table.subnet_ids[iface]
+    if states_net[subnet] is None:
+        states_net[subnet] = NetworkState([], None, dict())
+    states_net[subnet].add(table.interfaces[iface], states[iface])
+    return True
+
+
 def interface_states(logs: list[MonitorLog],
                    fail_threshould: int,
                    overload_count: int,
-                   overload_threshould: float) -> tuple[dict[IPv4Interface, InterfaceState], dict[IPv4Network,NetworkState]]:
-    states = dict()
-    states_net = dict()
+                   overload_threshould: float,
+                   table: Optional[AddressTable] = None) -> tuple[dict[IPv4Interface, InterfaceState], dict[IPv4Network,NetworkState]]:
+    table = AddressTable() if table is None else table
+    ifaces = [table.lookup(log.addr, log.iface) for log in logs]
+    return interface_states_stream(sorted(logs, key=lambda log: log.date),
+                                   fail_threshould, overload_count, overload_threshould,
+                                   table, ifaces)
+
+
+# logs must be given in order of date.
+# ifaces are the ids of interfaces known in advance. Interfaces first seen in
+# logs are added to their network when they appear.
+# previous is the result of an earlier analysis, which the logs continue.
+def interface_states_stream(logs: Iterable[MonitorLog],
+                            fail_threshould: int,
+                            overload_count: int,
+                            overload_threshould: float,
+                            table: Optional[AddressTable] = None,
+                            ifaces: Iterable[int] = (),
+                            previous: Optional[tuple[dict[IPv4Interface, InterfaceState], dict[IPv4Network, NetworkState]]] = None) -> tuple[dict[IPv4Interface, InterfaceState], dict[IPv4Network,NetworkState]]:
+    table = AddressTable() if table is None else table
+    states: list[Optional[InterfaceState]] = []
+    states_net: list[Optional[NetworkState]] = []
+    order = []
+
+    if previous is not None:
+        prev_states, prev_states_net = previous
+        for addr, state in prev_states.items():
+            iface = table.add(addr)
+            states.extend([None] * (len(table) - len(states)))
+            states[iface] = state
+            order.append(iface)
+
+        states_net.extend([None] * len(table.networks))
+        for network, state_net in prev_states_net.items():
+            states_net[table.add_network(network)] = state_net
 
     # see all network interface
-    for log in logs:
-        if log.addr not in states:
-            states[log.addr] = InterfaceState(Status.IDLE,
-                                              FailState([], None, None, 0),
-                                              OverloadState([], None, RingBuffer(overload_count)))
+    for iface in ifaces:
+        if register_interface(iface, table, states, states_net, overload_count):
+            order.append(iface)
 
-        if log.addr.network not in states_net:
-            states_net[log.addr.network] = NetworkState([], None, dict())
-        states_net[log.addr.network].states[log.addr] = states[log.addr]
+    for log in logs:
+        iface = table.lookup(log.addr, log.iface)
+        if iface >= len(states) or states[iface] is None:
+            register_interface(iface, table, states, states_net, overload_count)
+            order.append(iface)
 
-    for log in sorted(logs, key=lambda log: log.date):
-        update_state(log, states[log.addr], fail_threshould, overload_count, overload_threshould)
-        update_state_net(log.date, states_net[log.addr.network])
+        state = states[iface]
+        state_net = states_net[table.subnet_ids[iface]]
 
-    return states, states_net
+        status = state.status
+        update_state(log, state, fail_threshould, overload_count, overload_threshould)
+        state_net.change_status(status, state.status)
+        update_state_net(log.date, state_net)
 
+    order_net = dict.fromkeys(table.subnet_ids[iface] for iface in order)
+    return {table.interfaces[iface]: states[iface] for iface in order}, \
+        {table.networks[subnet]: states_net[subnet] for subnet in order_net}
 
-def parse_logs_from_file(path: str) -> list[MonitorLog]:
-    with open(path, 'r') as f:
-        logs = [parse_log(line) for line in f.readlines()]
-        return logs
-        
 
 def format_states(states: dict[IPv4Interface, InterfaceState]) -> list[str]:
     format_list = []
@@ -311,12 +430,47 @@ def format_states_net(states_net: dict[IPv4Network, NetworkState]) -> list[str]:
     return format_list
 
 
-def solve_as_text(src: str, threshould: int, overload_count: int, overload_threshould: float):
-    logs = parse_logs_from_file(src)
-    states, states_net = interface_states(logs, threshould, overload_count, overload_threshould)
+# logs of src in order of date, and the ids of all of its interfaces in order
+# of the file. src is a path, or the paths of the logs of several monitoring
+# servers, and table is a new AddressTable.
+def prepare_logs(src: Union[str, Iterable[str]],
+                 table: AddressTable,
+                 window: Optional[int] = None,
+                 memory: Optional[int] = None) -> tuple[Iterable[MonitorLog], list[int]]:
+    paths = extsort.paths_of(src)
+    if not extsort.sorts_in_memory(paths, window, memory):
+        # the first pass only collects interfaces, so that every network knows
+        # all of its members before the analysis starts.
+        with instrument.phase('parse'):
+            for path in paths:
+                read_interfaces(path, table)
+    records = extsort.records_in_order(paths, table, window, memory)
+
+    # every interface is known before the analysis, and ids are interned in
+    # order of the file
+    return parse_records(records, table, MonitorLog), list(range(len(table)))
 
-    states_str = '\n'.join(format_states(states))
-    states_net_str = '\n'.join(format_states_net(states_net))
+
+def solve(src: Union[str, Iterable[str]], threshould: int, overload_count: int, overload_threshould: float,
+          window: Optional[int] = None,
+          memory: Optional[int] = None) -> tuple[dict[IPv4Interface, InterfaceState], dict[IPv4Network, NetworkState]]:
+    table = AddressTable()
+    logs, ifaces = prepare_logs(src, table, window, memory)
+
+    with instrument.phase('update'):
+        return interface_states_stream(logs, threshould, overload_count, overload_threshould, table, ifaces)
+
+
+def solve_as_text(src: Union[str, Iterable[str]], threshould: int, overload_count: int, overload_threshould: float,
+                  window: Optional[int] = None, memory: Optional[int] = None):
+    states, states_net = solve(src, threshould, overload_count, overload_threshould, window, memory)
+    with instrument.phase('format'):
+        return format_output(format_states(states), format_states_net(states_net))
+
+
+def format_output(states_format: list[str], states_net_format: list[str]) -> str:
+    states_str = '\n'.join(states_format)
+    states_net_str = '\n'.join(states_net_format)
 
     output = '\n'.join([
         '[Interface]',
@@ -331,10 +485,23 @@ def solve_as_text(src: str, threshould: int, overload_count: int, overload_thres
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
-    parser.add_argument('src', help='input log file')
+    parser.add_argument('src', nargs='+', help='input log files, merged by date')
     parser.add_argument('N', type=int, help='threshould for timeout')
     parser.add_argument('M', type=int, help='number of time to response')
     parser.add_argument('t', type=float, help='threshould for overload')
+    cli.add_arguments(parser, resumable=True)
     args = parser.parse_args()
-
-    print(solve_as_text(args.src, int(args.N), int(args.M), float(args.t)))
+    cli.check_arguments(parser, args)
+
+    if args.follow:
+        from answer import follow
+        try:
+            for line in follow.follow(args.src[0], int(args.N), int(args.M), float(args.t), args.window):
+                print(line, flush=True)
+        except KeyboardInterrupt:
+            pass
+    elif args.checkpoint is not None:
+        from answer import checkpoint
+        print(checkpoint.solve_as_text(args.src[0], int(args.N), int(args.M), float(args.t), args.checkpoint))
+    else:
+        cli.run(sys.modules[__name__], 'ans4', args, [int(args.N), int(args.M), float(args.t)])
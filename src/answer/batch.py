@@ -0,0 +1,333 @@
+from dataclasses import dataclass
+from ipaddress import IPv4Interface
+from typing import Optional
+from answer.address import AddressTable
+from answer import ans2, ans3, columnar, compressed
+import numpy as np
+import argparse
+
+
+# value of the time column for timeout
+TIMEOUT = columnar.TIMEOUT
+
+DAYS_IN_MONTH = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+
+@dataclass
+class LogColumns:
+    # seconds since 1970-01-01 00:00:00
+    date: np.ndarray
+    # interface id of the AddressTable the logs are loaded with
+    iface: np.ndarray
+    # response time, or TIMEOUT
+    time: np.ndarray
+
+    def __len__(self):
+        return len(self.date)
+
+
+def days_from_civil(year: np.ndarray, month: np.ndarray, day: np.ndarray) -> np.ndarray:
+    year = year - (month <= 2)
+    era = year // 400
+    yoe = year - era * 400
+    doy = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
+# vectorized version of answer.epoch.parse_date for the 14 digits at begin
+def parse_dates(buf: np.ndarray, begin: np.ndarray) -> np.ndarray:
+    # columns are gathered one by one, which needs much less memory than
+    # gathering a (lines, 14) matrix at once.
+    def field(offset: int, width: int) -> np.ndarray:
+        value = np.zeros(len(begin), dtype=np.int64)
+        for i in range(offset, offset + width):
+            digit = buf[begin + i]
+            if ((digit < ord('0')) | (digit > ord('9'))).any():
+                raise ValueError('invalid date')
+            value = value * 10 + (digit - ord('0'))
+        return value
+
+    year, month, day = field(0, 4), field(4, 2), field(6, 2)
+    hour, minute, second = field(8, 2), field(10, 2), field(12, 2)
+
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_valid = (1 <= month) & (month <= 12)
+    days_in_month = DAYS_IN_MONTH[np.where(month_valid, month, 0)] + (leap & (month == 2))
+    if not (month_valid & (year >= 1) & (1 <= day) & (day <= days_in_month)
+            & (hour <= 23) & (minute <= 59) & (second <= 59)).all():
+        raise ValueError('invalid date')
+
+    return days_from_civil(year, month, day) * 86400 + hour * 3600 + minute * 60 + second
+
+
+# bytes buf[begin:end] of each row, padded with NUL to the same width
+def slice_rows(buf: np.ndarray, begin: np.ndarray, end: np.ndarray) -> np.ndarray:
+    width = max(int((end - begin).max()), 1)
+    rows = np.zeros((len(begin), width), dtype=np.uint8)
+    for i in range(width):
+        idx = begin + i
+        inside = idx < end
+        rows[inside, i] = buf[idx[inside]]
+    return rows.view(f'S{width}').ravel()
+
+
+def parse_times(time_strs: np.ndarray) -> np.ndarray:
+    # response times take a few distinct values, so each of them is parsed
+    # in the same way as parse_time.
+    values, inverse = np.unique(time_strs, return_inverse=True)
+    parsed = [ans2.parse_time(value.decode()) for value in values.tolist()]
+    times = np.array([TIMEOUT if t is None else t for t in parsed], dtype=np.int32)
+    return times[inverse]
+
+
+def intern_addrs(addr_strs: np.ndarray, table: AddressTable) -> np.ndarray:
+    values, inverse = np.unique(addr_strs, return_inverse=True)
+    ifaces = np.array([table.intern(value.decode()) for value in values.tolist()], dtype=np.uint32)
+    return ifaces[inverse]
+
+
+# the columns refer to the mapped file without copying it
+def load_columnar(path: str, table: AddressTable) -> LogColumns:
+    buf = np.memmap(path, dtype=np.uint8, mode='r')
+    layout = columnar.read_layout(buf)
+    n = layout.n
+    date = buf[layout.date_offset:layout.date_offset + 8 * n].view('<i8')
+    iface = buf[layout.iface_offset:layout.iface_offset + 4 * n].view('<u4')
+    time = buf[layout.time_offset:layout.time_offset + 4 * n].view('<i4')
+
+    ids = [table.intern(addr) for addr in layout.addrs]
+    if ids != list(range(len(ids))):
+        iface = np.array(ids, dtype=np.uint32)[iface]
+    return LogColumns(date, iface, time)
+
+
+def load_columns(path: str, table: AddressTable) -> LogColumns:
+    if columnar.is_columnar(path):
+        return load_columnar(path, table)
+
+    if compressed.is_compressed(path):
+        buf = np.frombuffer(compressed.read_bytes(path), dtype=np.uint8)
+    else:
+        with open(path, 'rb') as f:
+            buf = np.frombuffer(f.read(), dtype=np.uint8)
+
+    # boundaries of lines and fields are found on the bytes
+    newlines = np.flatnonzero(buf == ord('\n'))
+    begin = np.r_[0, newlines + 1]
+    end = np.r_[newlines, len(buf)]
+    if begin[-1] == len(buf):
+        begin, end = begin[:-1], end[:-1]
+
+    if len(begin) == 0:
+        return LogColumns(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.int32))
+
+    end = end - (buf[np.maximum(end - 1, 0)] == ord('\r'))
+
+    commas = np.flatnonzero(buf == ord(','))
+    if len(commas) != 2 * len(begin):
+        raise ValueError('invalid log')
+    commas = commas.reshape(-1, 2)
+    if ((commas[:, 0] != begin + 14) | (commas[:, 1] >= end)).any():
+        raise ValueError('invalid log')
+
+    date = parse_dates(buf, begin)
+    iface = intern_addrs(slice_rows(buf, commas[:, 0] + 1, commas[:, 1]), table)
+    time = parse_times(slice_rows(buf, commas[:, 1] + 1, end))
+    return LogColumns(date, iface, time)
+
+
+# returns the order of records sorted by (interface, date), and the interfaces
+# in order of their first appearance in logs sorted by date.
+def sort_by_interface(cols: LogColumns) -> tuple[np.ndarray, np.ndarray]:
+    order = np.lexsort((cols.date, cols.iface))
+    iface = cols.iface[order]
+
+    rank = np.empty(len(cols), dtype=np.int64)
+    rank[np.argsort(cols.date, kind='stable')] = np.arange(len(cols))
+
+    group_starts = np.flatnonzero(np.r_[True, iface[1:] != iface[:-1]])
+    first_rank = np.minimum.reduceat(rank[order], group_starts)
+    ifaces = iface[group_starts][np.argsort(first_rank)]
+    return order, ifaces
+
+
+# returns the first index of each run of equal (key, flag) and the index just
+# after the run.
+def runs(key: np.ndarray, flag: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    change = np.r_[True, (key[1:] != key[:-1]) | (flag[1:] != flag[:-1])]
+    starts = np.flatnonzero(change)
+    ends = np.r_[starts[1:], len(key)]
+    return starts, ends
+
+
+# periods of each interface where threshould or more timeouts continue, as
+# answer.ans2 reports. returns the interfaces in order of appearance, and the
+# interface, start, end of each period and whether the period is ended.
+def failure_periods(cols: LogColumns, threshould: int) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    if threshould < 1:
+        raise ValueError('threshould must be positive')
+
+    order, ifaces = sort_by_interface(cols)
+    date = cols.date[order]
+    iface = cols.iface[order]
+    timeout = cols.time[order] == TIMEOUT
+
+    starts, ends = runs(iface, timeout)
+    failure = timeout[starts] & (ends - starts >= threshould)
+    starts, ends = starts[failure], ends[failure]
+
+    # failure ends at the next log of the same interface
+    next_idx = np.minimum(ends, len(date) - 1)
+    recovered = (ends < len(date)) & (iface[next_idx] == iface[starts])
+
+    return ifaces, iface[starts], date[starts], date[next_idx], recovered
+
+
+def failure_states(cols: LogColumns,
+                   threshould: int,
+                   table: AddressTable) -> dict[IPv4Interface, ans2.InterfaceState]:
+    if len(cols) == 0:
+        return dict()
+
+    ifaces, period_iface, period_start, period_end, recovered = failure_periods(cols, threshould)
+
+    states = dict()
+    for iface in ifaces.tolist():
+        states[iface] = ans2.InterfaceState(ans2.Status.RUNNING, ans2.FailState([], None, None, 0))
+
+    for iface, start, end, ended in zip(period_iface.tolist(), period_start.tolist(),
+                                        period_end.tolist(), recovered.tolist()):
+        state = states[iface]
+        if ended:
+            state.fail_state.periods.append((start, end))
+        else:
+            state.status = ans2.Status.FAILURE
+            state.fail_state.fail_start = start
+
+    return {table.interfaces[iface]: state for iface, state in states.items()}
+
+
+# status of each log as answer.ans3.update_state decides
+RUNNING, OVERLOAD, FAILURE = 0, 1, 2
+
+
+# segments of continuous status of each interface, as answer.ans3 reports.
+# returns the interfaces in order of appearance, and the interface, status,
+# start, end of each segment and whether the segment is ended.
+def overload_periods(cols: LogColumns,
+                     fail_threshould: int,
+                     overload_count: int,
+                     overload_threshould: float) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    if fail_threshould < 1 or overload_count < 1:
+        raise ValueError('threshould and count must be positive')
+
+    order, ifaces = sort_by_interface(cols)
+    date = cols.date[order]
+    iface = cols.iface[order]
+    time = cols.time[order]
+    timeout = time == TIMEOUT
+
+    pos = np.arange(len(date))
+    new_group = np.r_[True, iface[1:] != iface[:-1]]
+    group_first = np.maximum.accumulate(np.where(new_group, pos, 0))
+
+    # the last log before the current run of timeouts
+    last_break = np.maximum.accumulate(np.maximum(np.where(timeout, -1, pos),
+                                                  np.where(new_group, pos - 1, -1)))
+    failure = pos - last_break >= fail_threshould
+
+    # rolling sum and number of timeouts of the last overload_count logs
+    lo = np.maximum(group_first, pos - overload_count + 1)
+    time_sum = np.r_[0, np.cumsum(np.where(timeout, 0, time).astype(np.int64))]
+    timeouts = np.r_[0, np.cumsum(timeout)]
+    window_sum = time_sum[pos + 1] - time_sum[lo]
+    window_timeouts = timeouts[pos + 1] - timeouts[lo]
+    overload = (window_timeouts > 0) | (window_sum / (pos - lo + 1) >= overload_threshould)
+
+    status = np.where(failure, FAILURE, np.where(overload, OVERLOAD, RUNNING))
+
+    starts, _ = runs(iface, status)
+    seg_iface = iface[starts]
+    seg_status = status[starts]
+    # failure starts at the first timeout of the run
+    seg_start = np.where(seg_status == FAILURE, date[np.minimum(last_break[starts] + 1, len(date) - 1)], date[starts])
+
+    # each segment ends where the next segment of the same interface starts
+    ended = np.r_[seg_iface[1:] == seg_iface[:-1], False]
+    seg_end = np.r_[seg_start[1:], 0]
+    next_status = np.r_[seg_status[1:], RUNNING]
+
+    # overload is cut off by failure, and is dropped if it starts after the
+    # timeouts causing failure.
+    dropped = (seg_status == OVERLOAD) & ended & (next_status == FAILURE) & (seg_start >= seg_end)
+    keep = (seg_status != RUNNING) & ~dropped
+
+    return ifaces, seg_iface[keep], seg_status[keep], seg_start[keep], seg_end[keep], ended[keep]
+
+
+def interface_states(cols: LogColumns,
+                     fail_threshould: int,
+                     overload_count: int,
+                     overload_threshould: float,
+                     table: AddressTable) -> dict[IPv4Interface, ans3.InterfaceState]:
+    if len(cols) == 0:
+        return dict()
+
+    ifaces, seg_iface, seg_status, seg_start, seg_end, ended = \
+        overload_periods(cols, fail_threshould, overload_count, overload_threshould)
+
+    states = dict()
+    for iface in ifaces.tolist():
+        states[iface] = ans3.InterfaceState(ans3.Status.RUNNING,
+                                            ans3.FailState([], None, None, 0),
+                                            ans3.OverloadState([], None, ans3.RingBuffer(overload_count)))
+
+    for iface, status, start, end, is_ended in zip(seg_iface.tolist(), seg_status.tolist(),
+                                                   seg_start.tolist(), seg_end.tolist(), ended.tolist()):
+        state = states[iface]
+        if status == FAILURE:
+            if is_ended:
+                state.fail_state.periods.append((start, end))
+            else:
+                state.status = ans3.Status.FAILURE
+                state.fail_state.fail_start = start
+        else:
+            if is_ended:
+                state.overload_state.periods.append((start, end))
+            else:
+                state.status = ans3.Status.OVERLOAD
+                state.overload_state.overload_start = start
+
+    return {table.interfaces[iface]: state for iface, state in states.items()}
+
+
+# answer.ans2 report, or answer.ans3 report if overload_count and
+# overload_threshould are given
+def solve_as_text(src: str,
+                  threshould: int,
+                  overload_count: Optional[int] = None,
+                  overload_threshould: Optional[float] = None,
+                  table: Optional[AddressTable] = None):
+    table = AddressTable() if table is None else table
+    cols = load_columns(src, table)
+    if overload_count is None or overload_threshould is None:
+        states = failure_states(cols, threshould, table)
+        return '\n'.join(ans2.format_states(states))
+
+    states = interface_states(cols, threshould, overload_count, overload_threshould, table)
+    return '\n'.join(ans3.format_states(states))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('src', help='input log file')
+    parser.add_argument('N', type=int, nargs='?', default=1, help='threshould for timeout')
+    parser.add_argument('M', type=int, nargs='?', help='number of time to response')
+    parser.add_argument('t', type=float, nargs='?', help='threshould for overload')
+    args = parser.parse_args()
+
+    if (args.M is None) != (args.t is None):
+        parser.error('M and t must be given together')
+
+    print(solve_as_text(args.src, args.N, args.M, args.t))
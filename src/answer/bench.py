@@ -0,0 +1,133 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from typing import Optional
+from answer.generate import Workload, write
+from answer import ans1, ans2, ans3, ans4, instrument
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+
+
+# Measures each answer module on generated logs of several sizes. Each module
+# runs solve_as_text while profiling, so that the time of each phase (parse,
+# sort, update of the states and format) is that of --profile. Each
+# measurement is made in a fresh process, so that the peak RSS is that of the
+# module alone.
+
+MODULES = {
+    'ans1': ans1,
+    'ans2': ans2,
+    'ans3': ans3,
+    'ans4': ans4,
+}
+
+
+# parameters of solve_as_text of each module, out of (N, m, t)
+PARAMS = {
+    'ans1': 0,
+    'ans2': 1,
+    'ans3': 3,
+    'ans4': 3,
+}
+
+PHASES = ['parse', 'sort', 'update', 'format']
+
+
+# the seconds of each phase as --profile records them while solve_as_text
+# runs, and the total
+def run_phases(name: str, src: str, params: tuple) -> tuple[dict[str, float], str]:
+    module = MODULES[name]
+    start = time.perf_counter()
+    with instrument.profiling(module) as profile:
+        text = module.solve_as_text(src, *params[:PARAMS[name]])
+    total = time.perf_counter() - start
+
+    # a log sorted in advance, for one, has no sort phase
+    seconds = {phase: profile.seconds.get(phase, 0.0) for phase in PHASES}
+    seconds['total'] = total
+    return seconds, text
+
+
+def max_rss_kb() -> int:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def measure(name: str, src: str, params: tuple, lines: int) -> dict:
+    base_rss = max_rss_kb()
+    seconds, _ = run_phases(name, src, params)
+    return {
+        'module': name,
+        'lines': lines,
+        'seconds': seconds,
+        'lines_per_second': lines / seconds['total'] if seconds['total'] > 0 else None,
+        'base_rss_kb': base_rss,
+        'peak_rss_kb': max_rss_kb(),
+    }
+
+
+def workload_of(lines: int, base: Workload) -> Workload:
+    rounds = -(-lines // base.interfaces)
+    return Workload(**{**asdict(base), 'duration': rounds * base.interval})
+
+
+def run(sizes: list[int], names: list[str], params: tuple, base: Workload, tmpdir: Optional[str] = None) -> dict:
+    results = []
+    # each measurement gets a process of its own
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory(dir=tmpdir) as tmp:
+        for size in sizes:
+            src = os.path.join(tmp, f'log-{size}.txt')
+            with open(src, 'w') as f:
+                write(workload_of(size, base), f, size)
+
+            for name in names:
+                with ProcessPoolExecutor(1, mp_context=context) as pool:
+                    results.append(pool.submit(measure, name, src, params, size).result())
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': dict(zip(['N', 'm', 't'], params)),
+        # the duration follows from each size
+        'workload': {k: v for k, v in asdict(base).items() if k != 'duration'},
+        'results': results,
+    }
+
+
+def format_results(report: dict) -> str:
+    lines = [f'{"module":6} {"lines":>9} {"parse":>7} {"sort":>7} {"update":>7} {"format":>7} {"lines/s":>9} {"RSS MB":>7}']
+    for r in report['results']:
+        s = r['seconds']
+        lines.append(f'{r["module"]:6} {r["lines"]:9d} {s["parse"]:7.3f} {s["sort"]:7.3f} {s["update"]:7.3f} '
+                     f'{s["format"]:7.3f} {r["lines_per_second"] or 0:9.0f} {r["peak_rss_kb"] / 1024:7.1f}')
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='measure the answer modules on generated logs')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000], help='numbers of lines')
+    parser.add_argument('--modules', nargs='+', default=list(MODULES), choices=list(MODULES))
+    parser.add_argument('--N', type=int, default=3, help='threshould for timeout')
+    parser.add_argument('--M', type=int, default=5, help='number of time to response')
+    parser.add_argument('--t', type=float, default=100.0, help='threshould for overload')
+    parser.add_argument('--interfaces', type=int, default=1000)
+    parser.add_argument('--subnets', type=int, default=50)
+    parser.add_argument('--late-rate', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', help='JSON file of the results')
+    args = parser.parse_args()
+
+    base = Workload(interfaces=args.interfaces, subnets=args.subnets, late_rate=args.late_rate, seed=args.seed)
+    report = run(args.sizes, args.modules, (args.N, args.M, args.t), base)
+    print(format_results(report))
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
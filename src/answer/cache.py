@@ -0,0 +1,150 @@
+from typing import Callable, Iterable, Optional, Union
+from answer import extsort
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+
+
+# Keeps the reports of solve_as_text on disk, keyed by the module, its
+# parameters and the identity of the input, so that a report asked for again
+# is returned without reading the log. The identity of a log is its inode,
+# size and modification time, or the hash of its content, which is computed
+# once for each inode, size and modification time.
+#
+# Each report is a file of its own, written to a temporary file and renamed,
+# so that processes sharing the cache never see a partial report. A report is
+# touched when it is read, and the reports read least recently are removed
+# when the cache grows larger than its limit.
+
+# changed whenever reports of the same parameters may change
+VERSION = 1
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+IDENTITIES = ['stat', 'content']
+
+REPORT_SUFFIX = '.txt'
+IDENTITY_SUFFIX = '.id'
+LOCK = '.lock'
+
+HASH_CHUNK = 1024 * 1024
+
+
+def stat_identity(path: str) -> list:
+    stat = os.stat(path)
+    return [os.path.realpath(path), stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+
+def content_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(HASH_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_key(value) -> str:
+    return hashlib.sha256(json.dumps(value).encode()).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES, identity: str = 'stat'):
+        if identity not in IDENTITIES:
+            raise ValueError(f'unknown identity: {identity}')
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.identity = identity
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def input_identity(self, path: str) -> list:
+        stat = stat_identity(path)
+        if self.identity == 'stat':
+            return stat
+
+        # the content of a log is hashed once while it is not modified
+        memo = hash_key(stat) + IDENTITY_SUFFIX
+        digest = self.read(memo)
+        if digest is None:
+            digest = content_hash(path)
+            self.write(memo, digest)
+        return [digest]
+
+    def key(self, name: str, src: Union[str, Iterable[str]], params: Iterable) -> str:
+        inputs = [self.input_identity(path) for path in extsort.paths_of(src)]
+        return hash_key({'version': VERSION, 'module': name, 'params': list(params), 'inputs': inputs})
+
+    # None if the entry is not in the cache, or removed by another process
+    def read(self, entry: str) -> Optional[str]:
+        path = self.path(entry)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except FileNotFoundError:
+            return None
+
+        try:
+            # most recently used. an entry of another user cannot be touched,
+            # and is left to age.
+            os.utime(path)
+        except OSError:
+            pass
+        return text
+
+    def write(self, entry: str, text: str):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+            # readable by the other users of the cache, unlike the temporary file
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, self.path(entry))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self.evict()
+
+    def get(self, key: str) -> Optional[str]:
+        return self.read(key + REPORT_SUFFIX)
+
+    def put(self, key: str, text: str):
+        self.write(key + REPORT_SUFFIX, text)
+
+    # removes the entries read least recently until the cache fits in
+    # max_bytes. one process evicts at a time.
+    def evict(self):
+        with open(self.path(LOCK), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            entries = []
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith((REPORT_SUFFIX, IDENTITY_SUFFIX)):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+            total = sum(size for _, size, _ in entries)
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+    # the report of name with params for src, made by solve unless cached
+    def solve_as_text(self, name: str, src: Union[str, Iterable[str]], params: Iterable, solve: Callable[[], str]) -> str:
+        key = self.key(name, src, params)
+        text = self.get(key)
+        if text is None:
+            text = solve()
+            self.put(key, text)
+        return text
@@ -0,0 +1,159 @@
+from dataclasses import dataclass
+from ipaddress import IPv4Interface, IPv4Network
+from typing import Optional
+from answer.address import AddressTable
+from answer.ans4 import MonitorLog, Status, RingBuffer, FailState, OverloadState, InterfaceState, NetworkState
+from answer.stream import complete_end, parse_records, read_text_records
+from answer import ans4, columnar, compressed
+import json
+import os
+
+
+# Keeps the state of ans4 between runs over an append-only log. The checkpoint
+# records how many bytes of the log have been analysed, so that the next run
+# reads only the lines appended since then. When the log has been rotated, the
+# new file is read from its beginning and the analysis continues from the
+# saved state.
+#
+# A network of ans4 fails when all of its interfaces fail, so that the states
+# of a network depend on every interface of the log. When appended lines bring
+# a new interface into a network of the checkpoint, the saved state of the
+# network was made without it. The log is then analysed again from its
+# beginning without the saved state, which is lost for a rotated log.
+
+VERSION = 1
+
+# the first bytes of a log tell whether it is still the file of the checkpoint
+HEAD_BYTES = 64
+
+
+@dataclass
+class Checkpoint:
+    params: tuple[int, int, float]
+    # bytes of the log analysed so far
+    offset: int
+    head: bytes
+    states: dict[IPv4Interface, InterfaceState]
+    states_net: dict[IPv4Network, NetworkState]
+
+
+def read_head(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read(HEAD_BYTES)
+
+
+def dump_state(state: InterfaceState) -> list:
+    fail = state.fail_state
+    overload = state.overload_state
+    times = overload.times
+    return [state.status.name,
+            fail.periods, fail.fail_start, fail.timeout_start, fail.timeout_count,
+            overload.periods, overload.overload_start,
+            times.size, times.buf, times.idx]
+
+
+def load_state(data: list) -> InterfaceState:
+    [status, fail_periods, fail_start, timeout_start, timeout_count,
+     overload_periods, overload_start, size, buf, idx] = data
+
+    times = RingBuffer(size)
+    times.buf = buf
+    times.idx = idx
+    times.total = sum(t for t in buf if t is not None)
+    times.timeouts = buf.count(None)
+
+    return InterfaceState(Status[status],
+                          FailState([tuple(p) for p in fail_periods], fail_start, timeout_start, timeout_count),
+                          OverloadState([tuple(p) for p in overload_periods], overload_start, times))
+
+
+def dump_checkpoint(checkpoint: Checkpoint, path: str):
+    data = {
+        'version': VERSION,
+        'params': list(checkpoint.params),
+        'offset': checkpoint.offset,
+        'head': checkpoint.head.hex(),
+        'interfaces': [[str(addr), dump_state(state)] for addr, state in checkpoint.states.items()],
+        'networks': [[str(network), state_net.periods, state_net.fail_start, [str(addr) for addr in state_net.states]]
+                     for network, state_net in checkpoint.states_net.items()],
+    }
+
+    # the old checkpoint is kept until the new one is complete
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path: str) -> Checkpoint:
+    with open(path, 'r') as f:
+        data = json.load(f)
+
+    if data.get('version') != VERSION:
+        raise ValueError(f'unsupported checkpoint: {path}')
+
+    states = {IPv4Interface(addr): load_state(state) for addr, state in data['interfaces']}
+    states_net = dict()
+    for network, periods, fail_start, members in data['networks']:
+        state_net = NetworkState([tuple(p) for p in periods], fail_start, dict())
+        for addr in members:
+            state_net.add(IPv4Interface(addr), states[IPv4Interface(addr)])
+        states_net[IPv4Network(network)] = state_net
+
+    [threshould, overload_count, overload_threshould] = data['params']
+    return Checkpoint((threshould, overload_count, overload_threshould),
+                      data['offset'], bytes.fromhex(data['head']), states, states_net)
+
+
+def read_logs(src: str, table: AddressTable, start: int, end: int) -> list[MonitorLog]:
+    return list(parse_records(read_text_records(src, table, start, end), table, MonitorLog))
+
+
+# interfaces of ifaces unknown to the checkpoint, in networks known to it
+def joining_interfaces(checkpoint: Checkpoint, table: AddressTable, ifaces: list[int]) -> list[IPv4Interface]:
+    addrs = [table.interfaces[iface] for iface in ifaces]
+    return [addr for addr in addrs if addr not in checkpoint.states and addr.network in checkpoint.states_net]
+
+
+# analyses the lines appended to src since the checkpoint, and saves the new
+# state to the checkpoint
+def solve_as_text(src: str, threshould: int, overload_count: int, overload_threshould: float, path: str) -> str:
+    if columnar.is_columnar(src):
+        raise ValueError('columnar logs cannot be resumed from a checkpoint')
+    if compressed.is_compressed(src):
+        raise ValueError('compressed logs cannot be resumed from a checkpoint')
+
+    params = (threshould, overload_count, overload_threshould)
+    checkpoint: Optional[Checkpoint] = None
+    if os.path.exists(path):
+        checkpoint = load_checkpoint(path)
+        if checkpoint.params != params:
+            raise ValueError(f'checkpoint was made with N={checkpoint.params[0]} m={checkpoint.params[1]} '
+                             f't={checkpoint.params[2]}')
+
+    head = read_head(src)
+    end = complete_end(src)
+    resumed = checkpoint is not None and checkpoint.offset <= end and head.startswith(checkpoint.head)
+    start = checkpoint.offset if resumed else 0
+
+    table = AddressTable()
+    logs = read_logs(src, table, start, end)
+    ifaces = list(dict.fromkeys(log.iface for log in logs))
+    previous = None if checkpoint is None else (checkpoint.states, checkpoint.states_net)
+
+    if checkpoint is not None and joining_interfaces(checkpoint, table, ifaces) != []:
+        # the networks are analysed again with all of their interfaces, from
+        # the beginning of the log. a rotated log is already read from there,
+        # and the saved states of the lines it has lost are discarded.
+        if resumed:
+            table = AddressTable()
+            logs = read_logs(src, table, 0, end)
+            ifaces = list(dict.fromkeys(log.iface for log in logs))
+        previous = None
+
+    logs.sort(key=lambda log: log.date)
+    states, states_net = ans4.interface_states_stream(logs, threshould, overload_count, overload_threshould,
+                                                      table, ifaces, previous)
+
+    dump_checkpoint(Checkpoint(params, end, head, states, states_net), path)
+    return ans4.format_output(ans4.format_states(states), ans4.format_states_net(states_net))
@@ -0,0 +1,126 @@
+from argparse import ArgumentParser, Namespace
+from collections import Counter
+from contextlib import nullcontext
+from types import ModuleType
+from typing import Callable, Optional, TextIO
+from answer import instrument, report
+import sys
+
+
+# The options shared by the command lines of ans1 to ans4 and multi, which of
+# them cannot be used together, and how each way of running is chosen. ans4
+# adds --checkpoint and --follow, and runs them itself.
+
+# each option and those it cannot be used with. options a command line lacks
+# are left out.
+INCOMPATIBLE = {
+    'workers': ['window'],
+    'memory': ['workers', 'window', 'checkpoint', 'follow'],
+    'checkpoint': ['workers', 'window'],
+    'follow': ['workers', 'checkpoint'],
+    'format': ['workers', 'checkpoint', 'follow'],
+    'cache': ['workers', 'format', 'profile', 'checkpoint', 'follow'],
+    'profile': ['workers', 'checkpoint', 'follow'],
+}
+
+# options analysing a single input file
+SINGLE = ['workers', 'checkpoint', 'follow']
+
+
+def add_arguments(parser: ArgumentParser, resumable: bool = False, parallel: bool = True):
+    parser.add_argument('--window', type=int, help='reorder window in seconds (streaming mode)')
+    parser.add_argument('--memory', type=int, help='memory budget in MB for sorting logs larger than memory')
+    if parallel:
+        parser.add_argument('--workers', type=int, help='number of processes analysing subnets in parallel')
+    if resumable:
+        parser.add_argument('--checkpoint', help='state file to resume from and save to (appended logs)')
+        parser.add_argument('--follow', action='store_true', help='follow the growing log and print each change of state')
+    parser.add_argument('--cache', help='directory of cached reports')
+    parser.add_argument('--cache-size', type=int, default=256, help='size limit of the cache in MB')
+    parser.add_argument('--cache-identity', choices=['stat', 'content'], default='stat',
+                        help='identify logs by inode, size and mtime, or by content')
+    parser.add_argument('--format', choices=report.FORMATS, default='text', help='format of the report')
+    parser.add_argument('--profile', nargs='?', const='-', help='write counters and timings as JSON to the file (stderr by default)')
+
+
+def is_used(args: Namespace, option: str) -> bool:
+    value = getattr(args, option, None)
+    if option == 'format':
+        return value not in (None, 'text')
+    return value is not None and value is not False
+
+
+# '--a, --b or --c'
+def format_options(options: list[str]) -> str:
+    names = [f'--{option}' for option in options]
+    if len(names) == 1:
+        return names[0]
+    return ', '.join(names[:-1]) + ' or ' + names[-1]
+
+
+def check_arguments(parser: ArgumentParser, args: Namespace):
+    if getattr(args, 'workers', None) is not None and args.workers < 1:
+        parser.error('--workers must be at least 1')
+
+    for option, others in INCOMPATIBLE.items():
+        others = [other for other in others if hasattr(args, other)]
+        if is_used(args, option) and any(is_used(args, other) for other in others):
+            parser.error(f'--{option} cannot be used with {format_options(others)}')
+
+    single = [option for option in SINGLE if is_used(args, option)]
+    if single != [] and len(args.src) > 1:
+        parser.error(f'--{single[0]} cannot be used with several input files')
+
+
+# logs dropped as later than --window, counted in instrument.counting()
+def write_late(counts: Counter, window: Optional[int]):
+    if counts['late'] > 0:
+        print(f'logs later than the window of {window} dropped: {counts["late"]}', file=sys.stderr)
+
+
+def memory_of(args: Namespace) -> Optional[int]:
+    return args.memory * 1024 * 1024 if args.memory is not None else None
+
+
+# sections of the states of ans1 to ans4 for report.write_report
+def write_states(out: TextIO, result, fmt: str):
+    # states of ans4 are those of interfaces and of networks
+    results = result if isinstance(result, tuple) else (result,)
+    report.write_report(out, list(zip(['interface', 'network'], results)), fmt)
+
+
+# runs the module of the name with the parameters after src, in parallel, from
+# the cache, or writing the result of solve in the format with write. the
+# update functions of profiled, or of the module, are counted while profiling.
+# logs dropped as late are reported after the result.
+def run(module: ModuleType, name: str, args: Namespace, params: list,
+        write: Callable[[TextIO, object, str], None] = write_states,
+        profiled: tuple[ModuleType, ...] = ()):
+    with instrument.counting() as counts:
+        run_module(module, name, args, params, write, profiled)
+    write_late(counts, args.window)
+
+
+def run_module(module: ModuleType, name: str, args: Namespace, params: list,
+               write: Callable[[TextIO, object, str], None],
+               profiled: tuple[ModuleType, ...]):
+    memory = memory_of(args)
+    if getattr(args, 'workers', None) is not None:
+        from answer import parallel
+        print(parallel.solve_as_text(name, args.src[0], args.workers, *params))
+    elif args.cache is not None:
+        from answer import cache
+        results = cache.ResultCache(args.cache, args.cache_size * 1024 * 1024, args.cache_identity)
+        params = params + [args.window]
+        print(results.solve_as_text(name, args.src, params, lambda: module.solve_as_text(args.src, *params, memory)))
+    else:
+        profile = None
+        try:
+            with instrument.profiling(*(profiled or (module,))) if args.profile is not None else nullcontext() as profile:
+                result = module.solve(args.src, *params, args.window, memory)
+                with instrument.phase('output'):
+                    write(sys.stdout, result, args.format)
+        finally:
+            # also when an invalid line stops the run
+            if profile is not None:
+                instrument.write_summary(profile, args.profile)
@@ -0,0 +1,203 @@
+from array import array
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional
+from answer.address import AddressTable
+from answer import stream
+import argparse
+import mmap
+import struct
+import sys
+
+
+# Binary columnar log file.
+#
+#   header      magic, version, flags, number of addresses, number of records
+#   addresses   length (uint16) and bytes of each address, in order of their
+#               first appearance in the original log
+#   date        int64 seconds since 1970-01-01 00:00:00 of each record
+#   iface       uint32 index of the address of each record
+#   time        int32 response time of each record, or TIMEOUT
+#
+# Every section is little-endian and starts at a multiple of 8 bytes.
+
+MAGIC = b'FPLOGCOL'
+VERSION = 1
+HEADER = struct.Struct('<8sHHIQ')
+
+# flags
+SORTED = 1
+
+TIMEOUT = -2 ** 31
+
+
+@dataclass
+class ColumnarLog:
+    addrs: list[str]
+    sorted: bool
+    date: memoryview
+    iface: memoryview
+    time: memoryview
+
+    def __len__(self):
+        return len(self.date)
+
+
+def align(offset: int) -> int:
+    return (offset + 7) // 8 * 8
+
+
+def is_columnar(path: str) -> bool:
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def is_sorted(path: str) -> bool:
+    if not is_columnar(path):
+        return False
+
+    with open(path, 'rb') as f:
+        _, _, flags, _, _ = HEADER.unpack(f.read(HEADER.size))
+        return flags & SORTED != 0
+
+
+def column(buf: memoryview, offset: int, typecode: str, n: int) -> memoryview:
+    size = array(typecode).itemsize
+    view = buf[offset:offset + size * n]
+    if sys.byteorder == 'little':
+        return view.cast(typecode)
+
+    values = array(typecode, view)
+    values.byteswap()
+    return memoryview(values)
+
+
+@dataclass
+class Layout:
+    addrs: list[str]
+    flags: int
+    n: int
+    date_offset: int
+    iface_offset: int
+    time_offset: int
+
+
+def read_layout(buf) -> Layout:
+    magic, version, flags, n_addrs, n = HEADER.unpack_from(buf)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('not a columnar log')
+
+    offset = HEADER.size
+    addrs = []
+    for _ in range(n_addrs):
+        [length] = struct.unpack_from('<H', buf, offset)
+        addrs.append(bytes(buf[offset + 2:offset + 2 + length]).decode())
+        offset += 2 + length
+
+    date_offset = align(offset)
+    iface_offset = align(date_offset + 8 * n)
+    time_offset = align(iface_offset + 4 * n)
+    if time_offset + 4 * n > len(buf):
+        raise ValueError('truncated columnar log')
+
+    return Layout(addrs, flags, n, date_offset, iface_offset, time_offset)
+
+
+# the columns refer to the mapped file and are valid inside the with block only
+@contextmanager
+def open_columnar(path: str) -> Iterator[ColumnarLog]:
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        buf = memoryview(mm)
+        try:
+            layout = read_layout(buf)
+            log = ColumnarLog(layout.addrs,
+                              layout.flags & SORTED != 0,
+                              column(buf, layout.date_offset, 'q', layout.n),
+                              column(buf, layout.iface_offset, 'I', layout.n),
+                              column(buf, layout.time_offset, 'i', layout.n))
+            try:
+                yield log
+            finally:
+                log.date.release()
+                log.iface.release()
+                log.time.release()
+        finally:
+            buf.release()
+
+
+# ids in table of the addresses, in order of their first appearance in the
+# original log
+def intern_addrs(log: ColumnarLog, table: AddressTable) -> list[int]:
+    return [table.intern(addr) for addr in log.addrs]
+
+
+def interfaces(path: str, table: AddressTable) -> list[int]:
+    with open_columnar(path) as log:
+        return intern_addrs(log, table)
+
+
+def read_records(path: str, table: AddressTable) -> Iterator[tuple[int, int, Optional[int]]]:
+    with open_columnar(path) as log:
+        ids = intern_addrs(log, table)
+        for date, iface, time in zip(log.date, log.iface, log.time):
+            yield date, ids[iface], None if time == TIMEOUT else time
+
+
+def write_columnar(path: str,
+                   addrs: list[str],
+                   date: array,
+                   iface: array,
+                   time: array,
+                   is_sorted: bool):
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, SORTED if is_sorted else 0, len(addrs), len(date)))
+        offset = HEADER.size
+        for addr in addrs:
+            addr_bytes = addr.encode()
+            f.write(struct.pack('<H', len(addr_bytes)))
+            f.write(addr_bytes)
+            offset += 2 + len(addr_bytes)
+
+        for values in (date, iface, time):
+            f.write(b'\0' * (align(offset) - offset))
+            offset = align(offset)
+            if sys.byteorder != 'little':
+                values = array(values.typecode, values)
+                values.byteswap()
+            values.tofile(f)
+            offset += values.itemsize * len(values)
+
+
+def convert(records: Iterable[tuple[int, int, Optional[int]]],
+            table: AddressTable,
+            dst: str,
+            sort: bool = False):
+    date = array('q')
+    iface = array('I')
+    time = array('i')
+    for d, i, t in records:
+        date.append(d)
+        iface.append(i)
+        time.append(TIMEOUT if t is None else t)
+
+    is_sorted = all(date[i] <= date[i + 1] for i in range(len(date) - 1))
+    if sort and not is_sorted:
+        # stable, so that logs of the same date keep their order
+        order = sorted(range(len(date)), key=date.__getitem__)
+        date = array('q', (date[i] for i in order))
+        iface = array('I', (iface[i] for i in order))
+        time = array('i', (time[i] for i in order))
+        is_sorted = True
+
+    write_columnar(dst, [str(addr) for addr in table.interfaces], date, iface, time, is_sorted)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='convert a log file into a columnar log file')
+    parser.add_argument('src', help='input log file')
+    parser.add_argument('dst', help='output columnar log file')
+    parser.add_argument('--sort', action='store_true', help='sort logs by date')
+    args = parser.parse_args()
+
+    table = AddressTable()
+    convert(stream.read_records(args.src, table), table, args.dst, args.sort)
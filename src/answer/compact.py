@@ -0,0 +1,320 @@
+from array import array
+from typing import Iterable, Optional
+from answer.address import AddressTable
+from answer.epoch import format_date
+from answer.stream import read_interfaces, read_records, reorder
+from answer import cli, columnar, instrument
+import argparse
+
+
+# The engine of ans3 and ans4 on a compact store. Instead of an
+# InterfaceState with its FailState, OverloadState and RingBuffer for each
+# interface, the state of every interface is kept in typed arrays indexed by
+# interface id, and the response times of each ring buffer in an array of
+# int32, as in columnar logs, which grows with the logs of the interface up to
+# overload_count. Only the periods already ended are kept in lists, for the
+# interfaces having them. Logs are never made into MonitorLog either, but read
+# as (date, interface id, time).
+#
+# The transitions are those of ans3.update_status, and the reports are the
+# same as those of ans3 and ans4.
+
+# None of the date arrays
+NONE = -2 ** 63
+TIMEOUT = columnar.TIMEOUT
+
+IDLE = 0
+RUNNING = 1
+FAILURE = 2
+OVERLOAD = 3
+
+
+class CompactStates:
+    __slots__ = ('overload_count', 'order',
+                 'status', 'timeout_count', 'timeout_start', 'fail_start', 'overload_start',
+                 'times', 'times_idx', 'times_total', 'times_timeouts',
+                 'fail_periods', 'overload_periods',
+                 'subnets', 'members', 'failing', 'net_fail_start', 'net_periods')
+
+    def __init__(self, overload_count: int):
+        self.overload_count = overload_count
+        # interface ids in order of registration
+        self.order = array('i')
+
+        # indexed by interface id
+        self.status = array('b')
+        self.timeout_count = array('i')
+        self.timeout_start = array('q')
+        self.fail_start = array('q')
+        self.overload_start = array('q')
+        # the last response times, or TIMEOUT, of each interface. once
+        # overload_count are kept, the oldest is at times_idx.
+        self.times: list[array] = []
+        self.times_idx = array('i')
+        self.times_total = array('q')
+        self.times_timeouts = array('i')
+        self.fail_periods: dict[int, list[tuple[int, int]]] = dict()
+        self.overload_periods: dict[int, list[tuple[int, int]]] = dict()
+
+        # subnet id of each interface id, or -1 if not registered
+        self.subnets = array('i')
+        # indexed by subnet id
+        self.members = array('i')
+        self.failing = array('i')
+        self.net_fail_start = array('q')
+        self.net_periods: dict[int, list[tuple[int, int]]] = dict()
+
+    def __len__(self):
+        return len(self.order)
+
+    def is_registered(self, iface: int) -> bool:
+        return iface < len(self.subnets) and self.subnets[iface] >= 0
+
+    def register(self, iface: int, subnet: int):
+        if iface >= len(self.subnets):
+            grow = iface + 1 - len(self.subnets)
+            self.status.extend([IDLE] * grow)
+            self.timeout_count.extend([0] * grow)
+            self.timeout_start.extend([NONE] * grow)
+            self.fail_start.extend([NONE] * grow)
+            self.overload_start.extend([NONE] * grow)
+            self.times.extend(array('i') for _ in range(grow))
+            self.times_idx.extend([0] * grow)
+            self.times_total.extend([0] * grow)
+            self.times_timeouts.extend([0] * grow)
+            self.subnets.extend([-1] * grow)
+
+        if subnet >= len(self.members):
+            grow = subnet + 1 - len(self.members)
+            self.members.extend([0] * grow)
+            self.failing.extend([0] * grow)
+            self.net_fail_start.extend([NONE] * grow)
+
+        self.subnets[iface] = subnet
+        self.members[subnet] += 1
+        self.order.append(iface)
+
+
+def register(store: CompactStates, table: AddressTable, iface: int):
+    if not store.is_registered(iface):
+        store.register(iface, table.subnet_ids[iface])
+
+
+def end_period(periods: dict[int, list[tuple[int, int]]], key: int, start: int, end: int):
+    if key in periods:
+        periods[key].append((start, end))
+    else:
+        periods[key] = [(start, end)]
+
+
+# logs must be given in order of date. ifaces are the ids of interfaces known
+# in advance, as in ans4.interface_states_stream.
+def compact_states_stream(records: Iterable[tuple[int, int, Optional[int]]],
+                          fail_threshould: int,
+                          overload_count: int,
+                          overload_threshould: float,
+                          table: AddressTable,
+                          ifaces: Iterable[int] = ()) -> CompactStates:
+    store = CompactStates(overload_count)
+    for iface in ifaces:
+        register(store, table, iface)
+
+    status = store.status
+    timeout_count = store.timeout_count
+    timeout_start = store.timeout_start
+    fail_start = store.fail_start
+    overload_start = store.overload_start
+    times = store.times
+    times_idx = store.times_idx
+    times_total = store.times_total
+    times_timeouts = store.times_timeouts
+    fail_periods = store.fail_periods
+    overload_periods = store.overload_periods
+    subnets = store.subnets
+    members = store.members
+    failing = store.failing
+    net_fail_start = store.net_fail_start
+    net_periods = store.net_periods
+
+    for date, iface, time in records:
+        if iface >= len(subnets) or subnets[iface] < 0:
+            store.register(iface, table.subnet_ids[iface])
+
+        # RingBuffer.append
+        ring = times[iface]
+        value = TIMEOUT if time is None else time
+        length = len(ring)
+        if length < overload_count:
+            ring.append(value)
+            length += 1
+        else:
+            idx = times_idx[iface]
+            evicted = ring[idx]
+            if evicted == TIMEOUT:
+                times_timeouts[iface] -= 1
+            else:
+                times_total[iface] -= evicted
+            ring[idx] = value
+            times_idx[iface] = (idx + 1) % overload_count
+        if time is None:
+            times_timeouts[iface] += 1
+        else:
+            times_total[iface] += time
+        timeouts = times_timeouts[iface]
+
+        # update_timeout_count and update_timeout_start
+        if time is None:
+            count = timeout_count[iface] = timeout_count[iface] + 1
+            if count == 1 and fail_start[iface] == NONE:
+                timeout_start[iface] = date
+        else:
+            count = timeout_count[iface] = 0
+            timeout_start[iface] = NONE
+
+        before = status[iface]
+        if count >= fail_threshould:
+            if before == OVERLOAD:
+                # for fear of overlap of periods of overload and failure
+                start = timeout_start[iface]
+                overload = overload_start[iface]
+                if start != NONE and overload != NONE and overload < start:
+                    end_period(overload_periods, iface, overload, start)
+                overload_start[iface] = NONE
+
+            if before != FAILURE:
+                fail_start[iface] = timeout_start[iface]
+                timeout_start[iface] = NONE
+            after = FAILURE
+
+        elif timeouts > 0 or times_total[iface] / length >= overload_threshould:
+            if before == FAILURE:
+                if fail_start[iface] != NONE:
+                    end_period(fail_periods, iface, fail_start[iface], date)
+                    fail_start[iface] = NONE
+                overload_start[iface] = date
+            elif before != OVERLOAD:
+                overload_start[iface] = date
+            after = OVERLOAD
+
+        else:
+            if before == FAILURE:
+                if fail_start[iface] != NONE:
+                    end_period(fail_periods, iface, fail_start[iface], date)
+                    fail_start[iface] = NONE
+            elif before == OVERLOAD:
+                if overload_start[iface] != NONE:
+                    end_period(overload_periods, iface, overload_start[iface], date)
+                    overload_start[iface] = NONE
+            after = RUNNING
+        status[iface] = after
+
+        # NetworkState.change_status and update_state_net
+        subnet = subnets[iface]
+        if before != FAILURE and after == FAILURE:
+            failing[subnet] += 1
+        elif before == FAILURE and after != FAILURE:
+            failing[subnet] -= 1
+
+        if failing[subnet] == members[subnet]:
+            net_fail_start[subnet] = date
+        elif net_fail_start[subnet] != NONE:
+            end_period(net_periods, subnet, net_fail_start[subnet], date)
+            net_fail_start[subnet] = NONE
+
+    return store
+
+
+# same as InterfaceState.format of ans3 and ans4
+def format_interface(store: CompactStates, iface: int) -> list[str]:
+    periods = [('FAILURE ', period) for period in store.fail_periods.get(iface, [])] + \
+        [('OVERLOAD', period) for period in store.overload_periods.get(iface, [])]
+    periods.sort(key=lambda x: x[1])
+
+    format_list = [f'{status}({format_date(period[0])} - {format_date(period[1])})' for status, period in periods]
+    if store.fail_start[iface] != NONE:
+        format_list.append(f'FAILURE ({format_date(store.fail_start[iface])} -)')
+    if store.overload_start[iface] != NONE:
+        format_list.append(f'OVERLOAD({format_date(store.overload_start[iface])} -)')
+    return format_list
+
+
+# same as NetworkState.format of ans4
+def format_network(store: CompactStates, subnet: int) -> list[str]:
+    format_list = [f'FAILURE ({format_date(period[0])} - {format_date(period[1])})'
+                   for period in store.net_periods.get(subnet, [])]
+    if store.net_fail_start[subnet] != NONE:
+        format_list.append(f'FAILURE ({format_date(store.net_fail_start[subnet])} -)')
+    return format_list
+
+
+def format_states(store: CompactStates, table: AddressTable) -> list[str]:
+    format_list = []
+    for iface in store.order:
+        state_format = '\n  '.join(format_interface(store, iface))
+        format_list.append(f'{table.interfaces[iface]}:\n  {state_format}')
+    return format_list
+
+
+def format_states_net(store: CompactStates, table: AddressTable) -> list[str]:
+    format_list = []
+    for subnet in dict.fromkeys(store.subnets[iface] for iface in store.order):
+        state_format = '\n  '.join(format_network(store, subnet))
+        format_list.append(f'{table.networks[subnet]}:\n  {state_format}')
+    return format_list
+
+
+# records in three arrays, with TIMEOUT for timeouts
+def read_columns(src: str, table: AddressTable) -> tuple[array, array, array]:
+    dates = array('q')
+    ifaces = array('i')
+    times = array('q')
+    for date, iface, time in read_records(src, table):
+        dates.append(date)
+        ifaces.append(iface)
+        times.append(TIMEOUT if time is None else time)
+    return dates, ifaces, times
+
+
+def sorted_records(dates: array, ifaces: array, times: array) -> Iterable[tuple[int, int, Optional[int]]]:
+    # stable, so that logs of the same date keep their order
+    for i in sorted(range(len(dates)), key=dates.__getitem__):
+        time = times[i]
+        yield dates[i], ifaces[i], None if time == TIMEOUT else time
+
+
+# with networks, the output is that of ans4, otherwise that of ans3
+def solve_as_text(src: str, threshould: int, overload_count: int, overload_threshould: float,
+                  networks: bool = False, window: Optional[int] = None) -> str:
+    table = AddressTable()
+    if window is None and not columnar.is_sorted(src):
+        dates, ifaces, times = read_columns(src, table)
+        known = list(dict.fromkeys(ifaces)) if networks else []
+        records = sorted_records(dates, ifaces, times)
+    else:
+        known = read_interfaces(src, table) if networks else []
+        records = read_records(src, table)
+        if window is not None:
+            records = reorder(records, window, key=lambda record: record[0])
+
+    store = compact_states_stream(records, threshould, overload_count, overload_threshould, table, known)
+    if not networks:
+        return '\n'.join(format_states(store, table))
+
+    states_str = '\n'.join(format_states(store, table))
+    states_net_str = '\n'.join(format_states_net(store, table))
+    return '\n'.join(['[Interface]', states_str, '', '[Network]', states_net_str])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='analyse logs as ans3 or ans4 with a compact store of states')
+    parser.add_argument('src', help='input log file')
+    parser.add_argument('N', type=int, help='threshould for timeout')
+    parser.add_argument('M', type=int, help='number of time to response')
+    parser.add_argument('t', type=float, help='threshould for overload')
+    parser.add_argument('--networks', action='store_true', help='analyse networks as ans4')
+    parser.add_argument('--window', type=int, help='reorder window in seconds (streaming mode)')
+    args = parser.parse_args()
+
+    with instrument.counting() as counts:
+        print(solve_as_text(args.src, args.N, args.M, args.t, args.networks, args.window))
+    cli.write_late(counts, args.window)
@@ -0,0 +1,198 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional
+import bz2
+import mmap
+import os
+import queue
+import re
+import threading
+import zlib
+
+
+# Reads logs compressed with gzip or bz2, such as rotated monitor.log.1.gz,
+# without decompressing them to disk. The decompression runs in a thread of
+# its own, which zlib and bz2 let run in parallel with the parsing since they
+# release the GIL. A file made of several members (streams for bz2), as
+# `cat a.gz b.gz` or pigz and pbzip2 make, has its members decompressed in
+# parallel by a pool of threads.
+
+
+@dataclass(frozen=True)
+class Codec:
+    name: str
+    # first bytes of a compressed file
+    magic: bytes
+    # first bytes of a member. bytes inside a member may match it as well.
+    member: re.Pattern
+    decompressor: Callable
+
+
+GZIP = Codec('gzip', b'\x1f\x8b', re.compile(rb'\x1f\x8b\x08'), lambda: zlib.decompressobj(16 + zlib.MAX_WBITS))
+BZ2 = Codec('bz2', b'BZh', re.compile(rb'BZh[1-9]1AY&SY'), bz2.BZ2Decompressor)
+CODECS = [GZIP, BZ2]
+
+# compressed bytes given to a decompressor at once
+CHUNK = 256 * 1024
+
+# decompressed blocks waiting to be parsed, at most
+QUEUE_BLOCKS = 16
+
+# members are decompressed in parallel only if each has at most this many
+# compressed bytes, since the whole of a member is held in memory
+MEMBER_BYTES = 4 * 1024 * 1024
+
+WORKERS = min(4, os.cpu_count() or 1)
+
+
+def codec_of(path: str) -> Optional[Codec]:
+    with open(path, 'rb') as f:
+        head = f.read(4)
+    for codec in CODECS:
+        if head.startswith(codec.magic):
+            return codec
+    return None
+
+
+def is_compressed(path: str) -> bool:
+    return codec_of(path) is not None
+
+
+# decompresses the members one after another
+def inflate(codec: Codec, f) -> Iterator[bytes]:
+    decompressor = None
+    while True:
+        chunk = f.read(CHUNK)
+        if chunk == b'':
+            break
+        while chunk != b'':
+            if decompressor is None:
+                decompressor = codec.decompressor()
+            block = decompressor.decompress(chunk)
+            if block != b'':
+                yield block
+            if not decompressor.eof:
+                break
+            chunk = decompressor.unused_data
+            decompressor = None
+
+    if decompressor is not None:
+        raise ValueError(f'truncated {codec.name} log')
+
+
+# decompresses the member at start, and returns it with the offset where it ends
+def inflate_member(codec: Codec, mm: mmap.mmap, start: int) -> tuple[bytes, int]:
+    decompressor = codec.decompressor()
+    blocks = []
+    pos = start
+    while not decompressor.eof:
+        if pos >= len(mm):
+            raise ValueError(f'truncated {codec.name} log')
+        chunk = mm[pos:pos + CHUNK]
+        blocks.append(decompressor.decompress(chunk))
+        pos += len(chunk)
+    return b''.join(blocks), pos - len(decompressor.unused_data)
+
+
+# decompresses every offset where a member may start. the member of an offset
+# is taken only if the previous member ends there, so offsets matched inside
+# a member are thrown away.
+def inflate_members(codec: Codec, mm: mmap.mmap, offsets: list[int], workers: int) -> Iterator[bytes]:
+    with ThreadPoolExecutor(workers) as pool:
+        pending = deque()
+        offsets = iter(offsets)
+        end = 0
+        while True:
+            while len(pending) < 2 * workers:
+                start = next(offsets, None)
+                if start is None:
+                    break
+                pending.append((start, pool.submit(inflate_member, codec, mm, start)))
+            if not pending:
+                break
+
+            start, future = pending.popleft()
+            if start < end:
+                future.cancel()
+                continue
+            if start > end:
+                raise ValueError(f'invalid {codec.name} log at byte {end}')
+            block, end = future.result()
+            yield block
+
+    if end < len(mm):
+        raise ValueError(f'invalid {codec.name} log at byte {end}')
+
+
+def decompressed_blocks(path: str, workers: int = WORKERS) -> Iterator[bytes]:
+    codec = codec_of(path)
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if workers > 1 and size > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                offsets = [match.start() for match in codec.member.finditer(mm)]
+                ends = offsets[1:] + [size]
+                if len(offsets) > 1 and offsets[0] == 0 and \
+                        max(end - start for start, end in zip(offsets, ends)) <= MEMBER_BYTES:
+                    yield from inflate_members(codec, mm, offsets, workers)
+                    return
+
+        yield from inflate(codec, f)
+
+
+# runs produce in another thread, and yields what it yields
+def background(produce: Callable[[], Iterator[bytes]], size: int = QUEUE_BLOCKS) -> Iterator[bytes]:
+    blocks = queue.Queue(size)
+    stop = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                blocks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def run():
+        produced = produce()
+        try:
+            for block in produced:
+                if not put(block):
+                    return
+            put(done)
+        except Exception as e:
+            put(e)
+        finally:
+            produced.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = blocks.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+# lines of the decompressed log, without newlines
+def read_lines(path: str, workers: int = WORKERS) -> Iterator[bytes]:
+    rest = b''
+    for block in background(lambda: decompressed_blocks(path, workers)):
+        lines = (rest + block).split(b'\n')
+        rest = lines.pop()
+        yield from lines
+    if rest != b'':
+        yield rest
+
+
+def read_bytes(path: str, workers: int = WORKERS) -> bytes:
+    return b''.join(decompressed_blocks(path, workers))
@@ -0,0 +1,44 @@
+from datetime import date, datetime, timedelta
+
+
+EPOCH = datetime(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+
+
+# days since EPOCH for each YYYYMMDD seen so far.
+# logs share a few days only, so that this stays small.
+day_cache: dict[int, int] = dict()
+
+
+def epoch_day(ymd: int) -> int:
+    days = day_cache.get(ymd)
+    if days is None:
+        days = date(ymd // 10000, ymd // 100 % 100, ymd % 100).toordinal() - EPOCH_ORDINAL
+        day_cache[ymd] = days
+    return days
+
+
+# parse YYYYMMDDhhmmss, given as str or bytes, into seconds since EPOCH
+def parse_date(date_str: str | bytes) -> int:
+    if len(date_str) != 14 or not (date_str.isascii() and date_str.isdigit()):
+        raise ValueError(f'invalid date: {date_str!r}')
+
+    ymd, hms = divmod(int(date_str), 1000000)
+    hour, ms = divmod(hms, 10000)
+    minute, second = divmod(ms, 100)
+    if hour > 23 or minute > 59 or second > 59:
+        raise ValueError(f'invalid date: {date_str!r}')
+
+    return epoch_day(ymd) * 86400 + hour * 3600 + minute * 60 + second
+
+
+def to_datetime(epoch: int) -> datetime:
+    return EPOCH + timedelta(seconds=epoch)
+
+
+def to_epoch(dt: datetime) -> int:
+    return (dt.toordinal() - EPOCH_ORDINAL) * 86400 + dt.hour * 3600 + dt.minute * 60 + dt.second
+
+
+def format_date(epoch: int) -> str:
+    return str(to_datetime(epoch))
@@ -0,0 +1,172 @@
+from heapq import merge
+from operator import itemgetter
+from typing import Iterable, Iterator, Optional, Union
+from answer.address import AddressTable
+from answer.stream import read_records, reorder
+from answer import columnar, compressed, instrument
+import mmap
+import os
+import struct
+import tempfile
+
+
+# Sorts the logs by date within a memory budget. Logs already in order are
+# read as they are. Otherwise the logs are sorted in chunks which fit in the
+# budget, each chunk is written to a temporary file as a sorted run, and the
+# runs are merged while the logs are analysed. Both the sort of a chunk and
+# the merge keep logs of the same date in the order of the file.
+#
+# Logs of several monitoring servers, each in order of date, are merged the
+# same way, as if they were one file made by concatenating them.
+
+# date, interface id, and time or TIMEOUT of a record in a run
+RECORD = struct.Struct('<qiq')
+TIMEOUT = columnar.TIMEOUT
+
+# estimated bytes of memory a record takes while its chunk is sorted
+RECORD_BYTES = 120
+
+DEFAULT_MEMORY = 256 * 1024 * 1024
+
+# records read at once from each run while merging, at least
+MIN_BLOCK = 256
+
+
+# dates of a text log are compared as bytes, since YYYYMMDDhhmmss sorts as
+# the dates do
+def text_is_sorted(path: str) -> bool:
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return True
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            last = b''
+            pos = 0
+            while pos < size:
+                date = mm[pos:pos + 14]
+                if date < last:
+                    return False
+                last = date
+                end = mm.find(b'\n', pos)
+                if end < 0:
+                    break
+                pos = end + 1
+    return True
+
+
+# a compressed log is taken as out of order, since checking it would
+# decompress the whole log once more only to read it again
+def is_sorted(path: str) -> bool:
+    if columnar.is_columnar(path):
+        return columnar.is_sorted(path)
+    if compressed.is_compressed(path):
+        return False
+    return text_is_sorted(path)
+
+
+def write_run(records: list[tuple[int, int, Optional[int]]], path: str):
+    with open(path, 'wb') as f:
+        f.write(b''.join(RECORD.pack(date, iface, TIMEOUT if time is None else time)
+                         for date, iface, time in records))
+
+
+def read_run(path: str, block: int) -> Iterator[tuple[int, int, Optional[int]]]:
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(block * RECORD.size)
+            if data == b'':
+                return
+            for date, iface, time in RECORD.iter_unpack(data):
+                yield date, iface, None if time == TIMEOUT else time
+
+
+# records of the log in order of date. the runs are removed when the records
+# are exhausted or the iterator is closed.
+def sorted_records(path: str,
+                   table: AddressTable,
+                   memory: int = DEFAULT_MEMORY,
+                   tmpdir: Optional[str] = None) -> Iterator[tuple[int, int, Optional[int]]]:
+    if is_sorted(path):
+        yield from read_records(path, table)
+        return
+
+    chunk_size = max(1, memory // RECORD_BYTES)
+    key = itemgetter(0)
+    with tempfile.TemporaryDirectory(dir=tmpdir, prefix='extsort-') as tmp:
+        runs = []
+        chunk = []
+        for record in read_records(path, table):
+            chunk.append(record)
+            if len(chunk) == chunk_size:
+                chunk.sort(key=key)
+                runs.append(os.path.join(tmp, f'run-{len(runs)}'))
+                write_run(chunk, runs[-1])
+                chunk = []
+
+        chunk.sort(key=key)
+        if runs == []:
+            # the whole log fits in memory
+            yield from chunk
+            return
+
+        runs.append(os.path.join(tmp, f'run-{len(runs)}'))
+        write_run(chunk, runs[-1])
+        del chunk
+
+        block = max(MIN_BLOCK, memory // (2 * len(runs) * RECORD.size))
+        # merge takes the earlier run first among records of the same date
+        yield from merge(*(read_run(run, block) for run in runs), key=key)
+
+
+# a path, or the paths of several logs
+def paths_of(src: Union[str, os.PathLike, Iterable[Union[str, os.PathLike]]]) -> list:
+    if isinstance(src, (str, os.PathLike)):
+        return [src]
+    return list(src)
+
+
+# records of the logs merged in order of date. a log out of order is sorted
+# within its share of memory. among records of the same date, those of an
+# earlier path come first.
+def merged_records(paths: list,
+                   table: AddressTable,
+                   memory: int = DEFAULT_MEMORY,
+                   tmpdir: Optional[str] = None) -> Iterator[tuple[int, int, Optional[int]]]:
+    if len(paths) == 1:
+        return sorted_records(paths[0], table, memory, tmpdir)
+    share = memory // len(paths)
+    return merge(*(sorted_records(path, table, share, tmpdir) for path in paths), key=itemgetter(0))
+
+
+# whether records_in_order reads the whole log at once and sorts it in memory
+def sorts_in_memory(paths: list, window: Optional[int] = None, memory: Optional[int] = None) -> bool:
+    return window is None and memory is None and len(paths) == 1 and not columnar.is_sorted(paths[0])
+
+
+# records of the logs in order of date, as the answer modules analyse them. a
+# single log is read at once and sorted in memory, unless a window or a memory
+# budget is given. otherwise the records are read during the analysis:
+# columnar logs sorted in advance need neither sorting nor reordering, logs out
+# of order are sorted in runs on disk within the memory budget, or reordered
+# within the window, and the logs of several paths are merged by date.
+def records_in_order(paths: list,
+                     table: AddressTable,
+                     window: Optional[int] = None,
+                     memory: Optional[int] = None) -> Iterable[tuple[int, int, Optional[int]]]:
+    key = itemgetter(0)
+    if sorts_in_memory(paths, window, memory):
+        with instrument.phase('parse'):
+            records = list(read_records(paths[0], table))
+        instrument.count('lines', len(records))
+        with instrument.phase('sort'):
+            records.sort(key=key)
+        return records
+
+    # records are parsed while they are analysed, and the parse, with the
+    # sort of runs and the merge of paths, is timed apart from the update
+    if window is None:
+        records = merged_records(paths, table, memory or DEFAULT_MEMORY)
+        return instrument.counted('lines', instrument.timed('parse', records))
+    records = merge(*(read_records(path, table) for path in paths), key=key)
+    return reorder(instrument.counted('lines', instrument.timed('parse', records)), window, key=key)
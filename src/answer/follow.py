@@ -0,0 +1,126 @@
+from ipaddress import IPv4Interface, IPv4Network
+from typing import Iterable, Iterator, Optional
+from answer.address import AddressTable
+from answer.ans4 import MonitorLog, InterfaceState, NetworkState
+from answer.epoch import format_date
+from answer.stream import complete_end, follow_records, read_text_records, reorder
+from answer import ans4
+import os
+
+
+# Analyses a growing log as ans4 and reports each start and end of a period of
+# FAILURE or OVERLOAD as an event, as soon as the log causing it is read.
+#
+#   2020-10-19 13:31:35 interface 192.168.1.2/24 FAILURE start
+#   2020-10-19 13:31:37 interface 192.168.1.2/24 FAILURE end
+#   2020-10-19 13:31:37 interface 192.168.1.2/24 OVERLOAD start
+#
+# An OVERLOAD which turns out to be a part of the following FAILURE is
+# reported as cancelled.
+#
+# A network fails when all of its interfaces fail. The interfaces already in
+# the log when it is opened are known to their networks before the first
+# event, as in ans4. An interface first written after that joins its network
+# when it is first read, so that a FAILURE of its network reported before is
+# provisional.
+
+
+def event(date: int, kind: str, addr: IPv4Interface | IPv4Network, status: str, change: str) -> str:
+    return f'{format_date(date)} {kind} {addr} {status} {change}'
+
+
+# (start, number of periods) of each kind of period, to be compared after
+# update_state
+def snapshot(state: InterfaceState) -> tuple[Optional[int], int, Optional[int], int]:
+    return (state.fail_state.fail_start, len(state.fail_state.periods),
+            state.overload_state.overload_start, len(state.overload_state.periods))
+
+
+def period_events(date: int,
+                  kind: str,
+                  addr: IPv4Interface | IPv4Network,
+                  status: str,
+                  periods: list[tuple[int, int]],
+                  start: Optional[int],
+                  before_start: Optional[int],
+                  before_ended: int) -> Iterator[str]:
+    for _, end in periods[before_ended:]:
+        yield event(end, kind, addr, status, 'end')
+
+    if start is not None and (before_start is None or len(periods) > before_ended):
+        yield event(start, kind, addr, status, 'start')
+    elif start is None and before_start is not None and len(periods) == before_ended:
+        yield event(date, kind, addr, status, 'cancel')
+
+
+def interface_events(log: MonitorLog,
+                     addr: IPv4Interface,
+                     state: InterfaceState,
+                     before: tuple[Optional[int], int, Optional[int], int]) -> Iterator[str]:
+    fail_start, fail_ended, overload_start, overload_ended = before
+    # periods ending come first, since another one may start at the same time
+    events = list(period_events(log.date, 'interface', addr, 'FAILURE',
+                                state.fail_state.periods, state.fail_state.fail_start, fail_start, fail_ended))
+    events += period_events(log.date, 'interface', addr, 'OVERLOAD',
+                            state.overload_state.periods, state.overload_state.overload_start,
+                            overload_start, overload_ended)
+    events.sort(key=lambda e: not e.endswith(' end'))
+    return iter(events)
+
+
+# logs are analysed in the order given. ifaces are the ids of interfaces known
+# in advance, as in ans4.interface_states_stream.
+def follow_events(logs: Iterable[MonitorLog],
+                  fail_threshould: int,
+                  overload_count: int,
+                  overload_threshould: float,
+                  table: Optional[AddressTable] = None,
+                  ifaces: Iterable[int] = ()) -> Iterator[str]:
+    table = AddressTable() if table is None else table
+    states: list[Optional[InterfaceState]] = []
+    states_net: list[Optional[NetworkState]] = []
+    for iface in ifaces:
+        ans4.register_interface(iface, table, states, states_net, overload_count)
+
+    for log in logs:
+        iface = table.lookup(log.addr, log.iface)
+        if iface >= len(states) or states[iface] is None:
+            ans4.register_interface(iface, table, states, states_net, overload_count)
+
+        state = states[iface]
+        subnet = table.subnet_ids[iface]
+        state_net = states_net[subnet]
+
+        before = snapshot(state)
+        before_net = (state_net.fail_start, len(state_net.periods))
+
+        status = state.status
+        ans4.update_state(log, state, fail_threshould, overload_count, overload_threshould)
+        state_net.change_status(status, state.status)
+        ans4.update_state_net(log.date, state_net)
+
+        yield from interface_events(log, table.interfaces[iface], state, before)
+        yield from period_events(log.date, 'network', table.networks[subnet], 'FAILURE',
+                                 state_net.periods, state_net.fail_start, *before_net)
+
+
+# ids of the interfaces of the complete lines already in src
+def known_interfaces(src: str, table: AddressTable) -> list[int]:
+    if not os.path.exists(src):
+        return []
+    return list(dict.fromkeys(iface for _, iface, _ in read_text_records(src, table, 0, complete_end(src))))
+
+
+def follow(src: str,
+           fail_threshould: int,
+           overload_count: int,
+           overload_threshould: float,
+           window: Optional[int] = None,
+           idle: Optional[float] = None) -> Iterator[str]:
+    table = AddressTable()
+    ifaces = known_interfaces(src, table)
+    logs = (MonitorLog(date, table.interfaces[iface], time, iface)
+            for date, iface, time in follow_records(src, table, idle=idle))
+    if window is not None:
+        logs = reorder(logs, window, key=lambda log: log.date)
+    return follow_events(logs, fail_threshould, overload_count, overload_threshould, table, ifaces)
@@ -0,0 +1,141 @@
+from dataclasses import dataclass
+from heapq import heappush, heappop
+from ipaddress import IPv4Network
+from typing import Iterator, Optional, TextIO
+from answer.epoch import parse_date, to_datetime
+import argparse
+import random
+import sys
+
+
+# Generates a log of monitor servers probing interfaces. Every interface is
+# probed once per interval, and the same seed always gives the same log.
+#
+# Response times follow a log-normal distribution. An interface sometimes
+# falls into an outage, where every probe times out, or into a slowdown, where
+# response times are multiplied. A probe may also time out by itself. Some
+# lines are written late, by up to max_delay seconds after their date.
+
+@dataclass
+class Workload:
+    interfaces: int = 100
+    subnets: int = 10
+    # prefix length of the subnets
+    prefixlen: int = 24
+    # seconds covered by the log
+    duration: int = 3600
+    # seconds between probes of an interface
+    interval: int = 10
+    start: str = '20201019000000'
+    # median and spread (sigma of log) of response times in ms
+    latency: float = 20.0
+    latency_sigma: float = 0.5
+    # probability of a probe to time out by itself
+    timeout_rate: float = 0.01
+    # probability per probe to fall into an outage or a slowdown, and the mean
+    # number of probes they last
+    outage_rate: float = 0.001
+    outage_length: float = 5.0
+    slowdown_rate: float = 0.005
+    slowdown_length: float = 20.0
+    slowdown_factor: float = 10.0
+    # probability of a line to be written late
+    late_rate: float = 0.0
+    max_delay: int = 30
+    seed: int = 0
+
+
+def addresses(workload: Workload) -> list[str]:
+    rng = random.Random(workload.seed)
+    hosts = 2 ** (32 - workload.prefixlen) - 2
+    if workload.interfaces > workload.subnets * hosts:
+        raise ValueError(f'{workload.interfaces} interfaces do not fit in {workload.subnets} subnets')
+
+    networks = []
+    base = int(IPv4Network('10.0.0.0/8').network_address)
+    for i in range(workload.subnets):
+        networks.append(IPv4Network((base + (i << (32 - workload.prefixlen)), workload.prefixlen)))
+
+    # every subnet has an interface, and the rest are spread at random
+    addrs = []
+    counts = [0] * workload.subnets
+    for i in range(workload.interfaces):
+        subnet = i if i < workload.subnets else rng.randrange(workload.subnets)
+        while counts[subnet] == hosts:
+            subnet = (subnet + 1) % workload.subnets
+        counts[subnet] += 1
+        network = networks[subnet]
+        addrs.append(f'{network.network_address + counts[subnet]}/{network.prefixlen}')
+    return addrs
+
+
+def generate(workload: Workload) -> Iterator[str]:
+    rng = random.Random(workload.seed)
+    addrs = addresses(workload)
+    start = parse_date(workload.start)
+    # remaining probes of outage and slowdown of each interface
+    outage = [0] * len(addrs)
+    slowdown = [0] * len(addrs)
+    late = []
+    seq = 0
+
+    for offset in range(0, workload.duration, workload.interval):
+        lines = []
+        for i, addr in enumerate(addrs):
+            date = start + offset + rng.randrange(workload.interval)
+
+            if outage[i] == 0 and rng.random() < workload.outage_rate:
+                outage[i] = 1 + int(rng.expovariate(1 / workload.outage_length))
+            if slowdown[i] == 0 and rng.random() < workload.slowdown_rate:
+                slowdown[i] = 1 + int(rng.expovariate(1 / workload.slowdown_length))
+
+            if outage[i] > 0 or rng.random() < workload.timeout_rate:
+                time = '-'
+            else:
+                ms = rng.lognormvariate(0, workload.latency_sigma) * workload.latency
+                if slowdown[i] > 0:
+                    ms *= workload.slowdown_factor
+                time = str(max(1, round(ms)))
+            outage[i] = max(0, outage[i] - 1)
+            slowdown[i] = max(0, slowdown[i] - 1)
+
+            line = f'{to_datetime(date):%Y%m%d%H%M%S},{addr},{time}'
+            if rng.random() < workload.late_rate:
+                heappush(late, (date + rng.randint(1, workload.max_delay), seq, line))
+                seq += 1
+            else:
+                lines.append((date, line))
+
+        lines.sort(key=lambda x: x[0])
+        for date, line in lines:
+            while late != [] and late[0][0] <= date:
+                yield heappop(late)[2]
+            yield line
+
+    while late != []:
+        yield heappop(late)[2]
+
+
+def write(workload: Workload, out: TextIO, lines: Optional[int] = None):
+    for n, line in enumerate(generate(workload)):
+        if lines is not None and n >= lines:
+            break
+        out.write(line + '\n')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='generate a log of monitor servers')
+    for name, value in Workload.__dataclass_fields__.items():
+        parser.add_argument(f'--{name.replace("_", "-")}', type=type(value.default), default=value.default)
+    parser.add_argument('--lines', type=int, help='stop after this many lines')
+    parser.add_argument('-o', '--output', help='output file (stdout by default)')
+    args = vars(parser.parse_args())
+
+    lines = args.pop('lines')
+    output = args.pop('output')
+    workload = Workload(**args)
+    if output is None:
+        write(workload, sys.stdout, lines)
+    else:
+        with open(output, 'w') as f:
+            write(workload, f, lines)
@@ -0,0 +1,181 @@
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from types import ModuleType
+from typing import Iterable, Iterator, Optional, TypeVar
+import json
+import sys
+import time
+
+
+# Counters and timings of a run of solve_as_text. Nothing is recorded unless
+# profiling() is active, and the engines themselves are left untouched: while
+# profiling, the update functions of the answer modules are replaced with
+# wrappers counting the transitions, so that the loops over logs cost the same
+# as ever when profiling is off.
+
+T = TypeVar('T')
+
+
+@dataclass
+class Profile:
+    counters: Counter = field(default_factory=Counter)
+    seconds: Counter = field(default_factory=Counter)
+    # 'RUNNING->FAILURE' and so on
+    transitions: Counter = field(default_factory=Counter)
+    # the phase being timed, or None
+    active: Optional[str] = None
+
+    def summary(self) -> dict:
+        return {
+            'counters': dict(self.counters),
+            'seconds': dict(self.seconds),
+            'transitions': dict(sorted(self.transitions.items())),
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.summary(), indent=2)
+
+
+# the profile being recorded, or None
+current: Optional[Profile] = None
+
+# the counts given to count() while counting() is active, profiling or not
+counts: Optional[Counter] = None
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    if current is None:
+        yield
+        return
+
+    profile = current
+    outer = profile.active
+    profile.active = name
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.seconds[name] += time.perf_counter() - start
+        profile.active = outer
+
+
+def count(name: str, n: int = 1):
+    if current is not None:
+        current.counters[name] += n
+    if counts is not None:
+        counts[name] += n
+
+
+# counts given to count(), such as the logs reorder drops as late, kept for
+# the caller to report. count() is called once per run, not per log, so this
+# costs nothing when profiling is off.
+@contextmanager
+def counting() -> Iterator[Counter]:
+    global counts
+    outer = counts
+    counts = Counter()
+    try:
+        yield counts
+    finally:
+        counts = outer
+
+
+def counted(name: str, xs: Iterable[T]) -> Iterable[T]:
+    if current is None:
+        return xs
+
+    def counting(profile: Profile):
+        for x in xs:
+            profile.counters[name] += 1
+            yield x
+    return counting(current)
+
+
+# xs read lazily in another phase, such as the records which the update reads
+# while streaming. the time taken to produce each x is that of the phase name,
+# and is left out of the phase consuming xs.
+def timed(name: str, xs: Iterable[T]) -> Iterable[T]:
+    if current is None:
+        return xs
+
+    def timing(profile: Profile):
+        iterator = iter(xs)
+        while True:
+            start = time.perf_counter()
+            try:
+                x = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                elapsed = time.perf_counter() - start
+                profile.seconds[name] += elapsed
+                if profile.active not in (None, name):
+                    profile.seconds[profile.active] -= elapsed
+            yield x
+    return timing(current)
+
+
+def count_transitions(update, profile: Profile):
+    # transitState of ans1 returns the new state, update_state of the others
+    # changes the state given
+    def wrapper(log, state, *args):
+        before = state.status
+        result = update(log, state, *args)
+        after = (state if result is None else result).status
+        if before != after:
+            profile.transitions[f'{before.name}->{after.name}'] += 1
+        return result
+    return wrapper
+
+
+def count_network(update_state_net, profile: Profile):
+    def wrapper(date, state_net):
+        fail_start = state_net.fail_start
+        ended = len(state_net.periods)
+        update_state_net(date, state_net)
+        profile.counters['update_state_net'] += 1
+        if fail_start is None and state_net.fail_start is not None:
+            profile.transitions['network:->FAILURE'] += 1
+        if len(state_net.periods) > ended:
+            profile.transitions['network:FAILURE->'] += 1
+    return wrapper
+
+
+# the answer modules whose update functions are counted, all of them if none
+# are given. a module run as __main__ is another module than the imported one.
+@contextmanager
+def profiling(*modules: ModuleType) -> Iterator[Profile]:
+    global current
+    if modules == ():
+        from answer import ans1, ans2, ans3, ans4
+        modules = (ans1, ans2, ans3, ans4)
+
+    profile = Profile()
+    patches = []
+    for module in modules:
+        for name, wrap in [('transitState', count_transitions),
+                           ('update_state', count_transitions),
+                           ('update_state_net', count_network)]:
+            if hasattr(module, name):
+                original = getattr(module, name)
+                patches.append((module, name, original))
+                setattr(module, name, wrap(original, profile))
+
+    current = profile
+    try:
+        yield profile
+    finally:
+        current = None
+        for module, name, original in patches:
+            setattr(module, name, original)
+
+
+# path '-' is stderr
+def write_summary(profile: Profile, path: str):
+    if path == '-':
+        print(profile.to_json(), file=sys.stderr)
+    else:
+        with open(path, 'w') as f:
+            f.write(profile.to_json() + '\n')
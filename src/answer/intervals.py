@@ -0,0 +1,118 @@
+from bisect import bisect_right
+from dataclasses import dataclass
+from ipaddress import IPv4Interface, IPv4Network
+from typing import Iterable, Optional
+from answer.address import AddressTable
+from answer.epoch import parse_date, format_date
+from answer.stream import parse_logs_mmap
+from answer import ans4
+import argparse
+import math
+
+
+# Index of the periods of FAILURE and OVERLOAD found by the engines, which
+# answers which interfaces or networks were in either status at a time or
+# during a range of time.
+#
+# The periods are sorted by their start, and a segment tree over that order
+# keeps the latest end in each range. A query walks the periods starting
+# before the end of the range, skipping every subtree whose periods all end
+# before its start, in O(log n) per period found.
+
+
+@dataclass(frozen=True)
+class Period:
+    start: int
+    # None if not ended yet
+    end: Optional[int]
+    kind: str
+    addr: IPv4Interface | IPv4Network
+    status: str
+
+    def format(self) -> str:
+        end = '' if self.end is None else f' {format_date(self.end)}'
+        return f'{self.kind} {self.addr} {self.status} ({format_date(self.start)} -{end})'
+
+
+def state_periods(kind: str, addr, state) -> Iterable[Period]:
+    # ans1 and NetworkState keep their periods of failure by themselves
+    fail_state = getattr(state, 'fail_state', state)
+    for start, end in fail_state.periods:
+        yield Period(start, end, kind, addr, 'FAILURE')
+    if fail_state.fail_start is not None:
+        yield Period(fail_state.fail_start, None, kind, addr, 'FAILURE')
+
+    overload_state = getattr(state, 'overload_state', None)
+    if overload_state is not None:
+        for start, end in overload_state.periods:
+            yield Period(start, end, kind, addr, 'OVERLOAD')
+        if overload_state.overload_start is not None:
+            yield Period(overload_state.overload_start, None, kind, addr, 'OVERLOAD')
+
+
+class PeriodIndex:
+    def __init__(self, periods: Iterable[Period]):
+        self.periods = sorted(periods, key=lambda p: p.start)
+        self.starts = [p.start for p in self.periods]
+
+        self.size = 1
+        while self.size < len(self.periods):
+            self.size *= 2
+        # latest end of the periods under each node, with leaves from size
+        self.max_end = [-math.inf] * (2 * self.size)
+        for i, p in enumerate(self.periods):
+            self.max_end[self.size + i] = math.inf if p.end is None else p.end
+        for node in range(self.size - 1, 0, -1):
+            self.max_end[node] = max(self.max_end[2 * node], self.max_end[2 * node + 1])
+
+    def __len__(self):
+        return len(self.periods)
+
+    # periods sharing any moment with [begin, end], in order of their start
+    def overlapping(self, begin: int, end: int) -> list[Period]:
+        found = []
+        stop = bisect_right(self.starts, end)
+        if stop > 0:
+            self.collect(1, 0, self.size, stop, begin, found)
+        return found
+
+    def at(self, date: int) -> list[Period]:
+        return self.overlapping(date, date)
+
+    def collect(self, node: int, lo: int, hi: int, stop: int, begin: int, found: list[Period]):
+        if lo >= stop or self.max_end[node] < begin:
+            return
+        if hi - lo == 1:
+            found.append(self.periods[lo])
+            return
+
+        mid = (lo + hi) // 2
+        self.collect(2 * node, lo, mid, stop, begin, found)
+        self.collect(2 * node + 1, mid, hi, stop, begin, found)
+
+
+def build_index(states: dict[IPv4Interface, object],
+                states_net: Optional[dict[IPv4Network, object]] = None) -> PeriodIndex:
+    periods = [p for addr, state in states.items() for p in state_periods('interface', addr, state)]
+    if states_net is not None:
+        periods += [p for network, state in states_net.items() for p in state_periods('network', network, state)]
+    return PeriodIndex(periods)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='list periods of FAILURE and OVERLOAD overlapping a time range')
+    parser.add_argument('src', help='input log file')
+    parser.add_argument('N', type=int, help='threshould for timeout')
+    parser.add_argument('M', type=int, help='number of time to response')
+    parser.add_argument('t', type=float, help='threshould for overload')
+    parser.add_argument('begin', help='YYYYMMDDhhmmss')
+    parser.add_argument('end', nargs='?', help='YYYYMMDDhhmmss, same as begin if omitted')
+    args = parser.parse_args()
+
+    begin = parse_date(args.begin)
+    end = begin if args.end is None else parse_date(args.end)
+    table = AddressTable()
+    logs = list(parse_logs_mmap(args.src, table, ans4.MonitorLog))
+    states, states_net = ans4.interface_states(logs, args.N, args.M, args.t, table)
+    for period in build_index(states, states_net).overlapping(begin, end):
+        print(period.format())
@@ -0,0 +1,267 @@
+from typing import Iterable, Optional, TextIO, Union
+from answer.address import AddressTable
+from answer.ans4 import MonitorLog
+from answer.stream import parse_records
+from answer import ans1, ans2, ans3, ans4, cli, extsort, instrument, report
+import argparse
+import sys
+
+
+# Makes any of the reports of ans1 to ans4 from one pass over the logs. The
+# logs are read and sorted once, as the answer modules read them, and every
+# log is given to each detector in turn. A detector keeps the states of one
+# answer module and formats its report, which is the same as the output of
+# the module.
+
+
+class InterfaceDetector:
+    # states of the interfaces, indexed by interface id
+    def __init__(self, table: AddressTable):
+        self.table = table
+        self.states = []
+        self.order = []
+
+    def new_state(self):
+        raise NotImplementedError
+
+    # returns the state after log
+    def step(self, log: MonitorLog, state):
+        raise NotImplementedError
+
+    def update(self, log: MonitorLog):
+        iface = log.iface
+        if iface >= len(self.states):
+            self.states.extend([None] * (len(self.table) - len(self.states)))
+
+        state = self.states[iface]
+        if state is None:
+            state = self.new_state()
+            self.order.append(iface)
+        self.states[iface] = self.step(log, state)
+
+    def results(self) -> dict:
+        return {self.table.interfaces[iface]: self.states[iface] for iface in self.order}
+
+    # (kind, states) of the report, as report.write_report takes them
+    def sections(self) -> list[tuple[str, dict]]:
+        return [('interface', self.results())]
+
+
+# periods where an interface times out (ans1)
+class FailureDetector(InterfaceDetector):
+    def new_state(self):
+        return ans1.InterfaceState(ans1.Status.IDLE, [], None)
+
+    def step(self, log, state):
+        return ans1.transitState(log, state)
+
+    def format(self) -> str:
+        return '\n'.join(ans1.format_states(self.results()))
+
+
+# periods of N consecutive timeouts (ans2)
+class ConsecutiveDetector(InterfaceDetector):
+    def __init__(self, table: AddressTable, threshould: int):
+        super().__init__(table)
+        self.threshould = threshould
+
+    def new_state(self):
+        return ans2.InterfaceState(ans2.Status.IDLE, ans2.FailState([], None, None, 0))
+
+    def step(self, log, state):
+        ans2.update_state(log, state, self.threshould)
+        return state
+
+    def format(self) -> str:
+        return '\n'.join(ans2.format_states(self.results()))
+
+
+# periods of failure and overload of the last m response times (ans3)
+class OverloadDetector(InterfaceDetector):
+    def __init__(self, table: AddressTable, threshould: int, overload_count: int, overload_threshould: float):
+        super().__init__(table)
+        self.threshould = threshould
+        self.overload_count = overload_count
+        self.overload_threshould = overload_threshould
+
+    def new_state(self):
+        return ans3.InterfaceState(ans3.Status.IDLE,
+                                   ans3.FailState([], None, None, 0),
+                                   ans3.OverloadState([], None, ans3.RingBuffer(self.overload_count)))
+
+    def step(self, log, state):
+        ans3.update_state(log, state, self.threshould, self.overload_count, self.overload_threshould)
+        return state
+
+    def format(self) -> str:
+        return '\n'.join(ans3.format_states(self.results()))
+
+
+# periods of failure of interfaces and their subnets (ans4). ifaces are the
+# interfaces known before the analysis.
+class SubnetDetector:
+    def __init__(self, table: AddressTable, threshould: int, overload_count: int, overload_threshould: float,
+                 ifaces: Iterable[int] = ()):
+        self.table = table
+        self.threshould = threshould
+        self.overload_count = overload_count
+        self.overload_threshould = overload_threshould
+        self.states = []
+        self.states_net = []
+        self.order = []
+        for iface in ifaces:
+            if ans4.register_interface(iface, table, self.states, self.states_net, overload_count):
+                self.order.append(iface)
+
+    def update(self, log: MonitorLog):
+        iface = log.iface
+        if iface >= len(self.states) or self.states[iface] is None:
+            ans4.register_interface(iface, self.table, self.states, self.states_net, self.overload_count)
+            self.order.append(iface)
+
+        state = self.states[iface]
+        state_net = self.states_net[self.table.subnet_ids[iface]]
+
+        status = state.status
+        ans4.update_state(log, state, self.threshould, self.overload_count, self.overload_threshould)
+        state_net.change_status(status, state.status)
+        ans4.update_state_net(log.date, state_net)
+
+    def results(self) -> tuple[dict, dict]:
+        table = self.table
+        order_net = dict.fromkeys(table.subnet_ids[iface] for iface in self.order)
+        states = {table.interfaces[iface]: self.states[iface] for iface in self.order}
+        states_net = {table.networks[subnet]: self.states_net[subnet] for subnet in order_net}
+        return states, states_net
+
+    def sections(self) -> list[tuple[str, dict]]:
+        return list(zip(['interface', 'network'], self.results()))
+
+    def format(self) -> str:
+        states, states_net = self.results()
+        return ans4.format_output(ans4.format_states(states), ans4.format_states_net(states_net))
+
+
+REPORTS = ['ans1', 'ans2', 'ans3', 'ans4']
+
+
+def check_params(names: list[str],
+                 threshould: Optional[int],
+                 overload_count: Optional[int],
+                 overload_threshould: Optional[float]):
+    for name in names:
+        if name not in REPORTS:
+            raise ValueError(f'unknown report: {name}')
+        if name != 'ans1' and threshould is None:
+            raise ValueError(f'{name} needs N')
+        if name in ('ans3', 'ans4') and (overload_count is None or overload_threshould is None):
+            raise ValueError(f'{name} needs m and t')
+
+
+def detector_of(name: str,
+                table: AddressTable,
+                threshould: Optional[int],
+                overload_count: Optional[int],
+                overload_threshould: Optional[float],
+                ifaces: list[int]):
+    match name:
+        case 'ans1':
+            return FailureDetector(table)
+        case 'ans2':
+            return ConsecutiveDetector(table, threshould)
+        case 'ans3':
+            return OverloadDetector(table, threshould, overload_count, overload_threshould)
+        case 'ans4':
+            return SubnetDetector(table, threshould, overload_count, overload_threshould, ifaces)
+    raise ValueError(f'unknown report: {name}')
+
+
+def analyse(logs: Iterable[MonitorLog], detectors: list):
+    updates = [detector.update for detector in detectors]
+    for log in logs:
+        for update in updates:
+            update(log)
+
+
+# the detectors of names after the logs of src, which is a path or the paths
+# of the logs of several monitoring servers
+def detect(src: Union[str, Iterable[str]],
+           names: list[str],
+           threshould: Optional[int] = None,
+           overload_count: Optional[int] = None,
+           overload_threshould: Optional[float] = None,
+           window: Optional[int] = None,
+           memory: Optional[int] = None) -> list:
+    check_params(names, threshould, overload_count, overload_threshould)
+    table = AddressTable()
+    if 'ans4' in names:
+        # ans4 knows every interface in order of the file before the analysis
+        logs, ifaces = ans4.prepare_logs(src, table, window, memory)
+    else:
+        records = extsort.records_in_order(extsort.paths_of(src), table, window, memory)
+        logs, ifaces = parse_records(records, table, MonitorLog), []
+
+    detectors = [detector_of(name, table, threshould, overload_count, overload_threshould, ifaces)
+                 for name in names]
+    with instrument.phase('update'):
+        analyse(logs, detectors)
+    return detectors
+
+
+# (kind, states) of the report of each name, in order of names
+def solve(src: Union[str, Iterable[str]],
+          names: list[str],
+          threshould: Optional[int] = None,
+          overload_count: Optional[int] = None,
+          overload_threshould: Optional[float] = None,
+          window: Optional[int] = None,
+          memory: Optional[int] = None) -> list[list[tuple[str, dict]]]:
+    detectors = detect(src, names, threshould, overload_count, overload_threshould, window, memory)
+    return [detector.sections() for detector in detectors]
+
+
+def solve_as_text(src: Union[str, Iterable[str]],
+                  names: list[str],
+                  threshould: Optional[int] = None,
+                  overload_count: Optional[int] = None,
+                  overload_threshould: Optional[float] = None,
+                  window: Optional[int] = None,
+                  memory: Optional[int] = None) -> str:
+    detectors = detect(src, names, threshould, overload_count, overload_threshould, window, memory)
+    with instrument.phase('format'):
+        reports = [detector.format() for detector in detectors]
+    if len(reports) == 1:
+        return reports[0]
+    return '\n\n'.join(f'# {name}\n{report}' for name, report in zip(names, reports))
+
+
+# writes the results of solve as solve_as_text formats them. reports other
+# than text are written for a single name only.
+def write_reports(out: TextIO, names: list[str], results: list[list[tuple[str, dict]]], fmt: str = 'text'):
+    for i, (name, sections) in enumerate(zip(names, results)):
+        if len(names) > 1:
+            out.write(('\n' if i > 0 else '') + f'# {name}\n')
+        report.write_report(out, sections, fmt)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='make reports of ans1 to ans4 in one pass')
+    parser.add_argument('src', nargs='+', help='input log files, merged by date')
+    parser.add_argument('--reports', nargs='+', choices=REPORTS, default=REPORTS, help='reports to make')
+    parser.add_argument('--N', type=int, help='threshould for timeout')
+    parser.add_argument('--M', type=int, help='number of time to response')
+    parser.add_argument('--t', type=float, help='threshould for overload')
+    cli.add_arguments(parser, parallel=False)
+    args = parser.parse_args()
+    cli.check_arguments(parser, args)
+
+    try:
+        check_params(args.reports, args.N, args.M, args.t)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.format != 'text' and len(args.reports) > 1:
+        parser.error('--format cannot be used with several reports')
+
+    cli.run(sys.modules[__name__], 'multi', args, [args.reports, args.N, args.M, args.t],
+            write=lambda out, results, fmt: write_reports(out, args.reports, results, fmt),
+            profiled=(ans1, ans2, ans3, ans4))
@@ -0,0 +1,202 @@
+from concurrent.futures import ProcessPoolExecutor
+from ipaddress import IPv4Interface
+from types import ModuleType
+from typing import Iterable, Optional
+from answer.address import AddressTable
+from answer.stream import read_records, read_text_records
+from answer import ans1, ans2, ans3, ans4, columnar, compressed
+import os
+import struct
+import tempfile
+
+
+# Interfaces of different subnets never affect each other, so that the logs are
+# partitioned by subnet and each shard is analysed in its own process. The
+# file is split into byte ranges of whole lines, and each range is parsed from
+# the mapped file by one process, which writes the records of each shard to a
+# file of its own. Then each process analyses one shard, reading its files of
+# all the ranges in order of the file. No process reads the whole log.
+
+MODULES = {
+    'ans1': ans1,
+    'ans2': ans2,
+    'ans3': ans3,
+    'ans4': ans4,
+}
+
+# date, interface id, time or TIMEOUT, and position in the file of a record
+RECORD = struct.Struct('<qiqq')
+TIMEOUT = columnar.TIMEOUT
+
+# bytes of records of a shard written at once
+WRITE_BYTES = 1024 * 1024
+
+
+def shard_of(addr_str: str, workers: int) -> int:
+    network = IPv4Interface(addr_str).network
+    # hash of ints does not depend on the process, unlike hash of str
+    return hash((int(network.network_address), network.prefixlen)) % workers
+
+
+# n ranges (start, end) of about the same size, each starting at a line
+def line_ranges(path: str, n: int) -> list[tuple[int, int]]:
+    size = os.path.getsize(path)
+    starts = [0]
+    with open(path, 'rb') as f:
+        for k in range(1, n):
+            pos = max(size * k // n, starts[-1])
+            if pos > 0:
+                # to the start of the line after the byte before pos
+                f.seek(pos - 1)
+                f.readline()
+                pos = f.tell()
+            starts.append(min(pos, size))
+    return list(zip(starts, starts[1:] + [size]))
+
+
+def shard_path(tmp: str, part: int, shard: int) -> str:
+    return os.path.join(tmp, f'part-{part}-shard-{shard}')
+
+
+# parses the lines of src between start and end, or all the logs if end is
+# None, and writes the records of each shard to shard_path(tmp, part, shard).
+# returns the addresses of the interface ids of the records.
+def partition(src: str, start: int, end: Optional[int], part: int, workers: int, tmp: str) -> list[str]:
+    table = AddressTable()
+    if end is None:
+        records = read_records(src, table)
+    else:
+        records = read_text_records(src, table, start, end)
+
+    shards: list[int] = []
+    buffers = [bytearray() for _ in range(workers)]
+    files = [open(shard_path(tmp, part, shard), 'wb') for shard in range(workers)]
+    try:
+        # each line has a byte at least, so that start + its number in the
+        # range is before the next range, and orders records as the file does
+        for position, (date, iface, time) in enumerate(records, start):
+            while iface >= len(shards):
+                shards.append(shard_of(str(table.interfaces[len(shards)]), workers))
+
+            shard = shards[iface]
+            buffer = buffers[shard]
+            buffer += RECORD.pack(date, iface, TIMEOUT if time is None else time, position)
+            if len(buffer) >= WRITE_BYTES:
+                files[shard].write(buffer)
+                buffer.clear()
+
+        for f, buffer in zip(files, buffers):
+            f.write(buffer)
+    finally:
+        for f in files:
+            f.close()
+
+    return [str(addr) for addr in table.interfaces]
+
+
+# (position, log) of the logs of the shard in order of the file. addrs are
+# those returned by partition for each part.
+def read_shard(module: ModuleType, tmp: str, shard: int, addrs: list[list[str]], table: AddressTable) -> list[tuple[int, object]]:
+    numbered = []
+    for part, part_addrs in enumerate(addrs):
+        # interfaces of the other shards are never interned
+        ids = [-1] * len(part_addrs)
+        with open(shard_path(tmp, part, shard), 'rb') as f:
+            data = f.read()
+        for date, local, time, position in RECORD.iter_unpack(data):
+            iface = ids[local]
+            if iface < 0:
+                iface = ids[local] = table.intern(part_addrs[local])
+            log = module.MonitorLog(date, table.interfaces[iface], None if time == TIMEOUT else time, iface)
+            numbered.append((position, log))
+    return numbered
+
+
+# returns the report of each interface with a key to order the reports, which
+# is the position of its first log in logs sorted by date.
+def analyse_interfaces(name: str, numbered: list[tuple[int, object]], table: AddressTable, params: tuple) -> list[tuple[tuple[int, int], str]]:
+    module = MODULES[name]
+    numbered.sort(key=lambda x: x[1].date)
+
+    first = dict()
+    for position, log in numbered:
+        if log.iface not in first:
+            first[log.iface] = (log.date, position)
+
+    logs = [log for _, log in numbered]
+    if name == 'ans1':
+        states = ans1.failure_states_stream(logs, table)
+    elif name == 'ans2':
+        states = ans2.failure_states_stream(logs, *params, table)
+    else:
+        states = ans3.interface_states_stream(logs, *params, table)
+
+    keys = [first[table.interface_ids[addr]] for addr in states]
+    return list(zip(keys, module.format_states(states)))
+
+
+# same as analyse_interfaces for answer.ans4, where interfaces and networks are
+# ordered by their first log in the file.
+def analyse_networks(name: str, numbered: list[tuple[int, object]], table: AddressTable, params: tuple) -> tuple[list[tuple[int, str]], list[tuple[int, str]]]:
+    first = dict()
+    first_net = dict()
+    for position, log in numbered:
+        if log.iface not in first:
+            first[log.iface] = position
+            first_net.setdefault(table.subnet_ids[log.iface], position)
+
+    states, states_net = ans4.interface_states([log for _, log in numbered], *params, table)
+
+    keys = [first[table.interface_ids[addr]] for addr in states]
+    keys_net = [first_net[table.network_ids[network]] for network in states_net]
+    return list(zip(keys, ans4.format_states(states))), \
+        list(zip(keys_net, ans4.format_states_net(states_net)))
+
+
+def analyse(name: str, numbered: list[tuple[int, object]], table: AddressTable, params: tuple):
+    if name == 'ans4':
+        return analyse_networks(name, numbered, table, params)
+    return analyse_interfaces(name, numbered, table, params)
+
+
+def analyse_shard(name: str, tmp: str, shard: int, addrs: list[list[str]], params: tuple):
+    table = AddressTable()
+    numbered = read_shard(MODULES[name], tmp, shard, addrs, table)
+    return analyse(name, numbered, table, params)
+
+
+def merge_results(name: str, results: Iterable) -> str:
+    if name != 'ans4':
+        reports = sorted(report for result in results for report in result)
+        return '\n'.join(text for _, text in reports)
+
+    results = list(results)
+    reports = sorted(report for result, _ in results for report in result)
+    reports_net = sorted(report for _, result in results for report in result)
+    return ans4.format_output([text for _, text in reports], [text for _, text in reports_net])
+
+
+def solve_as_text(name: str, src: str, workers: int, *params) -> str:
+    if name not in MODULES:
+        raise ValueError(f'unknown module: {name}')
+    if columnar.is_columnar(src):
+        raise ValueError('columnar logs cannot be analysed in parallel')
+
+    src = str(src)
+    if workers == 1:
+        # nothing to partition
+        return MODULES[name].solve_as_text(src, *params)
+
+    # a compressed log cannot be split, and is parsed by one process
+    if compressed.is_compressed(src):
+        ranges = [(0, None)]
+    else:
+        ranges = line_ranges(src, workers)
+
+    with tempfile.TemporaryDirectory(prefix='parallel-') as tmp, ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(partition, src, start, end, part, workers, tmp)
+                   for part, (start, end) in enumerate(ranges)]
+        addrs = [future.result() for future in futures]
+
+        futures = [pool.submit(analyse_shard, name, tmp, shard, addrs, params) for shard in range(workers)]
+        return merge_results(name, [future.result() for future in futures])
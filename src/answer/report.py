@@ -0,0 +1,134 @@
+from typing import Optional, TextIO
+import csv
+import json
+
+
+# Writes the reports of the answer modules as they are made, instead of
+# joining them into one string first. Besides the text of the modules, the
+# reports can be written as JSON lines, one line per interface or network, or
+# as CSV, one row per period. Dates are epoch seconds in both.
+
+# text written at once, at least
+BUFFER_SIZE = 64 * 1024
+
+FORMATS = ['text', 'jsonl', 'csv']
+
+# (status, start, end) of a period, whose end is None while it lasts
+Period = tuple[str, int, Optional[int]]
+
+
+# periods of a state of any module, in the order of its text report
+def periods_of(state) -> list[Period]:
+    if hasattr(state, 'overload_state'):
+        # ans3 and ans4
+        fail, overload = state.fail_state, state.overload_state
+        periods = [('FAILURE', start, end) for start, end in fail.periods] + \
+            [('OVERLOAD', start, end) for start, end in overload.periods]
+        periods.sort(key=lambda period: period[1:])
+        if fail.fail_start is not None:
+            periods.append(('FAILURE', fail.fail_start, None))
+        if overload.overload_start is not None:
+            periods.append(('OVERLOAD', overload.overload_start, None))
+        return periods
+
+    # ans2, or ans1 and networks of ans4
+    fail = state.fail_state if hasattr(state, 'fail_state') else state
+    periods = [('FAILURE', start, end) for start, end in fail.periods]
+    if fail.fail_start is not None:
+        periods.append(('FAILURE', fail.fail_start, None))
+    return periods
+
+
+class ReportWriter:
+    def __init__(self, out: TextIO, buffer_size: int = BUFFER_SIZE):
+        self.out = out
+        self.buffer_size = buffer_size
+        self.buffer: list[str] = []
+        self.size = 0
+
+    def write(self, text: str):
+        self.buffer.append(text)
+        self.size += len(text)
+        if self.size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        self.out.write(''.join(self.buffer))
+        self.buffer = []
+        self.size = 0
+
+    # kind is 'interface' or 'network'. headed if there are several sections.
+    def section(self, kind: str, headed: bool):
+        pass
+
+    def entry(self, kind: str, addr, state):
+        raise NotImplementedError
+
+    def close(self):
+        self.flush()
+        self.out.flush()
+
+
+# the same text as the modules print
+class TextWriter(ReportWriter):
+    def __init__(self, out: TextIO, buffer_size: int = BUFFER_SIZE):
+        super().__init__(out, buffer_size)
+        self.sections = 0
+        self.entries = 0
+
+    def section(self, kind: str, headed: bool):
+        if self.sections > 0:
+            self.write('\n\n')
+        if headed:
+            self.write(f'[{kind.capitalize()}]\n')
+        self.sections += 1
+        self.entries = 0
+
+    def entry(self, kind: str, addr, state):
+        if self.entries > 0:
+            self.write('\n')
+        state_format = '\n  '.join(state.format())
+        self.write(f'{addr}:\n  {state_format}')
+        self.entries += 1
+
+    def close(self):
+        self.write('\n')
+        super().close()
+
+
+class JsonlWriter(ReportWriter):
+    def entry(self, kind: str, addr, state):
+        periods = [{'status': status, 'start': start, 'end': end} for status, start, end in periods_of(state)]
+        self.write(json.dumps({'kind': kind, 'address': str(addr), 'periods': periods}) + '\n')
+
+
+# interfaces and networks without any period have no rows
+class CsvWriter(ReportWriter):
+    def __init__(self, out: TextIO, buffer_size: int = BUFFER_SIZE):
+        super().__init__(out, buffer_size)
+        self.rows = csv.writer(self, lineterminator='\n')
+        self.rows.writerow(['kind', 'address', 'status', 'start', 'end'])
+
+    def entry(self, kind: str, addr, state):
+        for status, start, end in periods_of(state):
+            self.rows.writerow([kind, addr, status, start, '' if end is None else end])
+
+
+WRITERS = {
+    'text': TextWriter,
+    'jsonl': JsonlWriter,
+    'csv': CsvWriter,
+}
+
+
+# sections are (kind, states) in order, where states map addresses to states
+def write_report(out: TextIO, sections: list[tuple[str, dict]], fmt: str = 'text', buffer_size: int = BUFFER_SIZE):
+    if fmt not in WRITERS:
+        raise ValueError(f'unknown format: {fmt}')
+
+    writer = WRITERS[fmt](out, buffer_size)
+    for kind, states in sections:
+        writer.section(kind, len(sections) > 1)
+        for addr, state in states.items():
+            writer.entry(kind, addr, state)
+    writer.close()
@@ -0,0 +1,240 @@
+from dataclasses import dataclass, field
+from ipaddress import IPv4Interface, IPv4Network
+from typing import Iterable, Optional, Union
+from answer.address import AddressTable
+from answer.ans4 import MonitorLog, InterfaceState, NetworkState
+from answer import ans4, cli, instrument
+import argparse
+
+
+# Failure periods of groups of subnets, in addition to those of the subnets
+# of ans4: every supernet of the given prefix lengths (levels), such as all of
+# 10.20.0.0/16 and of 10.0.0.0/8, and sites named by the user, each made of
+# any prefixes. A group fails while all of its interfaces fail, as a subnet of
+# ans4 does.
+#
+# The groups hang at the nodes of their prefixes in a binary trie over the
+# bits of network addresses. The groups of an interface are found once: the
+# supernets on the path from the root to its subnet, and the sites on the
+# path to its address, so that a site prefix longer than the subnet holds the
+# interfaces of the subnet inside it. Each group keeps the count of its
+# failing interfaces, so that a change of status updates only the groups of
+# the interface.
+
+
+# a group is known by its identity, not by its name
+@dataclass(eq=False)
+class Group:
+    name: str
+    state: NetworkState = field(default_factory=lambda: NetworkState([], None, dict()))
+
+
+class TrieNode:
+    __slots__ = ('children', 'groups')
+
+    def __init__(self):
+        self.children: list[Optional[TrieNode]] = [None, None]
+        self.groups: list[Group] = []
+
+
+class PrefixTrie:
+    def __init__(self):
+        self.root = TrieNode()
+
+    # the nodes from the root to network, or up to the last existing one
+    def path(self, network: IPv4Network, create: bool = False) -> list[TrieNode]:
+        node = self.root
+        nodes = [node]
+        address = int(network.network_address)
+        for i in range(network.prefixlen):
+            bit = (address >> (network.max_prefixlen - 1 - i)) & 1
+            child = node.children[bit]
+            if child is None:
+                if not create:
+                    break
+                child = node.children[bit] = TrieNode()
+            node = child
+            nodes.append(node)
+        return nodes
+
+    def insert(self, network: IPv4Network, group: Group):
+        self.path(network, True)[-1].groups.append(group)
+
+    # groups of network and of every prefix containing it, from the shortest
+    # prefix
+    def ancestors(self, network: IPv4Network) -> list[Group]:
+        return list(dict.fromkeys(group for node in self.path(network) for group in node.groups))
+
+
+class Rollups:
+    def __init__(self, levels: Iterable[int] = (), sites: Optional[dict[str, list[IPv4Network]]] = None):
+        self.levels = list(levels)
+        self.trie = PrefixTrie()
+        self.site_trie = PrefixTrie()
+        # groups of levels, made when a subnet in them is registered
+        self.supernets: dict[IPv4Network, Group] = dict()
+        self.sites: list[Group] = []
+        # supernets containing each subnet, indexed by subnet id
+        self.subnet_groups: list[Optional[list[Group]]] = []
+        # groups containing each interface, indexed by interface id
+        self.iface_groups: list[Optional[list[Group]]] = []
+
+        for name, prefixes in (sites or dict()).items():
+            group = Group(name)
+            self.sites.append(group)
+            for prefix in prefixes:
+                self.site_trie.insert(prefix, group)
+
+    def groups(self, iface: int, table: AddressTable) -> list[Group]:
+        if iface >= len(self.iface_groups):
+            self.iface_groups.extend([None] * (len(table) - len(self.iface_groups)))
+
+        groups = self.iface_groups[iface]
+        if groups is None:
+            address = IPv4Network(table.interfaces[iface].ip)
+            groups = self.iface_groups[iface] = \
+                self.supernet_groups(table.subnet_ids[iface], table) + self.site_trie.ancestors(address)
+        return groups
+
+    def supernet_groups(self, subnet: int, table: AddressTable) -> list[Group]:
+        if subnet >= len(self.subnet_groups):
+            self.subnet_groups.extend([None] * (len(table.networks) - len(self.subnet_groups)))
+
+        groups = self.subnet_groups[subnet]
+        if groups is None:
+            network = table.networks[subnet]
+            for level in self.levels:
+                if level > network.prefixlen:
+                    continue
+                supernet = network.supernet(new_prefix=level)
+                if supernet not in self.supernets:
+                    self.supernets[supernet] = Group(str(supernet))
+                    self.trie.insert(supernet, self.supernets[supernet])
+            groups = self.subnet_groups[subnet] = self.trie.ancestors(network)
+        return groups
+
+    def register(self, iface: int, table: AddressTable, state: InterfaceState):
+        for group in self.groups(iface, table):
+            group.state.add(table.interfaces[iface], state)
+
+    # supernets from the top of the hierarchy, each followed by those in it
+    def format_supernets(self) -> list[str]:
+        format_list = []
+        for supernet in sorted(self.supernets, key=lambda network: (network.network_address, network.prefixlen)):
+            state_format = '\n  '.join(self.supernets[supernet].state.format())
+            format_list.append(f'{supernet}:\n  {state_format}')
+        return format_list
+
+    def format_sites(self) -> list[str]:
+        format_list = []
+        for group in self.sites:
+            state_format = '\n  '.join(group.state.format())
+            format_list.append(f'{group.name}:\n  {state_format}')
+        return format_list
+
+
+# interface_states_stream of ans4, which updates the groups of rollups as
+# well as the subnets
+def rollup_states_stream(logs: Iterable[MonitorLog],
+                         fail_threshould: int,
+                         overload_count: int,
+                         overload_threshould: float,
+                         table: AddressTable,
+                         rollups: Rollups,
+                         ifaces: Iterable[int] = ()) -> tuple[dict[IPv4Interface, InterfaceState], dict[IPv4Network, NetworkState]]:
+    states: list[Optional[InterfaceState]] = []
+    states_net: list[Optional[NetworkState]] = []
+    order = []
+
+    for iface in ifaces:
+        if ans4.register_interface(iface, table, states, states_net, overload_count):
+            rollups.register(iface, table, states[iface])
+            order.append(iface)
+
+    for log in logs:
+        iface = table.lookup(log.addr, log.iface)
+        if iface >= len(states) or states[iface] is None:
+            ans4.register_interface(iface, table, states, states_net, overload_count)
+            rollups.register(iface, table, states[iface])
+            order.append(iface)
+
+        state = states[iface]
+        subnet = table.subnet_ids[iface]
+        state_net = states_net[subnet]
+
+        status = state.status
+        ans4.update_state(log, state, fail_threshould, overload_count, overload_threshould)
+        state_net.change_status(status, state.status)
+        ans4.update_state_net(log.date, state_net)
+        for group in rollups.groups(iface, table):
+            group.state.change_status(status, state.status)
+            ans4.update_state_net(log.date, group.state)
+
+    order_net = dict.fromkeys(table.subnet_ids[iface] for iface in order)
+    return {table.interfaces[iface]: states[iface] for iface in order}, \
+        {table.networks[subnet]: states_net[subnet] for subnet in order_net}
+
+
+# each line is a name of a site and its prefixes, separated by spaces
+def read_sites(path: str) -> dict[str, list[IPv4Network]]:
+    sites = dict()
+    with open(path, 'r') as f:
+        for line in f:
+            fields = line.split('#')[0].split()
+            if fields == []:
+                continue
+            if len(fields) < 2:
+                raise ValueError(f'site without prefixes: {line.strip()!r}')
+            sites.setdefault(fields[0], []).extend(IPv4Network(prefix) for prefix in fields[1:])
+    return sites
+
+
+def format_output(states_format: list[str], states_net_format: list[str], rollups: Rollups) -> str:
+    sections = [ans4.format_output(states_format, states_net_format)]
+    if rollups.levels != []:
+        sections.append('\n'.join(['[Supernet]'] + rollups.format_supernets()))
+    if rollups.sites != []:
+        sections.append('\n'.join(['[Site]'] + rollups.format_sites()))
+    return '\n\n'.join(sections)
+
+
+def solve_as_text(src: Union[str, Iterable[str]],
+                  threshould: int,
+                  overload_count: int,
+                  overload_threshould: float,
+                  levels: Iterable[int] = (),
+                  sites: Optional[dict[str, list[IPv4Network]]] = None,
+                  window: Optional[int] = None,
+                  memory: Optional[int] = None) -> str:
+    table = AddressTable()
+    logs, ifaces = ans4.prepare_logs(src, table, window, memory)
+    rollups = Rollups(levels, sites)
+
+    with instrument.phase('update'):
+        states, states_net = rollup_states_stream(logs, threshould, overload_count, overload_threshould,
+                                                  table, rollups, ifaces)
+
+    with instrument.phase('format'):
+        return format_output(ans4.format_states(states), ans4.format_states_net(states_net), rollups)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='analyse logs as ans4, with failures of supernets and sites')
+    parser.add_argument('src', nargs='+', help='input log files, merged by date')
+    parser.add_argument('N', type=int, help='threshould for timeout')
+    parser.add_argument('M', type=int, help='number of time to response')
+    parser.add_argument('t', type=float, help='threshould for overload')
+    parser.add_argument('--levels', type=int, nargs='+', default=[], help='prefix lengths of supernets to report')
+    parser.add_argument('--sites', help='file of sites, each line a name and its prefixes')
+    parser.add_argument('--window', type=int, help='reorder window in seconds (streaming mode)')
+    parser.add_argument('--memory', type=int, help='memory budget in MB for sorting logs larger than memory')
+    args = parser.parse_args()
+
+    if any(level < 0 or level > 32 for level in args.levels):
+        parser.error('levels must be between 0 and 32')
+    cli.check_arguments(parser, args)
+
+    sites = read_sites(args.sites) if args.sites is not None else None
+    with instrument.counting() as counts:
+        print(solve_as_text(args.src, int(args.N), int(args.M), float(args.t), args.levels, sites, args.window, cli.memory_of(args)))
+    cli.write_late(counts, args.window)
@@ -0,0 +1,290 @@
+from ipaddress import IPv4Interface, IPv4Network
+from typing import Optional
+from answer.address import AddressTable
+from answer.ans4 import MonitorLog, Status, InterfaceState, NetworkState
+from answer.epoch import format_date
+from answer.stream import LineParser, ReorderBuffer, read_interfaces
+from answer import ans4
+from operator import itemgetter
+import argparse
+import asyncio
+import json
+import sys
+
+
+# A long-running service which keeps the states of ans4 in memory. Monitor
+# agents send log lines over a TCP or Unix socket, and the states can be asked
+# over the same socket by a line of a query:
+#
+#   STATUS 192.168.1.2/24       status of an interface
+#   FAILURES 192.168.1.0/24     interfaces in FAILURE in a subnet
+#   STATS                       numbers of lines, interfaces and networks
+#
+# Each query is answered by a line of JSON. Log lines are not answered.
+# All the lines received at once are analysed without returning to the event
+# loop, so that a query sees the state between two reads.
+#
+# Agents send their lines independently, so that an agent slightly behind the
+# others sends dates older than those already analysed. Given a window, lines
+# are held in a ReorderBuffer until the window passes them, and analysed in
+# order of date; lines later than the window are dropped and counted. Without
+# a window, lines are analysed as they come, and those older than a line
+# already analysed are counted. When the service stops, the lines held are
+# analysed and the report of ans4 is printed.
+#
+# A network fails when all of its interfaces fail. The interfaces of the logs
+# given to know() belong to their networks from the start, as in ans4. Any
+# other interface joins its network when its first line is analysed, so that
+# a FAILURE of its network before that is provisional.
+
+READ_BYTES = 64 * 1024
+
+
+class Monitor:
+    def __init__(self, fail_threshould: int, overload_count: int, overload_threshould: float,
+                 window: Optional[int] = None):
+        self.fail_threshould = fail_threshould
+        self.overload_count = overload_count
+        self.overload_threshould = overload_threshould
+        self.table = AddressTable()
+        self.parse = LineParser(self.table)
+        self.states: list[Optional[InterfaceState]] = []
+        self.states_net: list[Optional[NetworkState]] = []
+        # interface ids in order of registration
+        self.order: list[int] = []
+        self.window = window
+        # (date, interface id, time) of the lines received but not analysed,
+        # or None without a window
+        self.pending = None if window is None else ReorderBuffer(window, key=itemgetter(0))
+        # the latest date analysed, and the lines analysed after it without a
+        # window
+        self.latest: Optional[int] = None
+        self.out_of_order = 0
+        self.lines = 0
+        self.errors = 0
+
+    # the interfaces of the log at path belong to their networks from now on
+    def know(self, path: str):
+        for iface in read_interfaces(path, self.table):
+            self.register(iface)
+
+    def register(self, iface: int):
+        if ans4.register_interface(iface, self.table, self.states, self.states_net, self.overload_count):
+            self.order.append(iface)
+
+    def feed(self, line: bytes):
+        try:
+            record = self.parse(line)
+        except ValueError:
+            self.errors += 1
+            return
+
+        if self.pending is None:
+            date = record[0]
+            if self.latest is not None and date < self.latest:
+                self.out_of_order += 1
+            else:
+                self.latest = date
+            self.analyse(*record)
+            return
+
+        for date, iface, time in self.pending.push(record):
+            self.analyse(date, iface, time)
+
+    # analyses the lines held in the window, when no more lines come
+    def flush(self):
+        if self.pending is None:
+            return
+        for date, iface, time in self.pending.flush():
+            self.analyse(date, iface, time)
+
+    # lines dropped as later than the window, or analysed out of order
+    def late(self) -> int:
+        return self.out_of_order if self.pending is None else self.pending.late
+
+    def analyse(self, date: int, iface: int, time: Optional[int]):
+        table = self.table
+        if iface >= len(self.states) or self.states[iface] is None:
+            self.register(iface)
+
+        state = self.states[iface]
+        state_net = self.states_net[table.subnet_ids[iface]]
+
+        status = state.status
+        ans4.update_state(MonitorLog(date, table.interfaces[iface], time, iface),
+                          state, self.fail_threshould, self.overload_count, self.overload_threshould)
+        state_net.change_status(status, state.status)
+        ans4.update_state_net(date, state_net)
+        self.lines += 1
+
+    def interface_state(self, addr: IPv4Interface) -> Optional[InterfaceState]:
+        iface = self.table.interface_ids.get(addr)
+        if iface is None or iface >= len(self.states):
+            return None
+        return self.states[iface]
+
+    def network_state(self, network: IPv4Network) -> Optional[NetworkState]:
+        subnet = self.table.network_ids.get(network)
+        if subnet is None or subnet >= len(self.states_net):
+            return None
+        return self.states_net[subnet]
+
+    def status(self, addr_str: str) -> dict:
+        addr = IPv4Interface(addr_str)
+        state = self.interface_state(addr)
+        if state is None:
+            return {'error': f'unknown interface: {addr}'}
+
+        since = None
+        if state.status == Status.FAILURE:
+            since = state.fail_state.fail_start
+        elif state.status == Status.OVERLOAD:
+            since = state.overload_state.overload_start
+        return {
+            'interface': str(addr),
+            'status': state.status.name,
+            'since': None if since is None else format_date(since),
+        }
+
+    def failures(self, network_str: str) -> dict:
+        network = IPv4Network(network_str)
+        state_net = self.network_state(network)
+        if state_net is None:
+            return {'error': f'unknown network: {network}'}
+
+        failing = [{'interface': str(addr), 'since': format_date(state.fail_state.fail_start)}
+                   for addr, state in state_net.states.items()
+                   if state.status == Status.FAILURE and state.fail_state.fail_start is not None]
+        return {
+            'network': str(network),
+            'interfaces': len(state_net.states),
+            'failing': failing,
+            'since': None if state_net.fail_start is None else format_date(state_net.fail_start),
+        }
+
+    def stats(self) -> dict:
+        return {
+            'lines': self.lines,
+            'errors': self.errors,
+            'pending': 0 if self.pending is None else len(self.pending),
+            'late': self.late(),
+            'interfaces': len(self.table),
+            'networks': len(self.table.networks),
+        }
+
+    # the report of ans4 on the lines analysed so far
+    def report(self) -> str:
+        table = self.table
+        order_net = dict.fromkeys(table.subnet_ids[iface] for iface in self.order)
+        states = {table.interfaces[iface]: self.states[iface] for iface in self.order}
+        states_net = {table.networks[subnet]: self.states_net[subnet] for subnet in order_net}
+        return ans4.format_output(ans4.format_states(states), ans4.format_states_net(states_net))
+
+    def query(self, line: bytes) -> dict:
+        command, _, arg = line.decode(errors='replace').strip().partition(' ')
+        try:
+            match command:
+                case 'STATUS':
+                    return self.status(arg)
+                case 'FAILURES':
+                    return self.failures(arg)
+                case 'STATS':
+                    return self.stats()
+        except ValueError as e:
+            return {'error': str(e)}
+        return {'error': f'unknown query: {command}'}
+
+
+def is_query(line: bytes) -> bool:
+    return line[:1].isalpha()
+
+
+async def handle(monitor: Monitor, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    rest = b''
+    try:
+        while True:
+            data = await reader.read(READ_BYTES)
+            if data == b'':
+                break
+
+            lines = (rest + data).split(b'\n')
+            rest = lines.pop()
+            answers = []
+            for line in lines:
+                if is_query(line):
+                    answers.append(json.dumps(monitor.query(line)))
+                elif line != b'':
+                    monitor.feed(line)
+
+            if answers != []:
+                writer.write(('\n'.join(answers) + '\n').encode())
+                await writer.drain()
+
+        if rest != b'':
+            if is_query(rest):
+                writer.write((json.dumps(monitor.query(rest)) + '\n').encode())
+                await writer.drain()
+            else:
+                monitor.feed(rest)
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def start(monitor: Monitor,
+                host: Optional[str] = None,
+                port: Optional[int] = None,
+                unix: Optional[str] = None) -> asyncio.Server:
+    def on_connect(reader, writer):
+        return handle(monitor, reader, writer)
+
+    if unix is not None:
+        return await asyncio.start_unix_server(on_connect, unix)
+    return await asyncio.start_server(on_connect, host, port)
+
+
+# analyses the lines held in the window, and prints the report of the states
+def stop(monitor: Monitor):
+    monitor.flush()
+    print(monitor.report(), flush=True)
+
+    late = monitor.late()
+    if late > 0 and monitor.window is None:
+        print(f'lines older than a line already analysed: {late}', file=sys.stderr)
+    elif late > 0:
+        print(f'lines later than the window of {monitor.window} dropped: {late}', file=sys.stderr)
+
+
+async def serve(monitor: Monitor, host: Optional[str], port: Optional[int], unix: Optional[str]):
+    server = await start(monitor, host, port, unix)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        stop(monitor)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='receive logs over a socket and answer queries on the states')
+    parser.add_argument('N', type=int, help='threshould for timeout')
+    parser.add_argument('M', type=int, help='number of time to response')
+    parser.add_argument('t', type=float, help='threshould for overload')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--port', type=int, default=8514, help='TCP port to listen on')
+    parser.add_argument('--unix', help='Unix socket to listen on instead of TCP')
+    parser.add_argument('--window', type=int, help='seconds an agent may lag behind the others (lines are analysed as they come by default)')
+    parser.add_argument('--interfaces', nargs='+', default=[], help='logs whose interfaces belong to their networks from the start')
+    args = parser.parse_args()
+
+    monitor = Monitor(args.N, args.M, args.t, args.window)
+    for path in args.interfaces:
+        monitor.know(path)
+    try:
+        asyncio.run(serve(monitor, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,319 @@
+from heapq import heappush, heappop
+from typing import Callable, Generic, Iterable, Iterator, Optional, TypeVar
+from answer.address import AddressTable
+from answer.epoch import parse_date
+from answer import columnar, compressed, instrument
+import mmap
+import os
+import time
+
+
+T = TypeVar('T')
+
+
+def parse_time_bytes(time_bytes: bytes) -> Optional[int]:
+    try:
+        return int(time_bytes)
+    except ValueError:
+        return None
+
+
+# pages of the mapped file already read are released every this many bytes
+RELEASE_BYTES = 16 * 1024 * 1024
+
+
+# Reads (date, interface id, time) of each log, from a text log, a columnar
+# log, or a text log compressed with gzip or bz2.
+def read_records(path: str, table: AddressTable) -> Iterator[tuple[int, int, Optional[int]]]:
+    if columnar.is_columnar(path):
+        return columnar.read_records(path, table)
+    if compressed.is_compressed(path):
+        return read_compressed_records(path, table)
+    return read_text_records(path, table)
+
+
+# logs of (date, interface id, time) records interned in the table, made with
+# the MonitorLog class of an answer module
+def parse_records(records: Iterable[tuple[int, int, Optional[int]]],
+                  table: AddressTable,
+                  monitor_log: Callable[[int, object, Optional[int], int], T]) -> Iterator[T]:
+    for date, iface, response_time in records:
+        yield monitor_log(date, table.interfaces[iface], response_time, iface)
+
+
+# logs of the file, read as read_records does
+def parse_logs_mmap(path: str, table: AddressTable, monitor_log: Callable[[int, object, Optional[int], int], T]) -> Iterator[T]:
+    return parse_records(read_records(path, table), table, monitor_log)
+
+
+# ids of the interfaces of a log in order of their first appearance. columnar
+# logs have them in the header. of a text log only the address field of each
+# line is looked up as bytes, and the rest is left to the analysis.
+def read_interfaces(path: str, table: AddressTable) -> list[int]:
+    if columnar.is_columnar(path):
+        return columnar.interfaces(path, table)
+    if compressed.is_compressed(path):
+        return interfaces_of_lines(compressed.read_lines(path), table)
+    with open(path, 'rb') as f:
+        return interfaces_of_lines(f, table)
+
+
+def interfaces_of_lines(lines: Iterable[bytes], table: AddressTable) -> list[int]:
+    try:
+        addrs = dict.fromkeys(line.split(b',', 2)[1] for line in lines)
+        return [table.intern(addr.decode()) for addr in addrs]
+    except IndexError:
+        instrument.count('parse_failures')
+        raise ValueError('invalid log: a line has no address')
+    except ValueError:
+        instrument.count('parse_failures')
+        raise
+
+
+# Reads (date, interface id, time) of each line straight from the mapped
+# file. Fields are looked up as bytes, so that neither lines nor address and
+# time fields are decoded into str.
+# only the lines between the byte offsets start and end are read.
+def read_text_records(path: str,
+                      table: AddressTable,
+                      start: int = 0,
+                      end: Optional[int] = None) -> Iterator[tuple[int, int, Optional[int]]]:
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, 'madvise'):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+
+            ids: dict[bytes, int] = dict()
+            times: dict[bytes, Optional[int]] = dict()
+            last_date_bytes = None
+            last_date = 0
+
+            pos = start
+            released = start // mmap.PAGESIZE * mmap.PAGESIZE
+            size = len(mm) if end is None else min(end, len(mm))
+            try:
+                while pos < size:
+                    if pos - released >= RELEASE_BYTES and hasattr(mm, 'madvise'):
+                        length = (pos - released) // mmap.PAGESIZE * mmap.PAGESIZE
+                        mm.madvise(mmap.MADV_DONTNEED, released, length)
+                        released += length
+
+                    eol = mm.find(b'\n', pos, size)
+                    if eol < 0:
+                        eol = size
+
+                    comma1 = mm.find(b',', pos, eol)
+                    comma2 = mm.find(b',', comma1 + 1, eol)
+                    if comma1 < 0 or comma2 < 0 or mm.find(b',', comma2 + 1, eol) >= 0:
+                        raise ValueError(f'invalid log: {mm[pos:eol]!r}')
+
+                    # consecutive lines often have the same date
+                    date_bytes = mm[pos:comma1]
+                    if date_bytes != last_date_bytes:
+                        last_date = parse_date(date_bytes)
+                        last_date_bytes = date_bytes
+
+                    addr_bytes = mm[comma1 + 1:comma2]
+                    iface = ids.get(addr_bytes)
+                    if iface is None:
+                        iface = table.intern(addr_bytes.decode())
+                        ids[addr_bytes] = iface
+
+                    time_bytes = mm[comma2 + 1:eol]
+                    if time_bytes in times:
+                        time = times[time_bytes]
+                    else:
+                        time = times[time_bytes] = parse_time_bytes(time_bytes)
+
+                    yield last_date, iface, time
+                    pos = eol + 1
+            except ValueError:
+                # counted where the invalid line is read, whichever phase reads it
+                instrument.count('parse_failures')
+                raise
+
+
+# end of the last complete line, so that a line being written is left out
+def complete_end(path: str) -> int:
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        pos = size
+        while pos > 0:
+            start = max(pos - 4096, 0)
+            f.seek(start)
+            chunk = f.read(pos - start)
+            newline = chunk.rfind(b'\n')
+            if newline >= 0:
+                return start + newline + 1
+            pos = start
+        return 0
+
+
+# Parses a line given as bytes into (date, interface id, time), with the same
+# caches as read_text_records.
+class LineParser:
+    def __init__(self, table: AddressTable):
+        self.table = table
+        self.ids: dict[bytes, int] = dict()
+        self.times: dict[bytes, Optional[int]] = dict()
+        self.last_date_bytes = None
+        self.last_date = 0
+
+    def __call__(self, line: bytes) -> tuple[int, int, Optional[int]]:
+        fields = line.split(b',')
+        if len(fields) != 3:
+            raise ValueError(f'invalid log: {line!r}')
+        [date_bytes, addr_bytes, time_bytes] = fields
+
+        if date_bytes != self.last_date_bytes:
+            self.last_date = parse_date(date_bytes)
+            self.last_date_bytes = date_bytes
+
+        iface = self.ids.get(addr_bytes)
+        if iface is None:
+            iface = self.table.intern(addr_bytes.decode())
+            self.ids[addr_bytes] = iface
+
+        if time_bytes in self.times:
+            time = self.times[time_bytes]
+        else:
+            time = self.times[time_bytes] = parse_time_bytes(time_bytes)
+
+        return self.last_date, iface, time
+
+
+# Reads (date, interface id, time) of each line of a compressed log, which is
+# decompressed in another thread while the lines are parsed.
+def read_compressed_records(path: str, table: AddressTable) -> Iterator[tuple[int, int, Optional[int]]]:
+    parse = LineParser(table)
+    try:
+        for line in compressed.read_lines(path):
+            yield parse(line)
+    except ValueError:
+        instrument.count('parse_failures')
+        raise
+
+
+# seconds between polls of a followed log which has no new lines
+FOLLOW_INTERVAL = 0.1
+
+FOLLOW_CHUNK = 1024 * 1024
+
+
+# Reads (date, interface id, time) of each line of a growing log, like
+# tail -F. The log is read from its beginning, reopened when it is replaced
+# by rotation, and read again from its beginning when it is truncated.
+# Stops when nothing is appended for idle seconds, or never if idle is None.
+def follow_records(path: str,
+                   table: AddressTable,
+                   interval: float = FOLLOW_INTERVAL,
+                   idle: Optional[float] = None) -> Iterator[tuple[int, int, Optional[int]]]:
+    parse = LineParser(table)
+    f = None
+    rest = b''
+    waited = 0.0
+    try:
+        while True:
+            if f is None:
+                try:
+                    f = open(path, 'rb')
+                except FileNotFoundError:
+                    pass
+
+            data = f.read(FOLLOW_CHUNK) if f is not None else b''
+            if data != b'':
+                waited = 0.0
+                lines = (rest + data).split(b'\n')
+                rest = lines.pop()
+                for line in lines:
+                    if line != b'':
+                        yield parse(line)
+                continue
+
+            if f is not None:
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    stat = None
+
+                if stat is None or stat.st_ino != os.fstat(f.fileno()).st_ino:
+                    # the old file has been read to its end
+                    if rest != b'':
+                        yield parse(rest)
+                        rest = b''
+                    f.close()
+                    f = None
+                    if stat is not None:
+                        continue
+                elif stat.st_size < f.tell():
+                    rest = b''
+                    f.seek(0)
+                    continue
+
+            if idle is not None and waited >= idle:
+                return
+            time.sleep(interval)
+            waited += interval
+    finally:
+        if f is not None:
+            f.close()
+
+
+class ReorderBuffer(Generic[T]):
+    # Records are held until the watermark (the latest key seen minus `window`)
+    # passes them, so that records arriving at most `window` late are still
+    # emitted in order. Records later than that are dropped and counted in
+    # late, since emitting them would feed dates out of order.
+    def __init__(self, window, key: Callable[[T], object]):
+        self.window = window
+        self.key = key
+        self.heap = []
+        self.seq = 0
+        self.latest = None
+        self.emitted = None
+        self.late = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, x: T) -> list[T]:
+        k = self.key(x)
+        if self.emitted is not None and k < self.emitted:
+            self.late += 1
+            return []
+
+        heappush(self.heap, (k, self.seq, x))
+        self.seq += 1
+
+        if self.latest is None or self.latest < k:
+            self.latest = k
+
+        return self.pop_until(self.latest - self.window)
+
+    def pop_until(self, watermark) -> list[T]:
+        ready = []
+        while self.heap != [] and self.heap[0][0] <= watermark:
+            k, _, x = heappop(self.heap)
+            self.emitted = k
+            ready.append(x)
+        return ready
+
+    def flush(self) -> list[T]:
+        ready = []
+        while self.heap != []:
+            k, _, x = heappop(self.heap)
+            self.emitted = k
+            ready.append(x)
+        return ready
+
+
+def reorder(xs: Iterable[T], window, key: Callable[[T], object]) -> Iterator[T]:
+    buffer = ReorderBuffer(window, key)
+    for x in xs:
+        yield from buffer.push(x)
+    yield from buffer.flush()
+    # reported by the caller, from instrument.counting()
+    instrument.count('late', buffer.late)
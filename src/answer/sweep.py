@@ -0,0 +1,151 @@
+from dataclasses import dataclass
+from ipaddress import IPv4Interface, IPv4Network
+from itertools import product
+from typing import Iterable, Optional
+from answer.address import AddressTable
+from answer.ans4 import MonitorLog, InterfaceState, NetworkState, RingBuffer
+from answer.stream import parse_logs_mmap
+from answer import ans3, ans4, columnar
+import argparse
+
+
+# Analyses the logs with many parameter sets at once. The logs are parsed and
+# sorted only once, and each log advances the state of every parameter set.
+# The RingBuffer of an interface is shared by the parameter sets of the same
+# overload_count, so that the average response time is computed once per log.
+
+@dataclass(frozen=True)
+class Params:
+    fail_threshould: int
+    overload_count: int
+    overload_threshould: float
+
+    def format(self) -> str:
+        return f'N={self.fail_threshould} m={self.overload_count} t={self.overload_threshould:g}'
+
+
+def grid(fail_threshoulds: Iterable[int],
+         overload_counts: Iterable[int],
+         overload_threshoulds: Iterable[float]) -> list[Params]:
+    return [Params(*p) for p in product(fail_threshoulds, overload_counts, overload_threshoulds)]
+
+
+# logs must be given in order of date. ifaces are the ids of interfaces known
+# in advance, as in ans4.interface_states_stream.
+# returns the states of interfaces and networks for each parameter set.
+def sweep_stream(logs: Iterable[MonitorLog],
+                 params: list[Params],
+                 table: Optional[AddressTable] = None,
+                 ifaces: Iterable[int] = ()) -> list[tuple[dict[IPv4Interface, InterfaceState], dict[IPv4Network, NetworkState]]]:
+    table = AddressTable() if table is None else table
+    counts = list(dict.fromkeys(p.overload_count for p in params))
+    count_idx = [counts.index(p.overload_count) for p in params]
+
+    states: list[list[Optional[InterfaceState]]] = [[] for _ in params]
+    states_net: list[list[Optional[NetworkState]]] = [[] for _ in params]
+    rings: list[Optional[list[RingBuffer]]] = []
+    order = []
+
+    def register(iface: int):
+        if iface >= len(rings):
+            rings.extend([None] * (len(table) - len(rings)))
+        rings[iface] = [RingBuffer(count) for count in counts]
+        for k, p in enumerate(params):
+            ans4.register_interface(iface, table, states[k], states_net[k], p.overload_count)
+            states[k][iface].overload_state.times = rings[iface][count_idx[k]]
+        order.append(iface)
+
+    for iface in ifaces:
+        if iface >= len(rings) or rings[iface] is None:
+            register(iface)
+
+    for log in logs:
+        iface = table.lookup(log.addr, log.iface)
+        if iface >= len(rings) or rings[iface] is None:
+            register(iface)
+
+        ave_times = []
+        for ring in rings[iface]:
+            ring.append(log.time)
+            ave_times.append(ring.average())
+
+        subnet = table.subnet_ids[iface]
+        for k, p in enumerate(params):
+            state = states[k][iface]
+            state_net = states_net[k][subnet]
+
+            status = state.status
+            ans4.update_status(log, state, ave_times[count_idx[k]], p.fail_threshould, p.overload_threshould)
+            state_net.change_status(status, state.status)
+            ans4.update_state_net(log.date, state_net)
+
+    order_net = dict.fromkeys(table.subnet_ids[iface] for iface in order)
+    return [({table.interfaces[iface]: states[k][iface] for iface in order},
+             {table.networks[subnet]: states_net[k][subnet] for subnet in order_net})
+            for k in range(len(params))]
+
+
+# number of periods, including the one not ended yet
+def count_periods(periods: list[tuple[int, int]], start: Optional[int]) -> int:
+    return len(periods) + (start is not None)
+
+
+def summarize(params: Params,
+              states: dict[IPv4Interface, InterfaceState],
+              states_net: Optional[dict[IPv4Network, NetworkState]] = None) -> str:
+    failures = [count_periods(s.fail_state.periods, s.fail_state.fail_start) for s in states.values()]
+    overloads = [count_periods(s.overload_state.periods, s.overload_state.overload_start) for s in states.values()]
+    columns = [params.fail_threshould, params.overload_count, f'{params.overload_threshould:g}',
+               sum(failures), sum(1 for c in failures if c > 0),
+               sum(overloads), sum(1 for c in overloads if c > 0)]
+    if states_net is not None:
+        columns.append(sum(count_periods(s.periods, s.fail_start) for s in states_net.values()))
+    return '\t'.join(map(str, columns))
+
+
+def summary_header(networks: bool) -> str:
+    columns = ['N', 'm', 't', 'failures', 'failed', 'overloads', 'overloaded']
+    if networks:
+        columns.append('network_failures')
+    return '\t'.join(columns)
+
+
+# with networks, interfaces are analysed as ans4, otherwise as ans3. with
+# reports, the full output of each parameter set follows the summary.
+def solve_as_text(src: str, params: list[Params], networks: bool = False, reports: bool = False) -> str:
+    table = AddressTable()
+    logs = list(parse_logs_mmap(src, table, MonitorLog))
+    # ans4 knows every interface in order of the file before the analysis
+    ifaces = list(dict.fromkeys(log.iface for log in logs)) if networks else []
+    if not columnar.is_sorted(src):
+        logs.sort(key=lambda log: log.date)
+
+    results = sweep_stream(logs, params, table, ifaces)
+
+    lines = [summary_header(networks)]
+    for p, (states, states_net) in zip(params, results):
+        lines.append(summarize(p, states, states_net if networks else None))
+
+    if reports:
+        for p, (states, states_net) in zip(params, results):
+            lines.append('')
+            lines.append(f'# {p.format()}')
+            if networks:
+                lines.append(ans4.format_output(ans4.format_states(states), ans4.format_states_net(states_net)))
+            else:
+                lines.append('\n'.join(ans3.format_states(states)))
+
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='analyse logs with every combination of the parameters')
+    parser.add_argument('src', help='input log file')
+    parser.add_argument('--N', type=int, nargs='+', required=True, help='threshoulds for timeout')
+    parser.add_argument('--M', type=int, nargs='+', required=True, help='numbers of time to response')
+    parser.add_argument('--t', type=float, nargs='+', required=True, help='threshoulds for overload')
+    parser.add_argument('--networks', action='store_true', help='analyse networks as ans4')
+    parser.add_argument('--reports', action='store_true', help='print the full report of each combination')
+    args = parser.parse_args()
+
+    print(solve_as_text(args.src, grid(args.N, args.M, args.t), args.networks, args.reports))
@@ -0,0 +1,26 @@
+from answer.address import AddressTable
+from ipaddress import IPv4Interface, IPv4Network
+
+
+def test_address_table():
+    table = AddressTable()
+    assert table.intern('192.168.1.1/24') == 0
+    assert table.intern('10.20.30.1/16') == 1
+    assert table.intern('192.168.1.2/24') == 2
+    assert table.intern('192.168.1.1/24') == 0
+    assert len(table) == 3
+
+    assert table.interfaces == [IPv4Interface('192.168.1.1/24'),
+                                IPv4Interface('10.20.30.1/16'),
+                                IPv4Interface('192.168.1.2/24')]
+    assert table.networks == [IPv4Network('192.168.1.0/24'), IPv4Network('10.20.0.0/16')]
+    assert table.subnet_ids == [0, 1, 0]
+
+
+def test_address_table_lookup():
+    table = AddressTable()
+    iface = table.intern('192.168.1.1/24')
+    assert table.lookup(IPv4Interface('192.168.1.1/24')) == iface
+    assert table.lookup(IPv4Interface('192.168.1.1/24'), iface) == iface
+    assert table.lookup(IPv4Interface('192.168.1.1/25')) == 1
+    assert table.subnet_ids == [0, 1]
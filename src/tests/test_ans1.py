@@ -1,13 +1,14 @@
 from answer.ans1 import parse_log, MonitorLog, failure_states, InterfaceState, Status, solve_as_text, transitState
 from datetime import datetime
+from answer.epoch import to_epoch
 from ipaddress import IPv4Interface
 import pytest
 
 
 
 @pytest.mark.parametrize('line, date, interface, time', [
-    ('20201019133124,10.20.30.1/16,2', datetime(2020, 10, 19, 13, 31, 24), IPv4Interface('10.20.30.1/16'), 2),
-    ('20201019133324,10.20.30.1/16,-', datetime(2020, 10, 19, 13, 33, 24), IPv4Interface('10.20.30.1/16'), None),
+    ('20201019133124,10.20.30.1/16,2', to_epoch(datetime(2020, 10, 19, 13, 31, 24)), IPv4Interface('10.20.30.1/16'), 2),
+    ('20201019133324,10.20.30.1/16,-', to_epoch(datetime(2020, 10, 19, 13, 33, 24)), IPv4Interface('10.20.30.1/16'), None),
 ])
 def test_parse_log(line, date, interface, time):
     actual = parse_log(line)
@@ -17,14 +18,14 @@ def test_parse_log(line, date, interface, time):
 
 def test_interface_state():
     state = InterfaceState(Status.IDLE, [], None)
-    fail_start = datetime(2021, 12, 31)
-    fail_end = datetime(2022, 1, 1)
+    fail_start = to_epoch(datetime(2021, 12, 31))
+    fail_end = to_epoch(datetime(2022, 1, 1))
 
     state.start(fail_start)
     assert state.periods == []
     assert state.fail_start == fail_start
 
-    state.end(datetime(2022, 1, 1))
+    state.end(to_epoch(datetime(2022, 1, 1)))
     assert state.periods == [(fail_start, fail_end)]
     assert state.fail_start is None
 
@@ -33,11 +34,11 @@ def test_interface_state():
 @pytest.mark.parametrize('state, line, desired', [
     (InterfaceState(Status.RUNNING, [], None),
      '20220101000000,1.1.1.1/16,-',
-     InterfaceState(Status.FAILURE, [], datetime(2022, 1, 1))),
+     InterfaceState(Status.FAILURE, [], to_epoch(datetime(2022, 1, 1)))),
 
-    (InterfaceState(Status.FAILURE, [], datetime(2021, 12, 31)),
+    (InterfaceState(Status.FAILURE, [], to_epoch(datetime(2021, 12, 31))),
      '20220101000000,1.1.1.1/16,1',
-     InterfaceState(Status.RUNNING, [(datetime(2021, 12, 31),datetime(2022, 1, 1))], None)),
+     InterfaceState(Status.RUNNING, [(to_epoch(datetime(2021, 12, 31)),to_epoch(datetime(2022, 1, 1)))], None)),
 ])
 def test_transition(state, line, desired):
     log = parse_log(line)
@@ -55,7 +56,7 @@ def test_transition(state, line, desired):
         '20201019133127,10.20.30.1/16,1',
      ],
      InterfaceState(Status.RUNNING,
-                    [(datetime(2020, 10, 19, 13, 31, 25), datetime(2020, 10, 19, 13, 31, 27))],
+                    [(to_epoch(datetime(2020, 10, 19, 13, 31, 25)), to_epoch(datetime(2020, 10, 19, 13, 31, 27)))],
                     None)
     ),
     # NOT order by date
@@ -66,7 +67,7 @@ def test_transition(state, line, desired):
         '20201019133126,10.20.30.1/16,-',
      ],
      InterfaceState(Status.RUNNING,
-                    [(datetime(2020, 10, 19, 13, 31, 25), datetime(2020, 10, 19, 13, 31, 27))],
+                    [(to_epoch(datetime(2020, 10, 19, 13, 31, 25)), to_epoch(datetime(2020, 10, 19, 13, 31, 27)))],
                     None)
     ),
     # failure date < running date
@@ -78,7 +79,7 @@ def test_transition(state, line, desired):
      ],
      InterfaceState(Status.FAILURE,
                     [],
-                    datetime(2020, 10, 19, 13, 31, 25))
+                    to_epoch(datetime(2020, 10, 19, 13, 31, 25)))
     ),
     # initially failure
     ([
@@ -88,7 +89,7 @@ def test_transition(state, line, desired):
         '20201019133127,10.20.30.1/16,1',
      ],
      InterfaceState(Status.RUNNING,
-                    [(datetime(2020, 10, 19, 13, 31, 24), datetime(2020, 10, 19, 13, 31, 27))],
+                    [(to_epoch(datetime(2020, 10, 19, 13, 31, 24)), to_epoch(datetime(2020, 10, 19, 13, 31, 27)))],
                     None)
     ),
     # parmanently failure
@@ -98,7 +99,7 @@ def test_transition(state, line, desired):
         '20201019133126,10.20.30.1/16,-',
         '20201019133127,10.20.30.1/16,-',
      ],
-     InterfaceState(Status.FAILURE, [], datetime(2020, 10, 19, 13, 31, 24))
+     InterfaceState(Status.FAILURE, [], to_epoch(datetime(2020, 10, 19, 13, 31, 24)))
     ),
     # parmanently running
     ([
@@ -178,3 +179,9 @@ def test_solve_as_text(datadir):
     desired = (datadir / 'out1.txt').read_text().rstrip()
     assert actual == desired
 
+
+
+def test_solve_as_text_stream(datadir):
+    actual = solve_as_text(datadir / 'in1.txt', window=60)
+    desired = (datadir / 'out1.txt').read_text().rstrip()
+    assert actual == desired
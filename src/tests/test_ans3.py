@@ -2,6 +2,7 @@ import pytest
 from answer.ans3 import InterfaceState, Status, FailState, update_state, RingBuffer, average_time, OverloadState, parse_log
 from typing import Optional
 from datetime import datetime
+from answer.epoch import to_epoch
 
 
 def test_ring_buffer():
@@ -11,6 +12,21 @@ def test_ring_buffer():
     assert x.buf == [5, 6, 2, 3, 4]
 
 
+@pytest.mark.parametrize('size, input', [
+    (5, []),
+    (5, [1, 2]),
+    (3, [1, 2, 3, 4, 5]),
+    (3, [1, None, 3, 4]),
+    (3, [1, None, 3, 4, 5, 6]),
+    (2, [None, None, None, 1]),
+])
+def test_ring_buffer_average(size, input):
+    x = RingBuffer(size)
+    for t in input:
+        x.append(t)
+    assert x.average() == average_time(x.buf)
+
+
 @pytest.mark.parametrize('input, desired', [
     ([1,2], 1.5),
     ([1,2,3,4,5], (1+2+3+4+5)/5),
@@ -47,8 +63,8 @@ def ring_buffer(size: int, buf: list[Optional[int]]) -> RingBuffer[Optional[int]
                     OverloadState([], None, ring_buffer(5, []))),
      parse_log('20220101000000,1.1.1.1/30,-'),
      InterfaceState(Status.OVERLOAD,
-                    FailState([], None, datetime(2022, 1, 1), 1),
-                    OverloadState([], datetime(2022, 1, 1), ring_buffer(5, [None])))),
+                    FailState([], None, to_epoch(datetime(2022, 1, 1)), 1),
+                    OverloadState([], to_epoch(datetime(2022, 1, 1)), ring_buffer(5, [None])))),
 
     # overload started
     (100, 5, 2.5,
@@ -58,58 +74,58 @@ def ring_buffer(size: int, buf: list[Optional[int]]) -> RingBuffer[Optional[int]
      parse_log('20220101000000,1.1.1.1/30,4'),
      InterfaceState(Status.OVERLOAD,
                     make_fail_state(),
-                    OverloadState([], datetime(2022, 1, 1), ring_buffer(5, [1,2,3,4])))),
+                    OverloadState([], to_epoch(datetime(2022, 1, 1)), ring_buffer(5, [1,2,3,4])))),
 
     # overload continued
     (100, 5, 2.5,
      InterfaceState(Status.OVERLOAD,
                     make_fail_state(),
-                    OverloadState([], datetime(2021, 12, 31), ring_buffer(5, [1,2,3,4]))),
+                    OverloadState([], to_epoch(datetime(2021, 12, 31)), ring_buffer(5, [1,2,3,4]))),
      parse_log('20220101000000,1.1.1.1/30,4'),
      InterfaceState(Status.OVERLOAD,
                     make_fail_state(),
-                    OverloadState([], datetime(2021, 12, 31), ring_buffer(5, [1,2,3,4,4])))),
+                    OverloadState([], to_epoch(datetime(2021, 12, 31)), ring_buffer(5, [1,2,3,4,4])))),
 
     # overload ended
     (100, 5, 2.5,
      InterfaceState(Status.OVERLOAD,
                     make_fail_state(),
                     OverloadState([],
-                                  datetime(2021, 12, 31),
+                                  to_epoch(datetime(2021, 12, 31)),
                                   ring_buffer(5, [1,2,3,4]))),
      parse_log('20220101000000,1.1.1.1/30,0'),
      InterfaceState(Status.RUNNING,
                     make_fail_state(),
-                    OverloadState([(datetime(2021, 12, 31), datetime(2022, 1, 1))],
+                    OverloadState([(to_epoch(datetime(2021, 12, 31)), to_epoch(datetime(2022, 1, 1)))],
                                   None,
                                   ring_buffer(5, [1,2,3,4,0])))),
 
     # overload ended and failure start
     (3, 5, 2.5,
      InterfaceState(Status.OVERLOAD,
-                    FailState([], None, datetime(2021, 12, 30), 2),
+                    FailState([], None, to_epoch(datetime(2021, 12, 30)), 2),
                     OverloadState([],
-                                  datetime(2021, 12, 25),
+                                  to_epoch(datetime(2021, 12, 25)),
                                   ring_buffer(5, [1,None,None]))),
      parse_log('20220101000000,1.1.1.1/30,-'),
      InterfaceState(Status.FAILURE,
-                    FailState([], datetime(2021, 12, 30), None, 3),
-                    OverloadState([(datetime(2021, 12, 25), datetime(2021, 12, 30))],
+                    FailState([], to_epoch(datetime(2021, 12, 30)), None, 3),
+                    OverloadState([(to_epoch(datetime(2021, 12, 25)), to_epoch(datetime(2021, 12, 30)))],
                                   None,
                                   ring_buffer(5, [1,None,None,None])))),
 
     # failure ended and overload revived
     (3, 5, 2.5,
      InterfaceState(Status.FAILURE,
-                    FailState([], datetime(2021, 12, 31), None, 3),
+                    FailState([], to_epoch(datetime(2021, 12, 31)), None, 3),
                     OverloadState([],
                                   None,
                                   ring_buffer(5, [1,None,None,None]))),
      parse_log('20220101000000,1.1.1.1/30,1'),
      InterfaceState(Status.OVERLOAD,
-                    FailState([(datetime(2021, 12, 31), datetime(2022, 1, 1))], None, None, 0),
+                    FailState([(to_epoch(datetime(2021, 12, 31)), to_epoch(datetime(2022, 1, 1)))], None, None, 0),
                     OverloadState([],
-                                  datetime(2022, 1, 1),
+                                  to_epoch(datetime(2022, 1, 1)),
                                   ring_buffer(5, [1,None,None,None,1])))),
 ])
 def test_transition(fail_th, ol_cnt, ol_th, state, log, desired):
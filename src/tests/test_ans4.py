@@ -1,6 +1,8 @@
 from ipaddress import IPv4Interface
 from answer.ans4 import Status, FailState, OverloadState, InterfaceState, RingBuffer, NetworkState, update_state_net
 from datetime import datetime
+from answer.epoch import to_epoch
+import pytest
 
 def test_transition():
     states = []
@@ -14,18 +16,36 @@ def test_transition():
                                FailState([], None, None, 0),
                                OverloadState([], None, RingBuffer(100)))
         states.append(state)
-        state_net.states[interface] = state
+        state_net.add(interface, state)
 
     assert [state.status for _, state in state_net.states.items()] == statuses
+    assert state_net.failing == 3
 
-    update_state_net(datetime(2022, 1, 1), state_net)
+    update_state_net(to_epoch(datetime(2022, 1, 1)), state_net)
     assert state_net.fail_start is None
 
     states[0].status = Status.FAILURE
-    update_state_net(datetime(2022, 1, 1), state_net)
-    assert state_net.fail_start == datetime(2022, 1, 1)
+    state_net.change_status(Status.RUNNING, Status.FAILURE)
+    update_state_net(to_epoch(datetime(2022, 1, 1)), state_net)
+    assert state_net.fail_start == to_epoch(datetime(2022, 1, 1))
 
     states[1].status = Status.RUNNING
-    update_state_net(datetime(2022, 1, 2), state_net)
+    state_net.change_status(Status.FAILURE, Status.RUNNING)
+    update_state_net(to_epoch(datetime(2022, 1, 2)), state_net)
     assert state_net.fail_start is None
-    assert state_net.periods == [(datetime(2022, 1, 1), datetime(2022, 1, 2))]
+    assert state_net.periods == [(to_epoch(datetime(2022, 1, 1)), to_epoch(datetime(2022, 1, 2)))]
+
+
+@pytest.mark.parametrize('before, after, desired', [
+    (Status.IDLE, Status.FAILURE, 2),
+    (Status.RUNNING, Status.FAILURE, 2),
+    (Status.OVERLOAD, Status.FAILURE, 2),
+    (Status.FAILURE, Status.FAILURE, 1),
+    (Status.FAILURE, Status.OVERLOAD, 0),
+    (Status.FAILURE, Status.RUNNING, 0),
+    (Status.RUNNING, Status.OVERLOAD, 1),
+])
+def test_change_status(before, after, desired):
+    state_net = NetworkState([], None, dict(), 1)
+    state_net.change_status(before, after)
+    assert state_net.failing == desired
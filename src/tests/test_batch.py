@@ -0,0 +1,73 @@
+from answer import ans1, ans2, ans3, batch
+from answer.address import AddressTable
+from answer.epoch import parse_date, to_datetime
+import random
+import pytest
+
+
+def write_random_log(path, seed, n=500):
+    rng = random.Random(seed)
+    addrs = ['10.20.30.1/16', '10.20.30.2/16', '192.168.1.1/24', '192.168.1.2/24']
+    date = parse_date('20201019133124')
+    lines = []
+    for _ in range(n):
+        date += rng.choice([0, 1, 2])
+        time = '-' if rng.random() < 0.4 else str(rng.randint(1, 300))
+        lines.append(f'{to_datetime(date):%Y%m%d%H%M%S},{rng.choice(addrs)},{time}')
+    # some logs are not in order of date
+    for i in range(0, n - 1, 10):
+        lines[i], lines[i + 1] = lines[i + 1], lines[i]
+    path.write_text('\n'.join(lines) + '\n')
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+@pytest.mark.parametrize('threshould', [1, 2, 3, 5])
+def test_solve_as_text(tmp_path, seed, threshould):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, seed)
+    assert batch.solve_as_text(src, threshould) == ans2.solve_as_text(src, threshould)
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_solve_as_text_ans1(tmp_path, seed):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, seed)
+    assert batch.solve_as_text(src, 1) == ans1.solve_as_text(src)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+@pytest.mark.parametrize('threshould, overload_count, overload_threshould', [
+    (1, 1, 100),
+    (2, 3, 50),
+    (3, 4, 2.5),
+    (3, 10, 150.5),
+])
+def test_solve_as_text_overload(tmp_path, seed, threshould, overload_count, overload_threshould):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, seed)
+    actual = batch.solve_as_text(src, threshould, overload_count, overload_threshould)
+    assert actual == ans3.solve_as_text(src, threshould, overload_count, overload_threshould)
+
+
+@pytest.mark.parametrize('line', [
+    '2020101913312,10.20.30.1/16,2',
+    '20201019133a24,10.20.30.1/16,2',
+    '20200230133124,10.20.30.1/16,2',
+    '20201019133124,10.20.30.1/16',
+    '20201019133124,10.20.30.1/16,2,3',
+])
+def test_load_columns_invalid(tmp_path, line):
+    src = tmp_path / 'log.txt'
+    src.write_text(line + '\n')
+    with pytest.raises(ValueError):
+        batch.load_columns(src, AddressTable())
+
+
+def test_load_columns(tmp_path):
+    src = tmp_path / 'log.txt'
+    src.write_text('20201019133124,10.20.30.1/16,2\r\n20201019133125,192.168.1.1/24,-\n20201019133126,10.20.30.1/16,15')
+    table = AddressTable()
+    cols = batch.load_columns(src, table)
+    assert cols.date.tolist() == [parse_date('20201019133124'), parse_date('20201019133125'), parse_date('20201019133126')]
+    assert [str(table.interfaces[iface]) for iface in cols.iface.tolist()] == ['10.20.30.1/16', '192.168.1.1/24', '10.20.30.1/16']
+    assert cols.time.tolist() == [2, batch.TIMEOUT, 15]
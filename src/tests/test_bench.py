@@ -0,0 +1,27 @@
+from answer import bench
+from answer.generate import Workload
+import pytest
+
+
+@pytest.mark.parametrize('name', ['ans1', 'ans2', 'ans3', 'ans4'])
+def test_run_phases(tmp_path, name):
+    src = tmp_path / 'log.txt'
+    with open(src, 'w') as f:
+        bench.write(Workload(interfaces=20, subnets=3, duration=300, late_rate=0.05), f)
+
+    seconds, text = bench.run_phases(name, src, (2, 3, 30.0))
+    assert set(seconds) == {'parse', 'sort', 'update', 'format', 'total'}
+    module = bench.MODULES[name]
+    if name == 'ans1':
+        assert text == module.solve_as_text(src)
+    elif name == 'ans2':
+        assert text == module.solve_as_text(src, 2)
+    else:
+        assert text == module.solve_as_text(src, 2, 3, 30.0)
+
+
+def test_run(tmp_path):
+    report = bench.run([100, 300], ['ans1', 'ans4'], (2, 3, 30.0), Workload(interfaces=20), tmp_path)
+    assert [(r['module'], r['lines']) for r in report['results']] == \
+        [('ans1', 100), ('ans4', 100), ('ans1', 300), ('ans4', 300)]
+    assert all(r['peak_rss_kb'] >= r['base_rss_kb'] > 0 for r in report['results'])
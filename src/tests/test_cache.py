@@ -0,0 +1,113 @@
+from concurrent.futures import ProcessPoolExecutor
+from answer import ans2, ans4, cache
+from tests.test_batch import write_random_log
+import os
+import pytest
+
+
+def fail():
+    raise AssertionError('the log is read')
+
+
+def test_hit(tmp_path):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 0)
+    results = cache.ResultCache(tmp_path / 'cache')
+    params = [2, 3, 150.0, None]
+    expected = ans4.solve_as_text(src, *params)
+
+    assert results.solve_as_text('ans4', src, params, lambda: ans4.solve_as_text(src, *params)) == expected
+    # neither solved nor read again
+    assert results.solve_as_text('ans4', src, params, fail) == expected
+    assert cache.ResultCache(tmp_path / 'cache').solve_as_text('ans4', src, params, fail) == expected
+
+
+def test_miss(tmp_path):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 0)
+    results = cache.ResultCache(tmp_path / 'cache')
+    results.solve_as_text('ans2', src, [2, None], lambda: ans2.solve_as_text(src, 2))
+
+    # other parameters, module or input
+    assert results.solve_as_text('ans2', src, [3, None], lambda: 'n3') == 'n3'
+    assert results.solve_as_text('ans2', src, [2, 5], lambda: 'window') == 'window'
+    assert results.solve_as_text('ans1', src, [2, None], lambda: 'ans1') == 'ans1'
+    assert results.solve_as_text('ans2', [src, src], [2, None], lambda: 'paths') == 'paths'
+
+    write_random_log(src, 1)
+    assert results.solve_as_text('ans2', src, [2, None], lambda: ans2.solve_as_text(src, 2)) == \
+        ans2.solve_as_text(src, 2)
+
+
+@pytest.mark.parametrize('identity', ['stat', 'content'])
+def test_identity(tmp_path, monkeypatch, identity):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 0)
+    copy = tmp_path / 'copy.txt'
+    copy.write_bytes(src.read_bytes())
+    results = cache.ResultCache(tmp_path / 'cache', identity=identity)
+    results.solve_as_text('ans2', src, [2, None], lambda: 'report')
+
+    # the same content in another file
+    text = results.solve_as_text('ans2', copy, [2, None], lambda: 'solved')
+    assert text == ('report' if identity == 'content' else 'solved')
+    # once hashed, the log is not read while it is not modified
+    if identity == 'content':
+        monkeypatch.setattr(cache, 'content_hash', lambda path: fail())
+        assert results.solve_as_text('ans2', copy, [2, None], fail) == 'report'
+
+
+def test_lru(tmp_path):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 0)
+    results = cache.ResultCache(tmp_path / 'cache', max_bytes=3000)
+    reports = {n: str(n) * 1000 for n in range(4)}
+    for n in range(3):
+        results.solve_as_text('ans2', src, [n, None], lambda: reports[n])
+        os.utime(results.path(results.key('ans2', src, [n, None]) + cache.REPORT_SUFFIX), ns=(n * 10**9, n * 10**9))
+
+    # 0 is used most recently, so 1 is removed
+    assert results.solve_as_text('ans2', src, [0, None], fail) == reports[0]
+    results.solve_as_text('ans2', src, [3, None], lambda: reports[3])
+    assert results.get(results.key('ans2', src, [1, None])) is None
+    for n in [0, 2, 3]:
+        assert results.solve_as_text('ans2', src, [n, None], fail) == reports[n]
+
+    sizes = [entry.stat().st_size for entry in os.scandir(results.directory) if entry.name.endswith('.txt')]
+    assert sum(sizes) <= 3000
+
+
+def solve_in_process(directory, src, threshould):
+    results = cache.ResultCache(directory, max_bytes=20000)
+    return results.solve_as_text('ans2', src, [threshould, None], lambda: ans2.solve_as_text(src, threshould))
+
+
+def test_processes(tmp_path):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 0)
+    directory = tmp_path / 'cache'
+    thresholds = [1, 2, 3, 4, 5] * 8
+    with ProcessPoolExecutor(4) as pool:
+        texts = list(pool.map(solve_in_process, [directory] * len(thresholds), [src] * len(thresholds), thresholds))
+
+    assert texts == [ans2.solve_as_text(src, n) for n in thresholds]
+    # no temporary files are left
+    assert all(not name.startswith('.tmp-') for name in os.listdir(directory))
+
+
+def test_unknown_identity(tmp_path):
+    with pytest.raises(ValueError):
+        cache.ResultCache(tmp_path, identity='name')
+
+
+def test_read_only(tmp_path, monkeypatch):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 0)
+    results = cache.ResultCache(tmp_path / 'cache')
+    results.solve_as_text('ans2', src, [2, None], lambda: 'report')
+
+    # as if the entry belonged to another user
+    def utime(path, *args, **kwargs):
+        raise PermissionError(path)
+    monkeypatch.setattr(os, 'utime', utime)
+    assert results.solve_as_text('ans2', src, [2, None], fail) == 'report'
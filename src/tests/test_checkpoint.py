@@ -0,0 +1,109 @@
+from answer import ans4, checkpoint
+from tests.test_batch import write_random_log
+import pytest
+
+
+def split_log(src, n):
+    lines = src.read_text().splitlines(keepends=True)
+    return ''.join(lines[:n]), ''.join(lines[n:])
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+@pytest.mark.parametrize('n', [0, 1, 100, 499])
+def test_resume(tmp_path, seed, n):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, seed)
+    head, tail = split_log(src, n)
+    expected = ans4.solve_as_text(src, 2, 3, 150)
+
+    log = tmp_path / 'appended.txt'
+    cp = tmp_path / 'state.json'
+    log.write_text(head)
+    checkpoint.solve_as_text(log, 2, 3, 150, cp)
+    log.write_text(head + tail)
+    assert checkpoint.solve_as_text(log, 2, 3, 150, cp) == expected
+    # nothing is appended since the last run
+    assert checkpoint.solve_as_text(log, 2, 3, 150, cp) == expected
+
+
+def test_rotate(tmp_path):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 0)
+    head, tail = split_log(src, 200)
+
+    log = tmp_path / 'rotated.txt'
+    cp = tmp_path / 'state.json'
+    log.write_text(head)
+    checkpoint.solve_as_text(log, 2, 3, 150, cp)
+    log.write_text(tail)
+    assert checkpoint.solve_as_text(log, 2, 3, 150, cp) == ans4.solve_as_text(src, 2, 3, 150)
+
+
+def test_incomplete_line(tmp_path):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 0)
+    head, tail = split_log(src, 200)
+
+    log = tmp_path / 'appended.txt'
+    cp = tmp_path / 'state.json'
+    log.write_text(head + tail[:20])
+    checkpoint.solve_as_text(log, 2, 3, 150, cp)
+    assert checkpoint.load_checkpoint(cp).offset == len(head)
+    log.write_text(head + tail)
+    assert checkpoint.solve_as_text(log, 2, 3, 150, cp) == ans4.solve_as_text(src, 2, 3, 150)
+
+
+def test_round_trip(tmp_path):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 0)
+    cp = tmp_path / 'state.json'
+    checkpoint.solve_as_text(src, 2, 3, 150, cp)
+    saved = checkpoint.load_checkpoint(cp)
+    states, states_net = ans4.solve(src, 2, 3, 150)
+    assert saved.states == states
+    assert saved.states_net == states_net
+
+
+def test_params(tmp_path):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 0)
+    cp = tmp_path / 'state.json'
+    checkpoint.solve_as_text(src, 2, 3, 150, cp)
+    with pytest.raises(ValueError):
+        checkpoint.solve_as_text(src, 3, 3, 150, cp)
+
+
+# 10.0.0.2/24 first appears after the checkpoint, when 10.0.0.1/24 is failing
+JOINING_HEAD = '20201019133101,10.0.0.1/24,-\n20201019133102,10.0.0.1/24,-\n'
+JOINING_TAIL = '20201019133103,10.0.0.2/24,1\n20201019133104,10.0.0.1/24,1\n'
+
+
+def test_joining_interface(tmp_path):
+    src = tmp_path / 'log.txt'
+    src.write_text(JOINING_HEAD + JOINING_TAIL)
+    expected = ans4.solve_as_text(src, 2, 3, 150)
+
+    log = tmp_path / 'appended.txt'
+    cp = tmp_path / 'state.json'
+    log.write_text(JOINING_HEAD)
+    # the network fails as far as the checkpoint knows
+    assert '10.0.0.0/24:\n  FAILURE (2020-10-19 13:31:02 -)' in checkpoint.solve_as_text(log, 2, 3, 150, cp)
+    log.write_text(JOINING_HEAD + JOINING_TAIL)
+    assert checkpoint.solve_as_text(log, 2, 3, 150, cp) == expected
+    assert expected.endswith('10.0.0.0/24:\n  ')
+
+
+def test_joining_interface_rotated(tmp_path):
+    log = tmp_path / 'rotated.txt'
+    cp = tmp_path / 'state.json'
+    log.write_text(JOINING_HEAD)
+    checkpoint.solve_as_text(log, 2, 3, 150, cp)
+    log.write_text(JOINING_TAIL)
+    # the rotated log is analysed on its own, and the checkpoint is replaced
+    assert checkpoint.solve_as_text(log, 2, 3, 150, cp) == ans4.solve_as_text(log, 2, 3, 150)
+    saved = checkpoint.load_checkpoint(cp)
+    assert [str(addr) for addr in saved.states] == ['10.0.0.2/24', '10.0.0.1/24']
+
+    # and resumed from the new checkpoint
+    log.write_text(JOINING_TAIL + '20201019133105,10.0.0.2/24,-\n')
+    assert checkpoint.solve_as_text(log, 2, 3, 150, cp) == ans4.solve_as_text(log, 2, 3, 150)
@@ -0,0 +1,78 @@
+from answer import ans1, ans2, ans3, ans4, batch, columnar, parallel
+from answer.address import AddressTable
+from answer.stream import read_records
+from tests.test_batch import write_random_log
+import pytest
+
+
+def convert(src, dst, sort):
+    table = AddressTable()
+    columnar.convert(read_records(src, table), table, dst, sort)
+
+
+@pytest.fixture(params=[False, True], ids=['unsorted', 'sorted'])
+def logs(request, tmp_path):
+    src = tmp_path / 'log.txt'
+    dst = tmp_path / 'log.col'
+    write_random_log(src, 0)
+    convert(src, dst, request.param)
+    return src, dst
+
+
+def test_round_trip(logs):
+    src, dst = logs
+    table = AddressTable()
+    records = list(read_records(dst, table))
+    expected = list(read_records(src, AddressTable()))
+    if columnar.is_sorted(dst):
+        expected.sort(key=lambda r: r[0])
+    assert records == expected
+
+
+def test_is_sorted(tmp_path):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 0)
+    convert(src, tmp_path / 'a.col', False)
+    convert(src, tmp_path / 'b.col', True)
+    assert columnar.is_columnar(tmp_path / 'a.col')
+    assert not columnar.is_columnar(src)
+    assert not columnar.is_sorted(tmp_path / 'a.col')
+    assert columnar.is_sorted(tmp_path / 'b.col')
+
+
+def test_truncated(logs, tmp_path):
+    _, dst = logs
+    broken = tmp_path / 'broken.col'
+    broken.write_bytes(dst.read_bytes()[:-8])
+    with pytest.raises(ValueError):
+        list(read_records(broken, AddressTable()))
+
+
+def test_ans1(logs):
+    src, dst = logs
+    assert ans1.solve_as_text(dst) == ans1.solve_as_text(src)
+
+
+@pytest.mark.parametrize('threshould', [1, 3])
+def test_ans2(logs, threshould):
+    src, dst = logs
+    assert ans2.solve_as_text(dst, threshould) == ans2.solve_as_text(src, threshould)
+    assert batch.solve_as_text(dst, threshould) == ans2.solve_as_text(src, threshould)
+
+
+def test_ans3(logs):
+    src, dst = logs
+    assert ans3.solve_as_text(dst, 2, 3, 150) == ans3.solve_as_text(src, 2, 3, 150)
+    assert batch.solve_as_text(dst, 2, 3, 150) == ans3.solve_as_text(src, 2, 3, 150)
+
+
+def test_ans4(logs):
+    src, dst = logs
+    assert ans4.solve_as_text(dst, 2, 3, 150) == ans4.solve_as_text(src, 2, 3, 150)
+    assert ans4.solve_as_text(dst, 2, 3, 150, window=5) == ans4.solve_as_text(src, 2, 3, 150, window=5)
+
+
+def test_parallel(logs):
+    _, dst = logs
+    with pytest.raises(ValueError):
+        parallel.solve_as_text('ans1', dst, 2)
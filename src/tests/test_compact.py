@@ -0,0 +1,34 @@
+from answer import ans3, ans4, compact
+from tests.test_batch import write_random_log
+import pytest
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2, 3])
+@pytest.mark.parametrize('params', [(1, 1, 50), (2, 3, 150), (3, 2, 100.5), (5, 5, 300)])
+def test_ans3(tmp_path, seed, params):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, seed)
+    assert compact.solve_as_text(src, *params) == ans3.solve_as_text(src, *params)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2, 3])
+@pytest.mark.parametrize('params', [(1, 1, 50), (2, 3, 150), (3, 2, 100.5)])
+def test_ans4(tmp_path, seed, params):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, seed)
+    assert compact.solve_as_text(src, *params, networks=True) == ans4.solve_as_text(src, *params)
+
+
+@pytest.mark.parametrize('window', [0, 5])
+def test_window(tmp_path, window):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 0)
+    assert compact.solve_as_text(src, 2, 3, 150, window=window) == ans3.solve_as_text(src, 2, 3, 150, window)
+    assert compact.solve_as_text(src, 2, 3, 150, True, window) == ans4.solve_as_text(src, 2, 3, 150, window)
+
+
+@pytest.mark.parametrize('n', [1, 2])
+def test_testcases(datadir, n):
+    src = datadir / f'in{n}.txt'
+    assert compact.solve_as_text(src, 2, 2, 100) == ans3.solve_as_text(src, 2, 2, 100)
+    assert compact.solve_as_text(src, 2, 2, 100, True) == ans4.solve_as_text(src, 2, 2, 100)
@@ -0,0 +1,102 @@
+from answer.address import AddressTable
+from answer.stream import read_records
+from answer import ans1, ans2, ans3, ans4, compressed, extsort
+from tests.test_batch import write_random_log
+import bz2
+import gzip
+import mmap
+import pytest
+
+
+def compress(src, dst, codec, members=1):
+    lines = src.read_bytes().splitlines(keepends=True)
+    # members of consecutive lines, as when logs are rotated
+    size = -(-len(lines) // members)
+    parts = [b''.join(lines[i:i + size]) for i in range(0, len(lines), size)]
+    module = gzip if codec == 'gzip' else bz2
+    dst.write_bytes(b''.join(module.compress(part) for part in parts))
+
+
+@pytest.fixture(params=['gzip', 'bz2'])
+def codec(request):
+    return request.param
+
+
+@pytest.mark.parametrize('members', [1, 7])
+@pytest.mark.parametrize('workers', [1, 4])
+def test_read_records(tmp_path, codec, members, workers):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 0)
+    dst = tmp_path / 'log.txt.z'
+    compress(src, dst, codec, members)
+
+    assert compressed.is_compressed(dst)
+    assert not compressed.is_compressed(src)
+    assert compressed.read_bytes(dst, workers) == src.read_bytes()
+    assert list(compressed.read_lines(dst, workers)) == src.read_bytes().splitlines()
+    assert list(read_records(dst, AddressTable())) == list(read_records(src, AddressTable()))
+
+
+def test_solve_as_text(tmp_path, codec):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 1)
+    dst = tmp_path / 'log.txt.z'
+    compress(src, dst, codec, 3)
+
+    assert ans1.solve_as_text(dst) == ans1.solve_as_text(src)
+    assert ans2.solve_as_text(dst, 2) == ans2.solve_as_text(src, 2)
+    assert ans3.solve_as_text(dst, 2, 3, 150) == ans3.solve_as_text(src, 2, 3, 150)
+    assert ans4.solve_as_text(dst, 2, 3, 150) == ans4.solve_as_text(src, 2, 3, 150)
+    assert ans4.solve_as_text(dst, 2, 3, 150, memory=8 * extsort.RECORD_BYTES) == ans4.solve_as_text(src, 2, 3, 150)
+
+
+# a log is decompressed for the interfaces and for the analysis only
+def test_decompressed_twice(tmp_path, monkeypatch):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 1)
+    dst = tmp_path / 'log.txt.z'
+    compress(src, dst, 'gzip', 3)
+    assert not extsort.is_sorted(dst)
+
+    read_lines = compressed.read_lines
+    calls = []
+    monkeypatch.setattr(compressed, 'read_lines', lambda *args: calls.append(args) or read_lines(*args))
+    assert ans4.solve_as_text([dst, src], 2, 3, 150) == ans4.solve_as_text([src, src], 2, 3, 150)
+    assert len(calls) == 2
+
+
+def test_false_members(tmp_path):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 2)
+    dst = tmp_path / 'log.txt.gz'
+    compress(src, dst, 'gzip', 4)
+
+    with open(dst, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        offsets = [match.start() for match in compressed.GZIP.member.finditer(mm)]
+        assert len(offsets) == 4
+        # offsets inside a member are thrown away
+        offsets = sorted(offsets + [offsets[0] + 5, offsets[2] + 11])
+        assert b''.join(compressed.inflate_members(compressed.GZIP, mm, offsets, 3)) == src.read_bytes()
+
+
+def test_truncated(tmp_path, codec):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 0)
+    dst = tmp_path / 'log.txt.z'
+    compress(src, dst, codec)
+    dst.write_bytes(dst.read_bytes()[:-20])
+
+    with pytest.raises(ValueError):
+        list(read_records(dst, AddressTable()))
+
+
+def test_close(tmp_path):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 0, 20000)
+    dst = tmp_path / 'log.txt.gz'
+    compress(src, dst, 'gzip')
+
+    # the thread decompressing stops when the lines are no longer read
+    lines = compressed.read_lines(dst)
+    assert next(lines) == src.read_bytes().splitlines()[0]
+    lines.close()
@@ -0,0 +1,33 @@
+from answer.epoch import parse_date, format_date, to_datetime, to_epoch
+from datetime import datetime
+import pytest
+
+
+@pytest.mark.parametrize('date_str', [
+    '19700101000000',
+    '20201019133124',
+    '20201231235959',
+    '20240229120000',
+    '19691231235959',
+])
+def test_parse_date(date_str):
+    desired = datetime.strptime(date_str, '%Y%m%d%H%M%S')
+    assert to_datetime(parse_date(date_str)) == desired
+    assert parse_date(date_str) == to_epoch(desired)
+    assert format_date(parse_date(date_str)) == str(desired)
+
+
+@pytest.mark.parametrize('date_str', [
+    '2020101913312',
+    '202010191331245',
+    '2020101913312a',
+    '20201019 33124',
+    '20201319133124',
+    '20230229133124',
+    '20201019243124',
+    '20201019136024',
+    '20201019133160',
+])
+def test_parse_date_invalid(date_str):
+    with pytest.raises(ValueError):
+        parse_date(date_str)
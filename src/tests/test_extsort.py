@@ -0,0 +1,120 @@
+from pathlib import Path
+from answer.address import AddressTable
+from answer.stream import read_records
+from answer import ans1, ans2, ans3, ans4, extsort
+from tests.test_batch import write_random_log
+from tests.test_columnar import convert
+import pytest
+
+TESTCASES = Path(__file__).parent.parent / 'testcases'
+
+
+def in_memory(path, table=None):
+    table = AddressTable() if table is None else table
+    return sorted(read_records(path, table), key=lambda record: record[0])
+
+
+@pytest.mark.parametrize('records', [1, 7, 100, 1000])
+def test_sorted_records(tmp_path, records):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 0)
+    expected = in_memory(src)
+    table = AddressTable()
+    # logs of the same date keep the order of the file
+    assert list(extsort.sorted_records(src, table, records * extsort.RECORD_BYTES, tmp_path)) == expected
+    assert [p.name for p in tmp_path.iterdir()] == ['log.txt']
+
+
+def test_equal_dates(tmp_path):
+    src = TESTCASES / 'in2-1.txt'
+    table = AddressTable()
+    assert list(extsort.sorted_records(src, table, 3 * extsort.RECORD_BYTES, tmp_path)) == in_memory(src)
+
+
+def test_is_sorted(tmp_path):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 0)
+    assert not extsort.is_sorted(src)
+
+    lines = sorted(src.read_text().splitlines(), key=lambda line: line[:14])
+    src.write_text('\n'.join(lines) + '\n')
+    assert extsort.is_sorted(src)
+
+    col = tmp_path / 'log.col'
+    convert(src, col, True)
+    assert extsort.is_sorted(col)
+
+    empty = tmp_path / 'empty.txt'
+    empty.write_text('')
+    assert extsort.is_sorted(empty)
+
+
+def test_columnar(tmp_path):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 1)
+    col = tmp_path / 'log.col'
+    convert(src, col, False)
+    table = AddressTable()
+    assert list(extsort.sorted_records(col, table, 10 * extsort.RECORD_BYTES)) == in_memory(src)
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_solve_as_text(tmp_path, seed):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, seed)
+    memory = 16 * extsort.RECORD_BYTES
+    assert ans1.solve_as_text(src, memory=memory) == ans1.solve_as_text(src)
+    assert ans2.solve_as_text(src, 2, memory=memory) == ans2.solve_as_text(src, 2)
+    assert ans3.solve_as_text(src, 2, 3, 150, memory=memory) == ans3.solve_as_text(src, 2, 3, 150)
+    assert ans4.solve_as_text(src, 2, 3, 150, memory=memory) == ans4.solve_as_text(src, 2, 3, 150)
+
+
+@pytest.mark.parametrize('n', [1, 2, 3, 4])
+def test_testcases(n):
+    src = TESTCASES / f'in{n}-1.txt'
+    memory = 4 * extsort.RECORD_BYTES
+    assert ans4.solve_as_text(src, 2, 2, 100, memory=memory) == ans4.solve_as_text(src, 2, 2, 100)
+
+
+def split_log(src, paths, sort=True):
+    lines = src.read_text().splitlines()
+    if sort:
+        lines.sort(key=lambda line: line[:14])
+    for i, path in enumerate(paths):
+        path.write_text(''.join(line + '\n' for line in lines[i::len(paths)]))
+
+
+@pytest.mark.parametrize('k', [1, 2, 3, 5])
+def test_merged_records(tmp_path, k):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 2)
+    paths = [tmp_path / f'log-{i}.txt' for i in range(k)]
+    split_log(src, paths)
+    concat = tmp_path / 'concat.txt'
+    concat.write_text(''.join(path.read_text() for path in paths))
+
+    table = AddressTable()
+    merged = [(date, table.interfaces[iface], time) for date, iface, time in extsort.merged_records(paths, table)]
+    table = AddressTable()
+    expected = [(date, table.interfaces[iface], time) for date, iface, time in in_memory(concat, table)]
+    # logs of the same date keep the order of the paths
+    assert merged == expected
+
+
+@pytest.mark.parametrize('sort', [True, False])
+def test_solve_as_text_paths(tmp_path, sort):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 3)
+    paths = [tmp_path / f'log-{i}.txt' for i in range(3)]
+    split_log(src, paths, sort)
+    concat = tmp_path / 'concat.txt'
+    concat.write_text(''.join(path.read_text() for path in paths))
+
+    assert ans1.solve_as_text(paths) == ans1.solve_as_text(concat)
+    assert ans2.solve_as_text(paths, 2) == ans2.solve_as_text(concat, 2)
+    assert ans3.solve_as_text(paths, 2, 3, 150) == ans3.solve_as_text(concat, 2, 3, 150)
+    assert ans4.solve_as_text(paths, 2, 3, 150) == ans4.solve_as_text(concat, 2, 3, 150)
+    assert ans4.solve_as_text(paths, 2, 3, 150, memory=8 * extsort.RECORD_BYTES) == \
+        ans4.solve_as_text(concat, 2, 3, 150)
+    if sort:
+        assert ans4.solve_as_text(paths, 2, 3, 150, 0) == ans4.solve_as_text(concat, 2, 3, 150)
@@ -0,0 +1,90 @@
+from answer import ans4, follow
+from answer.address import AddressTable
+from answer.epoch import format_date
+from answer.stream import follow_records
+from tests.test_batch import write_random_log
+from pathlib import Path
+import threading
+import time
+
+
+TESTCASES = Path(__file__).parent.parent / 'testcases'
+
+
+def periods_of(events):
+    periods = dict()
+    starts = dict()
+    for e in events:
+        date, clock, kind, addr, status, change = e.split(' ')
+        key = (kind, addr, status)
+        periods.setdefault(key, [])
+        if change == 'start':
+            starts[key] = f'{date} {clock}'
+        elif change == 'end':
+            periods[key].append((starts.pop(key), f'{date} {clock}'))
+        else:
+            del starts[key]
+    return periods, starts
+
+
+def assert_same_as_ans4(src, events, *params):
+    periods, starts = periods_of(events)
+    states, states_net = ans4.solve(src, *params)
+    for addr, state in states.items():
+        for status, periods_expected, start in [('FAILURE', state.fail_state.periods, state.fail_state.fail_start),
+                                                 ('OVERLOAD', state.overload_state.periods, state.overload_state.overload_start)]:
+            key = ('interface', str(addr), status)
+            assert periods.get(key, []) == [(format_date(s), format_date(e)) for s, e in periods_expected]
+            assert starts.get(key) == (None if start is None else format_date(start))
+    for network, state_net in states_net.items():
+        # the start of a network failure is reported when all of its
+        # interfaces first fail, while the report has the last log of the
+        # network before the end
+        key = ('network', str(network), 'FAILURE')
+        expected = [(format_date(s), format_date(e)) for s, e in state_net.periods]
+        assert [e for _, e in periods.get(key, [])] == [e for _, e in expected]
+        assert all(s <= s_expected for (s, _), (s_expected, _) in zip(periods.get(key, []), expected))
+        assert (key in starts) == (state_net.fail_start is not None)
+
+
+def test_events(tmp_path):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 0)
+    src.write_text('\n'.join(sorted(src.read_text().splitlines())) + '\n')
+    assert_same_as_ans4(src, list(follow.follow(src, 2, 3, 150, idle=0)), 2, 3, 150)
+
+
+def test_in4(tmp_path):
+    src = TESTCASES / 'in4-1.txt'
+    events = list(follow.follow(src, 1, 100, 100, idle=0))
+    assert_same_as_ans4(src, events, 1, 100, 100)
+    # not before the last interface of the network fails
+    assert '2020-10-19 13:31:08 network 192.168.1.0/24 FAILURE start' in events
+    assert [e for e in events if ' network ' in e and e.endswith(' start')] == \
+        ['2020-10-19 13:31:08 network 192.168.1.0/24 FAILURE start']
+
+
+def test_rotate_and_truncate(tmp_path):
+    src = tmp_path / 'log.txt'
+    src.write_text('20201019133124,10.20.30.1/16,1\n')
+
+    def write():
+        time.sleep(0.1)
+        with open(src, 'a') as f:
+            f.write('20201019133125,10.20.30.1/16,')
+            f.flush()
+            time.sleep(0.1)
+            f.write('2\n')
+        time.sleep(0.1)
+        src.rename(tmp_path / 'log.txt.1')
+        src.write_text('20201019133126,10.20.30.1/16,3\n')
+        time.sleep(0.1)
+        src.write_text('')
+        time.sleep(0.1)
+        src.write_text('20201019133127,10.20.30.1/16,-\n')
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    records = list(follow_records(src, AddressTable(), interval=0.01, idle=0.5))
+    writer.join()
+    assert [time for _, _, time in records] == [1, 2, 3, None]
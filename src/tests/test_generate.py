@@ -0,0 +1,33 @@
+from answer import ans4
+from answer.generate import Workload, addresses, generate
+from answer.epoch import parse_date
+from ipaddress import IPv4Interface
+
+
+def test_deterministic():
+    workload = Workload(interfaces=20, subnets=4, duration=600, late_rate=0.1, seed=3)
+    assert list(generate(workload)) == list(generate(workload))
+    assert list(generate(workload)) != list(generate(Workload(interfaces=20, subnets=4, duration=600, seed=4)))
+
+
+def test_layout():
+    addrs = addresses(Workload(interfaces=30, subnets=5, prefixlen=28))
+    assert len(set(addrs)) == 30
+    assert len({IPv4Interface(addr).network for addr in addrs}) == 5
+
+
+def test_lines():
+    workload = Workload(interfaces=10, duration=100, interval=5, timeout_rate=0.2, late_rate=0.2)
+    lines = list(generate(workload))
+    assert len(lines) == 10 * 100 // 5
+    logs = [ans4.parse_log(line) for line in lines]
+    dates = [log.date for log in logs]
+    assert dates != sorted(dates)
+    assert all(parse_date('20201019000000') <= d < parse_date('20201019000140') for d in dates)
+    assert any(log.time is None for log in logs)
+
+
+def test_in_order():
+    lines = list(generate(Workload(interfaces=10, duration=100)))
+    dates = [ans4.parse_log(line).date for line in lines]
+    assert dates == sorted(dates)
@@ -0,0 +1,97 @@
+from answer import ans1, ans2, ans4, cli, instrument
+from tests.test_batch import write_random_log
+import argparse
+import json
+import pytest
+
+
+def test_disabled(tmp_path):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 0)
+    update_state = ans2.update_state
+    with instrument.profiling() as profile:
+        assert ans2.update_state is not update_state
+    assert ans2.update_state is update_state
+    ans2.solve_as_text(src, 2)
+    assert profile.summary()['counters'] == {}
+
+
+@pytest.mark.parametrize('window', [None, 5])
+def test_ans2(tmp_path, window):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 0)
+    with instrument.profiling() as profile:
+        text = ans2.solve_as_text(src, 2, window)
+    assert text == ans2.solve_as_text(src, 2, window)
+
+    summary = json.loads(profile.to_json())
+    assert summary['counters']['lines'] == 500
+    assert set(summary['seconds']) >= {'update', 'format'}
+    states = ans2.solve(src, 2)
+    failures = sum(len(s.fail_state.periods) + (s.fail_state.fail_start is not None) for s in states.values())
+    transitions = summary['transitions']
+    assert transitions.get('RUNNING->FAILURE', 0) + transitions.get('IDLE->FAILURE', 0) == failures
+
+
+def test_ans4(tmp_path):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 1)
+    with instrument.profiling(ans4) as profile:
+        ans4.solve_as_text(src, 2, 3, 150)
+    assert profile.counters['update_state_net'] == 500
+    assert sum(profile.transitions.values()) > 0
+    assert set(profile.seconds) == {'parse', 'sort', 'update', 'format'}
+
+
+BROKEN = '20201019133124,10.20.30.1/16,2\nbroken\n'
+
+
+@pytest.mark.parametrize('window, memory', [(None, None), (5, None), (None, 1024 * 1024)])
+def test_parse_failure(tmp_path, window, memory):
+    src = tmp_path / 'log.txt'
+    src.write_text(BROKEN)
+    with instrument.profiling(ans1) as profile:
+        with pytest.raises(ValueError):
+            ans1.solve_as_text(src, window, memory)
+    assert profile.counters['parse_failures'] == 1
+
+
+# the records are parsed during the update, and timed apart from it
+@pytest.mark.parametrize('window, memory, n', [(5, None, 1), (None, 1024 * 1024, 1), (None, None, 2)])
+def test_streaming(tmp_path, window, memory, n):
+    paths = []
+    for seed in range(n):
+        paths.append(tmp_path / f'log{seed}.txt')
+        write_random_log(paths[-1], seed)
+    with instrument.profiling(ans4) as profile:
+        ans4.solve_as_text(paths, 2, 3, 150, window, memory)
+    assert profile.counters['lines'] == 500 * n
+    assert set(profile.seconds) == {'parse', 'update', 'format'}
+    assert all(seconds >= 0 for seconds in profile.seconds.values())
+
+
+# cli.run reports the logs dropped as late, without profiling
+def test_late(tmp_path, capsys):
+    src = tmp_path / 'log.txt'
+    src.write_text('20201019133125,10.20.30.1/16,2\n20201019133124,10.20.30.1/16,2\n20201019133126,10.20.30.1/16,2\n')
+    parser = argparse.ArgumentParser()
+    parser.add_argument('src', nargs='+')
+    cli.add_arguments(parser)
+    cli.run(ans1, 'ans1', parser.parse_args([str(src), '--window', '0']), [])
+    assert capsys.readouterr().err == 'logs later than the window of 0 dropped: 1\n'
+
+    cli.run(ans1, 'ans1', parser.parse_args([str(src)]), [])
+    assert capsys.readouterr().err == ''
+
+
+def test_summary_of_failure(tmp_path):
+    src = tmp_path / 'log.txt'
+    src.write_text(BROKEN)
+    summary = tmp_path / 'profile.json'
+    parser = argparse.ArgumentParser()
+    parser.add_argument('src', nargs='+')
+    cli.add_arguments(parser)
+    args = parser.parse_args([str(src), '--window', '5', '--profile', str(summary)])
+    with pytest.raises(ValueError):
+        cli.run(ans1, 'ans1', args, [])
+    assert json.loads(summary.read_text())['counters']['parse_failures'] == 1
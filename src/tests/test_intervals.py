@@ -0,0 +1,57 @@
+from answer import ans1, ans4, intervals
+from answer.intervals import Period, PeriodIndex
+from tests.test_batch import write_random_log
+import random
+import pytest
+
+
+def brute_force(periods, begin, end):
+    return [p for p in periods if p.start <= end and (p.end is None or p.end >= begin)]
+
+
+def key(p):
+    return (p.start, p.end is None, p.end or 0, p.kind, str(p.addr), p.status)
+
+
+@pytest.mark.parametrize('n', [0, 1, 2, 7, 100])
+def test_overlapping(n):
+    rng = random.Random(n)
+    periods = []
+    for i in range(n):
+        start = rng.randint(0, 1000)
+        end = None if rng.random() < 0.1 else start + rng.randint(0, 50)
+        periods.append(Period(start, end, 'interface', f'10.0.0.{i}/24', 'FAILURE'))
+    index = PeriodIndex(periods)
+    for _ in range(200):
+        begin = rng.randint(-10, 1100)
+        end = begin + rng.choice([0, 1, 10, 300])
+        assert sorted(index.overlapping(begin, end), key=key) == sorted(brute_force(periods, begin, end), key=key)
+
+
+def test_build_index(tmp_path):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 0)
+    states, states_net = ans4.solve(src, 2, 3, 150)
+    index = intervals.build_index(states, states_net)
+    periods = index.periods
+
+    count = sum(len(s.fail_state.periods) + len(s.overload_state.periods)
+                + (s.fail_state.fail_start is not None) + (s.overload_state.overload_start is not None)
+                for s in states.values())
+    count += sum(len(s.periods) + (s.fail_start is not None) for s in states_net.values())
+    assert len(index) == count
+
+    first, last = periods[0].start, periods[-1].start
+    for date in range(first - 1, last + 2, 7):
+        assert sorted(index.at(date), key=key) == sorted(brute_force(periods, date, date), key=key)
+
+
+
+
+def test_ans1(tmp_path):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 1)
+    states = ans1.solve(src)
+    index = intervals.build_index(states)
+    assert len(index) == sum(len(s.periods) + (s.fail_start is not None) for s in states.values())
+    assert {p.status for p in index.periods} == {'FAILURE'}
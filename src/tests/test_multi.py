@@ -0,0 +1,76 @@
+from answer import ans1, ans2, ans3, ans4, multi
+from tests.test_batch import write_random_log
+import io
+import pytest
+
+
+def expected(src, name, window=None, memory=None):
+    match name:
+        case 'ans1':
+            return ans1.solve_as_text(src, window, memory)
+        case 'ans2':
+            return ans2.solve_as_text(src, 2, window, memory)
+        case 'ans3':
+            return ans3.solve_as_text(src, 2, 3, 150, window, memory)
+        case 'ans4':
+            return ans4.solve_as_text(src, 2, 3, 150, window, memory)
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+@pytest.mark.parametrize('window', [None, 5])
+def test_all(tmp_path, seed, window):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, seed)
+    reports = [detector.format() for detector in multi.detect(src, multi.REPORTS, 2, 3, 150, window)]
+    assert reports == [expected(src, name, window) for name in multi.REPORTS]
+
+
+def test_solve(tmp_path):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 0)
+    assert multi.solve(src, ['ans2', 'ans4'], 2, 3, 150) == [
+        [('interface', ans2.solve(src, 2))],
+        list(zip(['interface', 'network'], ans4.solve(src, 2, 3, 150))),
+    ]
+
+
+# logs of several servers are merged, and sorted within the memory budget
+@pytest.mark.parametrize('memory', [None, 1024])
+def test_paths(tmp_path, memory):
+    paths = [tmp_path / 'log0.txt', tmp_path / 'log1.txt']
+    for seed, path in enumerate(paths):
+        write_random_log(path, seed)
+    text = multi.solve_as_text(paths, multi.REPORTS, 2, 3, 150, None, memory)
+    assert text == '\n\n'.join(f'# {name}\n{expected(paths, name, None, memory)}' for name in multi.REPORTS)
+
+
+@pytest.mark.parametrize('names', [['ans3'], ['ans1', 'ans4']])
+def test_write_reports(tmp_path, names):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 1)
+    out = io.StringIO()
+    multi.write_reports(out, names, multi.solve(src, names, 2, 3, 150))
+    assert out.getvalue() == multi.solve_as_text(src, names, 2, 3, 150) + '\n'
+
+
+@pytest.mark.parametrize('names', [['ans1'], ['ans4', 'ans2'], ['ans3', 'ans1']])
+def test_subset(tmp_path, names):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 0)
+    text = multi.solve_as_text(src, names, 2, 3, 150)
+    if len(names) == 1:
+        assert text == expected(src, names[0])
+    else:
+        assert text == '\n\n'.join(f'# {name}\n{expected(src, name)}' for name in names)
+
+
+def test_params(tmp_path):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 0)
+    assert multi.solve_as_text(src, ['ans1']) == expected(src, 'ans1')
+    with pytest.raises(ValueError):
+        multi.solve(src, ['ans2'])
+    with pytest.raises(ValueError):
+        multi.solve(src, ['ans3'], 2)
+    with pytest.raises(ValueError):
+        multi.solve(src, ['ans5'], 2, 3, 150)
@@ -0,0 +1,61 @@
+from answer import ans1, ans2, ans3, ans4, cli, parallel
+from tests.test_batch import write_random_log
+from pathlib import Path
+import argparse
+import pytest
+
+
+TESTCASES = Path(__file__).parent.parent / 'testcases'
+
+
+@pytest.mark.parametrize('src', sorted(TESTCASES.glob('*.txt')))
+@pytest.mark.parametrize('workers', [1, 2, 3])
+def test_solve_as_text(src, workers):
+    assert parallel.solve_as_text('ans1', src, workers) == ans1.solve_as_text(src)
+    assert parallel.solve_as_text('ans2', src, workers, 3) == ans2.solve_as_text(src, 3)
+    assert parallel.solve_as_text('ans3', src, workers, 3, 4, 2.5) == ans3.solve_as_text(src, 3, 4, 2.5)
+    assert parallel.solve_as_text('ans4', src, workers, 3, 100, 100) == ans4.solve_as_text(src, 3, 100, 100)
+
+
+def test_shard_of():
+    assert parallel.shard_of('192.168.1.1/24', 7) == parallel.shard_of('192.168.1.200/24', 7)
+    assert 0 <= parallel.shard_of('10.20.30.1/16', 3) < 3
+
+
+@pytest.mark.parametrize('n', [1, 2, 5, 50])
+def test_line_ranges(tmp_path, n):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 0)
+    content = src.read_bytes()
+    ranges = parallel.line_ranges(src, n)
+
+    assert len(ranges) == n
+    assert b''.join(content[start:end] for start, end in ranges) == content
+    assert all(start == 0 or content[start - 1:start] == b'\n' for start, _ in ranges)
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+@pytest.mark.parametrize('workers', [2, 4])
+def test_random(tmp_path, seed, workers):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, seed)
+    assert parallel.solve_as_text('ans2', src, workers, 2) == ans2.solve_as_text(src, 2)
+    assert parallel.solve_as_text('ans4', src, workers, 2, 3, 150) == ans4.solve_as_text(src, 2, 3, 150)
+
+
+def test_invalid(tmp_path):
+    src = tmp_path / 'log.txt'
+    src.write_text('20201019133124,10.20.30.1/16,2\n20201019133125,10.20.30.1/16\n')
+    with pytest.raises(ValueError):
+        parallel.solve_as_text('ans1', src, 2)
+
+
+@pytest.mark.parametrize('workers', ['0', '-2'])
+def test_workers(workers, capsys):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('src', nargs='+')
+    cli.add_arguments(parser)
+    args = parser.parse_args(['log.txt', '--workers', workers])
+    with pytest.raises(SystemExit):
+        cli.check_arguments(parser, args)
+    assert '--workers must be at least 1' in capsys.readouterr().err
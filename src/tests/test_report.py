@@ -0,0 +1,74 @@
+from io import StringIO
+from answer.epoch import parse_date
+from answer import ans1, ans2, ans3, ans4, report
+from tests.test_batch import write_random_log
+import csv
+import json
+import pytest
+
+
+def write(sections, fmt='text', buffer_size=report.BUFFER_SIZE):
+    out = StringIO()
+    report.write_report(out, sections, fmt, buffer_size)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+@pytest.mark.parametrize('buffer_size', [1, 100, report.BUFFER_SIZE])
+def test_text(tmp_path, seed, buffer_size):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, seed)
+    # the same as printed by the modules
+    assert write([('interface', ans1.solve(src))], 'text', buffer_size) == ans1.solve_as_text(src) + '\n'
+    assert write([('interface', ans2.solve(src, 2))], 'text', buffer_size) == ans2.solve_as_text(src, 2) + '\n'
+    assert write([('interface', ans3.solve(src, 2, 3, 150))], 'text', buffer_size) == \
+        ans3.solve_as_text(src, 2, 3, 150) + '\n'
+    states, states_net = ans4.solve(src, 2, 3, 150)
+    assert write([('interface', states), ('network', states_net)], 'text', buffer_size) == \
+        ans4.solve_as_text(src, 2, 3, 150) + '\n'
+
+
+def test_empty():
+    assert write([('interface', dict())]) == '\n'
+    assert write([('interface', dict()), ('network', dict())]) == '[Interface]\n\n\n[Network]\n\n'
+
+
+def test_jsonl(datadir):
+    states, states_net = ans4.solve(datadir / 'in4.txt', 3, 100, 100)
+    records = [json.loads(line) for line in write([('interface', states), ('network', states_net)], 'jsonl').splitlines()]
+
+    assert records[0] == {
+        'kind': 'interface',
+        'address': '192.168.1.1/24',
+        'periods': [
+            {'status': 'FAILURE', 'start': parse_date('20201019133101'), 'end': parse_date('20201019133115')},
+            {'status': 'OVERLOAD', 'start': parse_date('20201019133115'), 'end': None},
+        ],
+    }
+    assert [record['kind'] for record in records] == ['interface'] * len(states) + ['network'] * len(states_net)
+    assert records[-1] == {'kind': 'network', 'address': '192.168.2.0/24', 'periods': []}
+
+
+def test_csv(datadir):
+    states = ans1.solve(datadir / 'in4.txt')
+    rows = list(csv.reader(StringIO(write([('interface', states)], 'csv'))))
+
+    assert rows[0] == ['kind', 'address', 'status', 'start', 'end']
+    assert rows[1] == ['interface', '192.168.1.1/24', 'FAILURE',
+                       str(parse_date('20201019133101')), str(parse_date('20201019133115'))]
+    # as many rows as periods of the text report
+    assert len(rows) - 1 == sum(len(state.format()) for state in states.values())
+
+
+def test_periods(tmp_path):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 2)
+    # the periods of the text report in the same order
+    for state in ans3.solve(src, 2, 3, 150).values():
+        assert [f'{status:8}' for status, _, _ in report.periods_of(state)] == \
+            [line[:8] for line in state.format()]
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        write([], 'xml')
@@ -0,0 +1,115 @@
+from ipaddress import IPv4Network
+from answer import ans4, rollup
+from tests.test_batch import write_random_log
+import pytest
+
+
+def sections(text):
+    return {section.split('\n')[0]: section.split('\n')[1:] for section in text.split('\n\n')}
+
+
+# lines of each network of a section
+def entries(lines):
+    result = dict()
+    for line in lines:
+        if not line.startswith(' '):
+            name = line
+            result[name] = []
+        else:
+            result[name].append(line)
+    return result
+
+
+def test_trie():
+    trie = rollup.PrefixTrie()
+    site = rollup.Group('site')
+    top = rollup.Group('10.0.0.0/8')
+    middle = rollup.Group('10.20.0.0/16')
+    other = rollup.Group('192.168.0.0/16')
+    trie.insert(IPv4Network('10.20.0.0/16'), middle)
+    trie.insert(IPv4Network('10.0.0.0/8'), top)
+    trie.insert(IPv4Network('10.0.0.0/8'), site)
+    trie.insert(IPv4Network('10.20.30.0/24'), site)
+    trie.insert(IPv4Network('192.168.0.0/16'), other)
+
+    assert trie.ancestors(IPv4Network('10.20.30.0/24')) == [top, site, middle]
+    assert trie.ancestors(IPv4Network('10.20.31.0/24')) == [top, site, middle]
+    assert trie.ancestors(IPv4Network('10.21.0.0/16')) == [top, site]
+    assert trie.ancestors(IPv4Network('192.168.1.0/24')) == [other]
+    assert trie.ancestors(IPv4Network('172.16.0.0/12')) == []
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_same_level(tmp_path, seed):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, seed)
+    text = rollup.solve_as_text(src, 2, 3, 150, [16, 24])
+    # ans4 is left as it is
+    assert text.startswith(ans4.solve_as_text(src, 2, 3, 150) + '\n\n')
+    # supernets of the length of a subnet are the subnet, and so is a
+    # supernet of one subnet
+    result = sections(text)
+    supernets = entries(result['[Supernet]'])
+    networks = entries(result['[Network]'])
+    assert supernets == {**networks, '192.168.0.0/16:': networks['192.168.1.0/24:']}
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_site(tmp_path, seed):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, seed)
+    sites = {'all': [IPv4Network('10.0.0.0/8'), IPv4Network('192.168.0.0/16')]}
+    result = sections(rollup.solve_as_text(src, 2, 3, 150, [0], sites))
+
+    # a group fails as one subnet of all of its interfaces
+    hosts = dict()
+    lines = []
+    for line in src.read_text().splitlines():
+        date, addr, time = line.split(',')
+        hosts.setdefault(addr, f'172.16.0.{len(hosts) + 1}/16')
+        lines.append(f'{date},{hosts[addr]},{time}')
+    merged = tmp_path / 'merged.txt'
+    merged.write_text('\n'.join(lines) + '\n')
+    expected = sections(ans4.solve_as_text(merged, 2, 3, 150))['[Network]'][1:]
+
+    assert result['[Site]'] == ['all:'] + expected
+    assert result['[Supernet]'] == ['0.0.0.0/0:'] + expected
+
+
+# a site inside a subnet holds the interfaces of the subnet in it
+def test_site_in_subnet(tmp_path):
+    lines = ['20201019133124,10.0.0.1/24,-', '20201019133125,10.0.0.100/24,-',
+             '20201019133134,10.0.0.1/24,-', '20201019133135,10.0.0.100/24,2']
+    src = tmp_path / 'log.txt'
+    src.write_text('\n'.join(lines) + '\n')
+    inside = tmp_path / 'inside.txt'
+    inside.write_text('\n'.join(line for line in lines if '10.0.0.1/' in line) + '\n')
+    sites = {'rack': [IPv4Network('10.0.0.0/26')], 'empty': [IPv4Network('10.0.1.0/26')]}
+    result = sections(rollup.solve_as_text(src, 1, 3, 150, [24, 25], sites))
+
+    networks = entries(result['[Network]'])
+    expected = entries(sections(ans4.solve_as_text(inside, 1, 3, 150))['[Network]'])['10.0.0.0/24:']
+    assert networks['10.0.0.0/24:'] != expected
+    assert entries(result['[Site]']) == {
+        'rack:': expected,
+        'empty:': ['  '],
+    }
+    # supernets longer than the subnet are not made
+    assert entries(result['[Supernet]']) == networks
+
+
+def test_read_sites(tmp_path):
+    path = tmp_path / 'sites.txt'
+    path.write_text('# name prefixes\n'
+                    'tokyo 10.20.0.0/16 192.168.1.0/24\n'
+                    '\n'
+                    'osaka 10.30.0.0/16  # second floor\n'
+                    'tokyo 10.40.0.0/16\n')
+    assert rollup.read_sites(path) == {
+        'tokyo': [IPv4Network('10.20.0.0/16'), IPv4Network('192.168.1.0/24'), IPv4Network('10.40.0.0/16')],
+        'osaka': [IPv4Network('10.30.0.0/16')],
+    }
+
+    path.write_text('tokyo\n')
+    with pytest.raises(ValueError):
+        rollup.read_sites(path)
@@ -0,0 +1,160 @@
+from answer import ans4, server
+from answer.epoch import format_date, parse_date
+from tests.test_batch import write_random_log
+from ipaddress import IPv4Interface, IPv4Network
+from pathlib import Path
+import asyncio
+import json
+import os
+import pytest
+
+
+TESTCASES = Path(__file__).parent.parent / 'testcases'
+
+
+async def send(path, lines):
+    reader, writer = await asyncio.open_unix_connection(path)
+    # several lines at once, as an agent would
+    for i in range(0, len(lines), 7):
+        writer.write(''.join(line + '\n' for line in lines[i:i + 7]).encode())
+        await writer.drain()
+    writer.close()
+    await writer.wait_closed()
+
+
+async def ask(path, queries):
+    reader, writer = await asyncio.open_unix_connection(path)
+    writer.write(''.join(q + '\n' for q in queries).encode())
+    await writer.drain()
+    answers = [json.loads(await reader.readline()) for _ in queries]
+    writer.close()
+    await writer.wait_closed()
+    return answers
+
+
+def run_server(tmp_path, agents, queries, window=None, known=()):
+    monitor = server.Monitor(2, 3, 150, window)
+    for src in known:
+        monitor.know(src)
+    path = str(tmp_path / 'monitor.sock')
+
+    async def main():
+        srv = await server.start(monitor, unix=path)
+        async with srv:
+            await asyncio.gather(*(send(path, lines) for lines in agents))
+            monitor.flush()
+            return await ask(path, queries)
+
+    return monitor, asyncio.run(main())
+
+
+def test_agents(tmp_path):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 0)
+    lines = src.read_text().splitlines()
+    # each agent monitors its own subnet
+    agents = [[line for line in lines if '10.20.' in line], [line for line in lines if '192.168.' in line]]
+    addrs = ['10.20.30.1/16', '10.20.30.2/16', '192.168.1.1/24', '192.168.1.2/24']
+    monitor, answers = run_server(tmp_path, agents,
+                                  [f'STATUS {addr}' for addr in addrs] + ['FAILURES 192.168.1.0/24', 'STATS'],
+                                  window=10 ** 6, known=[src])
+
+    states, states_net = ans4.solve(src, 2, 3, 150)
+    for addr, answer in zip(addrs, answers):
+        assert answer['status'] == states[IPv4Interface(addr)].status.name
+    failing = [addr for addr in addrs[2:] if states[IPv4Interface(addr)].status.name == 'FAILURE']
+    assert [f['interface'] for f in answers[4]['failing']] == failing
+    assert answers[4]['since'] == (None if states_net[IPv4Network('192.168.1.0/24')].fail_start is None
+                                   else format_date(states_net[IPv4Network('192.168.1.0/24')].fail_start))
+    assert answers[5] == {'lines': len(lines), 'errors': 0, 'pending': 0, 'late': 0, 'interfaces': 4, 'networks': 2}
+
+
+# an agent behind the other by up to window seconds
+def test_window():
+    lines = (TESTCASES / 'in4-1.txt').read_bytes().splitlines()
+    behind = [line for line in lines if b'192.168.1.3/' in line]
+    ahead = [line for line in lines if b'192.168.1.3/' not in line]
+    monitor = server.Monitor(1, 100, 100, window=5)
+    monitor.know(TESTCASES / 'in4-1.txt')
+    # 192.168.1.1/24 recovers before 192.168.1.3/24 fails, in order of arrival
+    for line in ahead + behind:
+        monitor.feed(line)
+    # older than the window
+    monitor.feed(b'20201019133100,192.168.2.1/24,-')
+    monitor.flush()
+
+    states, states_net = ans4.solve(TESTCASES / 'in4-1.txt', 1, 100, 100)
+    for addr, state in states.items():
+        assert monitor.interface_state(addr) == state
+    for network, state_net in states_net.items():
+        assert monitor.network_state(network).periods == state_net.periods
+    assert monitor.network_state(IPv4Network('192.168.1.0/24')).periods != []
+    assert monitor.stats()['late'] == 1
+
+
+# without a window, lines are analysed as they come, and none is dropped
+def test_no_window():
+    lines = (TESTCASES / 'in4-1.txt').read_bytes().splitlines()
+    behind = [line for line in lines if b'192.168.1.3/' in line]
+    ahead = [line for line in lines if b'192.168.1.3/' not in line]
+    monitor = server.Monitor(1, 100, 100)
+    monitor.know(TESTCASES / 'in4-1.txt')
+    for line in ahead + behind:
+        monitor.feed(line)
+
+    states, _ = ans4.solve(TESTCASES / 'in4-1.txt', 1, 100, 100)
+    for addr, state in states.items():
+        assert monitor.interface_state(addr) == state
+    assert monitor.stats()['lines'] == len(lines)
+    assert monitor.stats()['pending'] == 0
+    assert monitor.stats()['late'] == len([line for line in behind if line < ahead[-1]])
+
+
+# the lines held in the window are analysed and reported when the service stops
+def test_serve(tmp_path, capsys):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, 0)
+    lines = src.read_text().splitlines()
+    monitor = server.Monitor(2, 3, 150, window=10 ** 6)
+    monitor.know(src)
+    path = str(tmp_path / 'monitor.sock')
+
+    async def main():
+        task = asyncio.create_task(server.serve(monitor, None, None, path))
+        while not os.path.exists(path):
+            await asyncio.sleep(0.01)
+        await send(path, lines)
+        while monitor.stats()['pending'] < len(lines):
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert capsys.readouterr().out == ans4.solve_as_text(src, 2, 3, 150) + '\n'
+    assert monitor.stats()['lines'] == len(lines)
+
+
+def test_known(tmp_path):
+    # 192.168.1.3/24 is not failing yet when the others are
+    lines = (TESTCASES / 'in4-1.txt').read_bytes().splitlines()[:7]
+    monitor = server.Monitor(1, 100, 100)
+    monitor.know(TESTCASES / 'in4-1.txt')
+    for line in lines:
+        monitor.feed(line)
+    assert monitor.failures('192.168.1.0/24')['since'] is None
+
+    lazy = server.Monitor(1, 100, 100)
+    for line in lines:
+        lazy.feed(line)
+    assert lazy.failures('192.168.1.0/24')['since'] is not None
+
+
+def test_errors(tmp_path):
+    _, answers = run_server(tmp_path, [['20201019133124,10.20.30.1/16,2', '20201019133124,broken', '20201019133125,10.20.30.1/16,-']],
+                            ['STATUS 10.20.30.9/16', 'STATUS 10.20.30.1/16', 'FAILURES x', 'HELLO', 'STATS'])
+    assert answers[0] == {'error': 'unknown interface: 10.20.30.9/16'}
+    assert answers[1] == {'interface': '10.20.30.1/16', 'status': 'OVERLOAD', 'since': format_date(parse_date('20201019133125'))}
+    assert 'error' in answers[2]
+    assert answers[3] == {'error': 'unknown query: HELLO'}
+    assert answers[4] == {'lines': 2, 'errors': 1, 'pending': 0, 'late': 0, 'interfaces': 1, 'networks': 1}
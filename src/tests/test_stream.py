@@ -0,0 +1,116 @@
+from answer.stream import ReorderBuffer, parse_logs_mmap, reorder, read_interfaces, read_records
+from answer.address import AddressTable
+from answer.epoch import parse_date
+from answer import ans4, instrument
+from pathlib import Path
+import gzip
+import pytest
+
+
+TESTCASES = Path(__file__).parent.parent / 'testcases'
+
+
+def test_reorder_buffer():
+    buffer = ReorderBuffer(2, key=lambda x: x)
+    assert buffer.push(3) == []
+    assert buffer.push(1) == [1]
+    assert buffer.push(4) == []
+    assert buffer.push(6) == [3, 4]
+    assert len(buffer) == 1
+    assert buffer.flush() == [6]
+
+
+def test_reorder_buffer_late():
+    buffer = ReorderBuffer(1, key=lambda x: x)
+    assert buffer.push(5) == []
+    assert buffer.push(7) == [5]
+    # older than what is already emitted
+    assert buffer.push(2) == []
+    assert buffer.late == 1
+    assert buffer.flush() == [7]
+
+
+@pytest.mark.parametrize('xs, window, desired', [
+    ([1, 2, 3], 0, [1, 2, 3]),
+    ([2, 1, 4, 3, 5], 1, [1, 2, 3, 4, 5]),
+    ([3, 6, 1], 1, [3, 6]),
+    ([5, 1, 2, 3], 4, [1, 2, 3, 5]),
+])
+def test_reorder(xs, window, desired):
+    assert list(reorder(xs, window, key=lambda x: x)) == desired
+
+
+def test_reorder_late(capsys):
+    with instrument.profiling() as profile:
+        assert list(reorder([10, 11, 12, 0, 13, 1], 1, key=lambda x: x)) == [10, 11, 12, 13]
+    assert profile.counters['late'] == 2
+    with instrument.counting() as counts:
+        assert list(reorder([10, 11, 12, 0, 13, 1], 1, key=lambda x: x)) == [10, 11, 12, 13]
+    assert counts['late'] == 2
+    # left to the caller to report
+    assert capsys.readouterr().err == ''
+
+
+def test_reorder_stable():
+    xs = [(1, 'a'), (0, 'b'), (1, 'c'), (0, 'd')]
+    assert list(reorder(xs, 1, key=lambda x: x[0])) == [(0, 'b'), (0, 'd'), (1, 'a'), (1, 'c')]
+
+
+def test_read_records(tmp_path):
+    src = tmp_path / 'log.txt'
+    src.write_bytes(b'20201019133124,10.20.30.1/16,2\n'
+                    b'20201019133124,192.168.1.1/24,-\r\n'
+                    b'20201019133125,10.20.30.1/16,15')
+    table = AddressTable()
+    assert list(read_records(src, table)) == [
+        (parse_date('20201019133124'), 0, 2),
+        (parse_date('20201019133124'), 1, None),
+        (parse_date('20201019133125'), 0, 15),
+    ]
+    assert [str(addr) for addr in table.interfaces] == ['10.20.30.1/16', '192.168.1.1/24']
+
+
+def test_read_records_empty(tmp_path):
+    src = tmp_path / 'log.txt'
+    src.write_bytes(b'')
+    assert list(read_records(src, AddressTable())) == []
+
+
+@pytest.mark.parametrize('content', [
+    b'20201019133124,10.20.30.1/16\n',
+    b'20201019133124,10.20.30.1/16,2,3\n',
+    b'20201019133124,10.20.30.1/16,2\n\n20201019133124,10.20.30.1/16,2\n',
+    b'2020101913312x,10.20.30.1/16,2\n',
+])
+def test_read_records_invalid(tmp_path, content):
+    src = tmp_path / 'log.txt'
+    src.write_bytes(content)
+    with pytest.raises(ValueError):
+        list(read_records(src, AddressTable()))
+
+
+@pytest.mark.parametrize('src', sorted(TESTCASES.glob('*.txt')))
+def test_read_interfaces(tmp_path, src):
+    table = AddressTable()
+    desired = list(dict.fromkeys(iface for _, iface, _ in read_records(src, table)))
+    assert read_interfaces(src, table) == desired
+
+    compressed = tmp_path / 'log.txt.gz'
+    compressed.write_bytes(gzip.compress(src.read_bytes()))
+    assert read_interfaces(compressed, table) == desired
+
+
+def test_read_interfaces_invalid(tmp_path):
+    src = tmp_path / 'log.txt'
+    src.write_bytes(b'20201019133124,10.20.30.1/16,2\n\n')
+    with instrument.profiling() as profile:
+        with pytest.raises(ValueError):
+            read_interfaces(src, AddressTable())
+    assert profile.counters['parse_failures'] == 1
+
+
+@pytest.mark.parametrize('src', sorted(TESTCASES.glob('*.txt')))
+def test_parse_logs_mmap(src):
+    table = AddressTable()
+    logs = [ans4.parse_log(line, table) for line in src.read_text().splitlines()]
+    assert list(parse_logs_mmap(src, AddressTable(), ans4.MonitorLog)) == logs
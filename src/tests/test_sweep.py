@@ -0,0 +1,41 @@
+from answer import ans3, ans4, sweep
+from tests.test_batch import write_random_log
+import pytest
+
+
+PARAMS = sweep.grid([1, 2, 3], [1, 3], [50, 150.5])
+
+
+def reports(text):
+    return text.split('\n\n# ')[1:]
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_ans3(tmp_path, seed):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, seed)
+    result = reports(sweep.solve_as_text(src, PARAMS, reports=True))
+    assert len(result) == len(PARAMS)
+    for p, report in zip(PARAMS, result):
+        header, text = report.split('\n', 1)
+        assert header == p.format()
+        assert text == ans3.solve_as_text(src, p.fail_threshould, p.overload_count, p.overload_threshould)
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_ans4(tmp_path, seed):
+    src = tmp_path / 'log.txt'
+    write_random_log(src, seed)
+    result = reports(sweep.solve_as_text(src, PARAMS, networks=True, reports=True))
+    for p, report in zip(PARAMS, result):
+        _, text = report.split('\n', 1)
+        assert text == ans4.solve_as_text(src, p.fail_threshould, p.overload_count, p.overload_threshould)
+
+
+def test_summary(datadir):
+    params = sweep.grid([2], [2], [100])
+    lines = sweep.solve_as_text(datadir / 'in1.txt', params, networks=True).split('\n')
+    assert lines == [
+        'N\tm\tt\tfailures\tfailed\toverloads\toverloaded\tnetwork_failures',
+        '2\t2\t100\t2\t1\t4\t3\t0',
+    ]